@@ -0,0 +1,14 @@
+#!/usr/bin/env python
+
+import sys
+
+from vimapt import Service
+
+
+def main():
+    vim_dir = sys.argv[1]
+    Service.get_service(vim_dir).clean()
+
+
+if __name__ == "__main__":
+    main()
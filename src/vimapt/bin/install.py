@@ -1,20 +1,17 @@
 # -*- coding: utf-8 -*-
+
 import sys
 
-from vimapt import Install
-from vimapt.exception import VimaptAbortOperationException
+from vimapt import Service
+from vimapt import Timing
 
 
 def main():
-    vim_dir = sys.argv[1]
-    package_name = sys.argv[2]
-    install = Install.Install(vim_dir)
-    try:
-        install.repo_install(package_name)
-    except VimaptAbortOperationException as e:
-        print(e)
-    else:
-        print("Install Succeed!")
+    profile_file, argument_list = Timing.pop_profile_option(sys.argv[1:])
+    vim_dir = argument_list[0]
+    package_name_list = argument_list[1:]
+    with Timing.profile(profile_file):
+        Service.get_service(vim_dir).install(*package_name_list)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,15 @@
+#!/usr/bin/env python
+
+import sys
+
+from vimapt import Service
+
+
+def main():
+    vim_dir = sys.argv[1]
+    path = sys.argv[2]
+    Service.get_service(vim_dir).owns(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,15 @@
 #!/usr/bin/env python
 
-import os
 import sys
 
 import vim
 
-from vimapt.data_format import loads
+from vimapt import Service
 
 
 def main():
     vim_dir = sys.argv[1]
-    cache_dir = os.path.join(vim_dir, 'vimapt/cache')
-    local_package_index_path = os.path.join(cache_dir, 'index/package')
-
-    with open(local_package_index_path) as fd:
-        source_stream = fd.read()
-
-    source_data = loads(source_stream)
-    package_name_list = source_data.keys()
-    return package_name_list
+    return Service.get_service(vim_dir).get_package_name_list()
 
 
 if __name__ == "__main__":
@@ -1,28 +1,15 @@
 #!/usr/bin/env python
 
-import os
 import sys
 
 import vim
 
+from vimapt import Service
+
 
 def main():
     vim_dir = sys.argv[1]
-
-    install_dir = os.path.join(vim_dir, 'vimapt/install')
-    install_file_list = []
-    for f in os.listdir(install_dir):
-        if os.path.isfile(os.path.join(install_dir, f)) and not os.path.basename(f).startswith('.'):
-            install_file_list.append(f)
-
-    remove_dir = os.path.join(vim_dir, 'vimapt/remove')
-    remove_file_list = []
-    for f in os.listdir(remove_dir):
-        if os.path.isfile(os.path.join(remove_dir, f)) and not os.path.basename(f).startswith('.'):
-            remove_file_list.append(f)
-
-    file_list = remove_file_list + install_file_list
-    return file_list
+    return Service.get_service(vim_dir).get_purge_list()
 
 
 if __name__ == "__main__":
@@ -1,21 +1,15 @@
 #!/usr/bin/env python
 
-import os
-
 import sys
+
 import vim
 
+from vimapt import Service
+
 
 def main():
     vim_dir = sys.argv[1]
-    install_dir = os.path.join(vim_dir, 'vimapt/install')
-    file_list = []
-
-    for f in os.listdir(install_dir):
-        if os.path.isfile(os.path.join(install_dir, f)) and not os.path.basename(f).startswith('.'):
-            file_list.append(f)
-
-    return file_list
+    return Service.get_service(vim_dir).get_remove_list()
 
 
 if __name__ == "__main__":
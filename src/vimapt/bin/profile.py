@@ -0,0 +1,15 @@
+#!/usr/bin/env python
+
+import sys
+
+from vimapt import Service
+
+
+def main():
+    vim_dir = sys.argv[1]
+    log_file = sys.argv[2]
+    Service.get_service(vim_dir).profile(log_file)
+
+
+if __name__ == "__main__":
+    main()
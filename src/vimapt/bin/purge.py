@@ -2,16 +2,16 @@
 
 import sys
 
-from vimapt import Purge
+from vimapt import Service
+from vimapt import Timing
 
 
 def main():
-    vim_dir = sys.argv[1]
-    package_name = sys.argv[2]
-
-    purge = Purge.Purge(vim_dir)
-    purge.purge_package(package_name)
-    print("Purge Succeed!")
+    profile_file, argument_list = Timing.pop_profile_option(sys.argv[1:])
+    vim_dir = argument_list[0]
+    package_name = argument_list[1]
+    with Timing.profile(profile_file):
+        Service.get_service(vim_dir).purge(package_name)
 
 
 if __name__ == "__main__":
@@ -2,15 +2,16 @@
 
 import sys
 
-from vimapt import Remove
+from vimapt import Service
+from vimapt import Timing
 
 
 def main():
-    vim_dir = sys.argv[1]
-    package_name = sys.argv[2]
-    remove = Remove.Remove(vim_dir)
-    remove.remove_package(package_name)
-    print("Remove Succeed!")
+    profile_file, argument_list = Timing.pop_profile_option(sys.argv[1:])
+    vim_dir = argument_list[0]
+    package_name = argument_list[1]
+    with Timing.profile(profile_file):
+        Service.get_service(vim_dir).remove(package_name)
 
 
 if __name__ == "__main__":
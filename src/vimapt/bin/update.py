@@ -2,14 +2,15 @@
 
 import sys
 
-from vimapt import LocalRepo
+from vimapt import Service
+from vimapt import Timing
 
 
 def main():
-    vim_dir = sys.argv[1]
-    repo = LocalRepo.LocalRepo(vim_dir)
-    repo.update()
-    print("Update Succeed!")
+    profile_file, argument_list = Timing.pop_profile_option(sys.argv[1:])
+    vim_dir = argument_list[0]
+    with Timing.profile(profile_file):
+        Service.get_service(vim_dir).update()
 
 
 if __name__ == "__main__":
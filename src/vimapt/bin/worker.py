@@ -0,0 +1,17 @@
+#!/usr/bin/env python
+"""
+Background worker, run as a job by vimapt.vim:
+
+    python worker.py [--profile FILE] <vim dir> <install|update> [args...]
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "library"))
+
+from vimapt import Worker  # noqa: E402
+
+
+if __name__ == "__main__":
+    sys.exit(Worker.main())
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+"""
+Compare codecs of vimapt.data_format on realistic install record and index sizes.
+
+Usage: python benchmarks/bench_data_format.py [repeat]
+"""
+
+import os
+import sys
+import timeit
+import functools
+
+import yaml
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vimapt.data_format import get_codec  # noqa: E402
+
+
+def make_record(file_number):
+    return [["plugin/dir%d/file%d.vim" % (i % 10, i), i * 7] for i in range(file_number)]
+
+
+def make_index(package_number):
+    index = {}
+    for i in range(package_number):
+        version_list = [{'version': '1.%d-1' % v,
+                         'path': 'pool/package%d_1.%d-1.vpb' % (i, v),
+                         'sha256': '%064x' % (i * 10 + v)} for v in range(3)]
+        index['package%d' % i] = dict(version_list[-1], versions=version_list)
+    return index
+
+
+def get_pure_python_yaml_codec():
+    return (functools.partial(yaml.load, Loader=yaml.Loader),
+            functools.partial(yaml.dump, Dumper=yaml.Dumper))
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+
+    codec_dict = {
+        'yaml (pure python)': get_pure_python_yaml_codec(),
+        'yaml': get_codec('yaml'),
+        'json': get_codec('json'),
+    }
+    data_dict = {
+        'record (200 files)': make_record(200),
+        'index (1000 packages)': make_index(1000),
+        'index (10000 packages)': make_index(10000),
+    }
+
+    print("%-24s %-20s %12s %12s %10s" % ('data', 'codec', 'loads (ms)', 'dumps (ms)', 'size'))
+    for data_name in sorted(data_dict):
+        data = data_dict[data_name]
+        for codec_name in sorted(codec_dict):
+            loads, dumps = codec_dict[codec_name]
+            stream = dumps(data)
+            loads_time = min(timeit.repeat(lambda: loads(stream), number=1, repeat=repeat))
+            dumps_time = min(timeit.repeat(lambda: dumps(data), number=1, repeat=repeat))
+            print("%-24s %-20s %12.2f %12.2f %10d" % (data_name, codec_name,
+                                                      loads_time * 1000, dumps_time * 1000, len(stream)))
+
+
+if __name__ == "__main__":
+    main()
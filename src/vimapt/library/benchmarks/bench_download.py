@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+"""
+Compare one-by-one package download with concurrent download over keep-alive connections,
+against a local HTTP stand-in of package repository with simulated latency.
+
+Usage: python benchmarks/bench_download.py [package number] [latency in seconds] [jobs]
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vimapt.LocalRepo import LocalRepo  # noqa: E402
+from vimapt.RemoteRepo import RemoteRepo  # noqa: E402
+from vimapt.tests.repo_server import RepoServer  # noqa: E402
+
+
+def make_repo(work_dir, package_number, package_size=64 * 1024):
+    repo_dir = os.path.join(work_dir, "remote")
+    os.makedirs(os.path.join(repo_dir, "pool"))
+    os.makedirs(os.path.join(repo_dir, "index"))
+    for i in range(package_number):
+        with open(os.path.join(repo_dir, "pool", "package%d_1.0-1.vpb" % i), "wb") as fd:
+            fd.write(os.urandom(package_size))
+    RemoteRepo(repo_dir).make_package_index()
+    return repo_dir
+
+
+def make_vim_dir(work_dir, source_url):
+    vim_dir = os.path.join(work_dir, "vim")
+    os.makedirs(os.path.join(vim_dir, "vimapt/cache/index"))
+    os.makedirs(os.path.join(vim_dir, "vimapt/cache/pool"))
+    with open(os.path.join(vim_dir, "vimapt/source"), "w") as fd:
+        fd.write(source_url)
+    repo = LocalRepo(vim_dir)
+    repo.update()
+    return repo
+
+
+def main():
+    package_number = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    delay = float(sys.argv[2]) if len(sys.argv) > 2 else 0.02
+    jobs = int(sys.argv[3]) if len(sys.argv) > 3 else 8
+
+    work_dir = tempfile.mkdtemp()
+    try:
+        repo_dir = make_repo(work_dir, package_number)
+        package_spec_list = [("package%d" % i, None) for i in range(package_number)]
+        with RepoServer(repo_dir, delay=delay) as server:
+            repo = make_vim_dir(work_dir, server.url)
+
+            connection_count = server.connection_count
+            start_time = time.time()
+            for package_name, version in package_spec_list:
+                repo.get_package(package_name, version)
+            sequential_time = time.time() - start_time
+            sequential_connection = server.connection_count - connection_count
+
+            repo.clean()
+
+            connection_count = server.connection_count
+            start_time = time.time()
+            repo.get_packages(package_spec_list, jobs)
+            concurrent_time = time.time() - start_time
+            concurrent_connection = server.connection_count - connection_count
+
+        print("%d packages, %.3fs latency per request" % (package_number, delay))
+        print("%-24s %10s %12s" % ("mode", "time (s)", "connections"))
+        print("%-24s %10.3f %12d" % ("one by one", sequential_time, sequential_connection))
+        print("%-24s %10.3f %12d" % ("concurrent (%d jobs)" % jobs, concurrent_time, concurrent_connection))
+    finally:
+        shutil.rmtree(work_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+"""
+Measure cold start of every bin/*.py entry point with 'python -X importtime' (python 3.7+).
+
+Usage: python benchmarks/bench_import.py [repeat]
+
+Each entry point is loaded in a fresh interpreter without running its main(),
+a placeholder 'vim' module stands in for the one Vim provides.
+Time is import time on top of a bare interpreter, best of repeat runs.
+"""
+
+import os
+import re
+import sys
+import subprocess
+
+library_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+bin_dir = os.path.join(os.path.dirname(library_dir), "bin")
+
+LOAD_SCRIPT = """
+import sys, types, runpy
+sys.path.insert(0, %r)
+sys.modules['vim'] = types.ModuleType('vim')
+runpy.run_path(%r, run_name='bench')
+"""
+
+# e.g. "import time:       102 |        340 |   vimapt.Install"
+IMPORTTIME_PATTERN = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)')
+
+
+def measure(script):
+    """
+    :return: tuple of total import time of top level modules in usec and list of (cumulative usec, module)
+    """
+    process = subprocess.Popen([sys.executable, "-X", "importtime", "-c", script],
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    _, stderr = process.communicate()
+    if process.returncode != 0:
+        raise RuntimeError(stderr.decode("utf-8", "replace"))
+
+    module_list = []
+    for line in stderr.decode("utf-8", "replace").splitlines():
+        match = IMPORTTIME_PATTERN.match(line)
+        # cumulative time of top level imports, nested imports are counted in them
+        if match and len(match.group(3)) == 1:
+            module_list.append((int(match.group(2)), match.group(4)))
+    return sum(i[0] for i in module_list), module_list
+
+
+def best_of(script, repeat):
+    return min((measure(script) for _ in range(repeat)), key=lambda i: i[0])
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    baseline, baseline_modules = best_of("pass", repeat)
+    baseline_names = set(name for _, name in baseline_modules)
+
+    print("%-22s %10s  %s" % ("entry point", "import ms", "heaviest imports"))
+    for file_name in sorted(os.listdir(bin_dir)):
+        if not file_name.endswith(".py"):
+            continue
+        script = LOAD_SCRIPT % (library_dir, os.path.join(bin_dir, file_name))
+        total, module_list = best_of(script, repeat)
+        heaviest = sorted((i for i in module_list if i[1] not in baseline_names), reverse=True)[:3]
+        print("%-22s %10.2f  %s" % (file_name, (total - baseline) / 1000.0,
+                                    ", ".join("%s %.1f" % (name, usec / 1000.0) for usec, name in heaviest)))
+
+
+if __name__ == "__main__":
+    main()
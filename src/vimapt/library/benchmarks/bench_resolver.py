@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+"""
+Time the dependency resolver on a synthetic large index.
+
+Usage: python benchmarks/bench_resolver.py [package number] [versions per package] [fan-out] [chain depth]
+"""
+
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vimapt.Resolver import Resolver  # noqa: E402
+
+
+def make_index(package_number, version_number, fan_out, seed=0):
+    """
+    Package i depends on up to fan_out packages with bigger number, so the graph has no cycle
+    """
+    rng = random.Random(seed)
+    index_data = {}
+    for i in range(package_number):
+        versions = []
+        for v in range(version_number):
+            candidates = range(i + 1, min(package_number, i + 1 + fan_out * 4))
+            depend_list = ['package%d>=1.0' % d for d in rng.sample(candidates, min(fan_out, len(candidates)))]
+            versions.append({'version': '1.%d-1' % v,
+                             'path': 'pool/package%d_1.%d-1.vpb' % (i, v),
+                             'depends': depend_list,
+                             'conflicts': []})
+        index_data['package%d' % i] = dict(versions[-1], versions=versions)
+    return index_data
+
+
+def make_chain_index(depth):
+    index_data = {}
+    for i in range(depth):
+        entry = {'version': '1.0-1', 'path': 'pool/chain%d_1.0-1.vpb' % i,
+                 'depends': ['chain%d' % (i + 1)] if i + 1 < depth else [], 'conflicts': []}
+        index_data['chain%d' % i] = dict(entry, versions=[entry])
+    return index_data
+
+
+def timed(label, function):
+    start_time = time.time()
+    result = function()
+    print("%-48s %8.3fs %8d packages" % (label, time.time() - start_time, len(result)))
+
+
+def main():
+    package_number = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    version_number = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    fan_out = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+    depth = int(sys.argv[4]) if len(sys.argv) > 4 else 5000
+
+    index_data = make_index(package_number, version_number, fan_out)
+    timed("resolve package0 (%d packages, fan-out %d)" % (package_number, fan_out),
+          lambda: Resolver(index_data).resolve(['package0']))
+    timed("resolve 100 roots",
+          lambda: Resolver(index_data).resolve(['package%d' % i for i in range(0, package_number, package_number // 100)]))
+
+    chain_index = make_chain_index(depth)
+    timed("resolve chain of depth %d" % depth, lambda: Resolver(chain_index).resolve(['chain0']))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+"""
+Compare Vim startup cost of sourcing every 'vimrc/*.vimrc' with sourcing the loader made by vimapt.
+
+Usage: python benchmarks/bench_startup.py [package number] [repeat]
+
+Vim is run headless (vim -Nu NONE -es), and only the sourcing part is timed by Vim's reltime().
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vimapt.Loader import Loader  # noqa: E402
+from vimapt.PackageDatabase import PackageDatabase  # noqa: E402
+
+GLOB_SCRIPT = """
+let s:start = reltime()
+for vimrc_file in split(glob('%(vim_dir)s/vimrc/*.vimrc'), '\\n')
+    execute 'source' vimrc_file
+endfor
+call writefile([reltimestr(reltime(s:start))], '%(result_file)s')
+qa!
+"""
+
+LOADER_SCRIPT = """
+let s:start = reltime()
+execute 'source' fnameescape('%(loader_file)s')
+call writefile([reltimestr(reltime(s:start))], '%(result_file)s')
+qa!
+"""
+
+
+def make_vim_dir(work_dir, package_number):
+    vim_dir = os.path.join(work_dir, "vim")
+    for sub_dir in ["vimapt/install", "vimapt/remove", "vimapt/control", "vimrc"]:
+        os.makedirs(os.path.join(vim_dir, sub_dir))
+
+    database = PackageDatabase(vim_dir)
+    for i in range(package_number):
+        name = "package%d" % i
+        path = "vimrc/%s.vimrc" % name
+        with open(os.path.join(vim_dir, path), "w") as fd:
+            fd.write("let g:%s_enabled = 1\n" % name)
+            fd.write("nnoremap <leader>%d :echo 'package %d'<CR>\n" % (i, i))
+        depends = ["package%d" % (i + 1)] if i + 1 < package_number and i % 3 == 0 else []
+        database.install(name, {"version": "1.0", "depends": depends}, [path])
+    database.close()
+    return vim_dir
+
+
+def run_vim(script, repeat):
+    result_list = []
+    for _ in range(repeat):
+        subprocess.check_call(["vim", "-Nu", "NONE", "-i", "NONE", "-es", "-S", script])
+        with open(script + ".result") as fd:
+            result_list.append(float(fd.read().strip()))
+    return min(result_list)
+
+
+def write_script(path, template, **kwargs):
+    kwargs["result_file"] = path + ".result"
+    with open(path, "w") as fd:
+        fd.write(template % kwargs)
+    return path
+
+
+def main():
+    package_number = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    work_dir = tempfile.mkdtemp()
+    try:
+        vim_dir = make_vim_dir(work_dir, package_number)
+        loader_file = Loader(vim_dir).generate()
+
+        glob_script = write_script(os.path.join(work_dir, "glob.vim"), GLOB_SCRIPT, vim_dir=vim_dir)
+        loader_script = write_script(os.path.join(work_dir, "loader.vim"), LOADER_SCRIPT, loader_file=loader_file)
+
+        try:
+            glob_time = run_vim(glob_script, repeat)
+            loader_time = run_vim(loader_script, repeat)
+        except OSError:
+            print("vim is not found, skip")
+            return
+        print("%d packages, best of %d runs" % (package_number, repeat))
+        print("  source every vimrc file: %.2f ms" % (glob_time * 1000))
+        print("  source loader:           %.2f ms" % (loader_time * 1000))
+    finally:
+        shutil.rmtree(work_dir)
+
+
+if __name__ == "__main__":
+    main()
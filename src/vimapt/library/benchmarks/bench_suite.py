@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+"""
+Benchmark suite of core operations on synthetic packages and repositories, results are saved as JSON
+so that revisions can be compared.
+
+Usage:
+    python benchmarks/bench_suite.py -o before.json
+    python benchmarks/bench_suite.py -o after.json --compare before.json
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vimapt.Compress import Compress  # noqa: E402
+from vimapt.Extract import Extract  # noqa: E402
+from vimapt.Install import Install  # noqa: E402
+from vimapt.RemoteRepo import RemoteRepo  # noqa: E402
+from vimapt.Vimapt import Vimapt  # noqa: E402
+from vimapt.tests import generators  # noqa: E402
+
+timer = getattr(time, 'perf_counter', time.time)
+
+
+def measure(function, setup=None, repeat=5):
+    """
+    Run function repeat times, setup is run before each run and not timed
+    :param function: an executable object take the value setup returns
+    :param setup: an executable object take no args
+    :param repeat: number of runs
+    :return: list of seconds
+    """
+    time_list = []
+    for _ in range(repeat):
+        argument = setup() if setup else None
+        start_time = timer()
+        function(argument)
+        time_list.append(timer() - start_time)
+    return time_list
+
+
+class Suite(object):
+    def __init__(self, work_dir, args):
+        self.work_dir = work_dir
+        self.args = args
+        self.run_number = 0
+
+    def new_dir(self, prefix):
+        self.run_number += 1
+        path = os.path.join(self.work_dir, "%s%d" % (prefix, self.run_number))
+        os.makedirs(path)
+        return path
+
+    def bench_compress(self):
+        source_dir = os.path.join(self.work_dir, "compress-source")
+        generators.make_package_dir(source_dir, "big", file_number=self.args.files, file_size=self.args.file_size,
+                                    depth=self.args.depth)
+        return measure(lambda output_file: Compress(source_dir, output_file).compress(),
+                       lambda: os.path.join(self.new_dir("compress"), "big_1.0.0.vpb"), self.args.repeat)
+
+    def bench_extract(self):
+        package_file = generators.make_package(self.new_dir("extract-package"), "big", file_number=self.args.files,
+                                               file_size=self.args.file_size, depth=self.args.depth)
+        return measure(lambda output_dir: Extract(package_file, output_dir).extract(),
+                       lambda: self.new_dir("extract"), self.args.repeat)
+
+    def bench_install(self):
+        package_file = generators.make_package(self.new_dir("install-package"), "big", file_number=self.args.files,
+                                               file_size=self.args.file_size, depth=self.args.depth)
+        return measure(lambda vim_dir: Install(vim_dir)._install_package(package_file),
+                       lambda: generators.make_vim_dir(self.new_dir("install")), self.args.repeat)
+
+    def bench_make_package_index(self):
+        repo_dir = generators.make_repo(self.new_dir("index"), self.args.packages, self.args.fan_out,
+                                        file_number=2, file_size=256, make_index=False)
+        cache_path = RemoteRepo(repo_dir).cache_abspath
+
+        def clear_cache():
+            if os.path.exists(cache_path):
+                os.unlink(cache_path)
+
+        cold_list = measure(lambda _: RemoteRepo(repo_dir).make_package_index(), clear_cache, self.args.repeat)
+        warm_list = measure(lambda _: RemoteRepo(repo_dir).make_package_index(), None, self.args.repeat)
+        return cold_list, warm_list
+
+    def bench_get_version_dict(self):
+        work_dir = self.new_dir("installed")
+        vim_dir = generators.make_vim_dir(work_dir)
+        for i in range(self.args.installed):
+            package_file = generators.make_package(work_dir, "package%d" % i, file_number=1, file_size=128)
+            Install(vim_dir)._install_package(package_file)
+        return measure(lambda _: Vimapt(vim_dir).get_version_dict(), None, self.args.repeat)
+
+    def run(self):
+        results = {}
+        for name in self.args.only or ["compress", "extract", "install", "make_package_index", "get_version_dict"]:
+            time_list = getattr(self, "bench_" + name)()
+            if name == "make_package_index":
+                results["make_package_index_cold"], results["make_package_index_warm"] = time_list
+            else:
+                results[name] = time_list
+        return dict((name, summarize(time_list)) for name, time_list in results.items())
+
+
+def summarize(time_list):
+    ordered = sorted(time_list)
+    return {"best": ordered[0], "median": ordered[len(ordered) // 2], "runs": time_list}
+
+
+def get_revision():
+    try:
+        output = subprocess.check_output(["git", "rev-parse", "--short", "HEAD"],
+                                         cwd=os.path.dirname(os.path.abspath(__file__)), stderr=subprocess.STDOUT)
+        return output.decode("utf-8").strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results, baseline=None):
+    print("%-26s %12s %12s %10s" % ("benchmark", "best ms", "median ms", "vs base"))
+    for name in sorted(results):
+        result = results[name]
+        ratio = ""
+        if baseline and name in baseline["results"]:
+            ratio = "%9.2fx" % (result["median"] / baseline["results"][name]["median"])
+        print("%-26s %12.3f %12.3f %10s" % (name, result["best"] * 1000, result["median"] * 1000, ratio))
+
+
+def get_argument_parser():
+    parser = argparse.ArgumentParser(description="benchmark suite of vimapt")
+    parser.add_argument("-o", "--output", help="file to save results as JSON")
+    parser.add_argument("--compare", help="JSON results of baseline revision")
+    parser.add_argument("--only", nargs="+", help="run only these benchmarks")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--files", type=int, default=200, help="number of files in package")
+    parser.add_argument("--file-size", type=int, default=4096, help="size of each file in package")
+    parser.add_argument("--depth", type=int, default=3, help="directory depth of files in package")
+    parser.add_argument("--packages", type=int, default=200, help="number of packages in repository")
+    parser.add_argument("--fan-out", type=int, default=3, help="number of dependencies of each package")
+    parser.add_argument("--installed", type=int, default=100, help="number of installed packages")
+    return parser
+
+
+def main():
+    args = get_argument_parser().parse_args()
+
+    work_dir = tempfile.mkdtemp()
+    try:
+        results = Suite(work_dir, args).run()
+    finally:
+        shutil.rmtree(work_dir)
+
+    parameters = dict((key, value) for key, value in vars(args).items()
+                      if key not in ("output", "compare", "only"))
+    report = {"revision": get_revision(), "python": platform.python_version(),
+              "time": int(time.time()), "parameters": parameters, "results": results}
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as fd:
+            baseline = json.load(fd)
+    print_results(results, baseline)
+
+    if args.output:
+        with open(args.output, "w") as fd:
+            json.dump(report, fd, indent=2, sort_keys=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,55 +1,91 @@
 #!/usr/bin/env python
 
+import io
 import os
+import shutil
+import tempfile
 
 from .data_format import dumps
 
+# member data is kept in memory up to this size, and spilled to a temporary file beyond it
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
+# characters read from a file at a time, when the file is not needed as lines
+CHUNK_SIZE = 64 * 1024
+
 
 class Compress(object):
-    def __init__(self, source_dir, output_file):
+    def __init__(self, source_dir, output_file, format_version=2):
         self.source_dir = source_dir
         self.output_file = output_file
+        self.format_version = format_version
         self.hook_object = None
         self.filter_object = None
 
     def compress(self):
         """
-        Compress directory to file
+        Compress directory to file.
+        Members are streamed into a spooled temporary file as the tree is walked, then copied after the meta header,
+        so that memory use does not grow with the size of package.
         :return: None
         """
-        ball_file_list = self.scan_dir()
         ball_data = []
-        ball_content = []
-        for f in ball_file_list:
-            fd = open(f, 'r')
-            file_lines = fd.readlines()
-            fd.close()
-            relative_file_path = os.path.relpath(f, self.source_dir)
-            if self.filter_object:
-                if not self.filter_object(relative_file_path, file_lines):
-                    continue
-            if self.hook_object:
-                f, file_lines = self.hook_object(f, file_lines)
-            line_number = len(file_lines)
-            # if is not empty file
-            if line_number:
-                last_line = file_lines[-1]
-                if not last_line.endswith("\n"):
-                    file_lines[-1] += "\n"
-                ball_content += file_lines
-            ball_data.append([relative_file_path, line_number])
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE) as ball_fd:
+            for f in self.scan_dir():
+                relative_file_path = os.path.relpath(f, self.source_dir)
+                with io.open(f, 'r', encoding='utf-8') as fd:
+                    if self.filter_object or self.hook_object:
+                        # filter and hook take the whole content of file
+                        file_lines = fd.readlines()
+                        if self.filter_object:
+                            if not self.filter_object(relative_file_path, file_lines):
+                                continue
+                        if self.hook_object:
+                            f, file_lines = self.hook_object(f, file_lines)
+                    elif self.format_version == 2:
+                        file_lines = iter(lambda: fd.read(CHUNK_SIZE), u'')
+                    else:
+                        file_lines = fd
+                    ball_data.append(self._write_member(ball_fd, relative_file_path, file_lines))
+
+            if self.format_version == 2:
+                meta_output = dumps({'format': 2, 'files': ball_data})
+            else:
+                meta_output = dumps(ball_data)
+
+            if meta_output[-1] != '\n':
+                # if meta data is not tailed with \n, append one to it
+                meta_output += '\n'
 
-        meta_output = dumps(ball_data)
+            ball_fd.seek(0)
+            with open(self.output_file, 'wb') as fd:
+                fd.write((meta_output + "\n").encode('utf-8'))
+                shutil.copyfileobj(ball_fd, fd)
 
-        if meta_output[-1] != '\n':
-            # if meta data is not tailed with \n, append one to it
-            meta_output += '\n'
+    def _write_member(self, ball_fd, relative_file_path, file_lines):
+        """
+        Append member data to ball
+        :param ball_fd: file object of ball
+        :param relative_file_path: path of member in package
+        :param file_lines: iterable of text of member
+        :return: meta data of member
+        """
+        if self.format_version == 2:
+            # VPB v2: member is stored as is, indexed by byte offset and length
+            ball_offset = ball_fd.tell()
+            for line in file_lines:
+                ball_fd.write(line.encode('utf-8'))
+            return [relative_file_path, ball_offset, ball_fd.tell() - ball_offset]
 
-        ball_output = "".join(ball_content)
-        output = meta_output + "\n" + ball_output
-        fd = open(self.output_file, 'w')
-        fd.write(output)
-        fd.close()
+        line_number = 0
+        last_line = ''
+        for line in file_lines:
+            ball_fd.write(line.encode('utf-8'))
+            line_number += 1
+            last_line = line
+        # if is not empty file
+        if line_number and not last_line.endswith("\n"):
+            ball_fd.write(b"\n")
+        return [relative_file_path, line_number]
 
     def scan_dir(self):
         """
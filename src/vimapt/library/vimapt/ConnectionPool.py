@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+
+import threading
+import logging
+
+from six.moves import http_client
+import six.moves.urllib.error as urllib_error
+import six.moves.urllib.parse as urllib_parse
+import six.moves.urllib.request as urllib_request
+
+logger = logging.getLogger(__name__)
+
+# errors that means a reused keep-alive connection has been closed by server
+STALE_CONNECTION_ERRORS = (http_client.BadStatusLine, http_client.CannotSendRequest, IOError, OSError)
+
+# other schemes, e.g. 'file' and 'ftp', are opened by urlopen
+POOLED_SCHEME_LIST = ['http', 'https']
+
+REDIRECT_STATUS_LIST = [301, 302, 303, 307, 308]
+
+
+class ConnectionPool(object):
+    """
+    Thread safe pool of keep-alive HTTP connections, grouped by (scheme, host, port).
+    URLs pool can not handle, e.g. redirected ones, are opened by urlopen as before.
+    """
+
+    def __init__(self, timeout=60):
+        self.timeout = timeout
+        self._idle_connections = {}
+        self._lock = threading.Lock()
+
+    def _connect(self, key):
+        scheme, host, port = key
+        if scheme == 'https':
+            return http_client.HTTPSConnection(host, port, timeout=self.timeout)
+        return http_client.HTTPConnection(host, port, timeout=self.timeout)
+
+    def _acquire(self, key):
+        """
+        Get an idle connection, or make a new one
+        :return: tuple of connection and whether it is reused
+        """
+        with self._lock:
+            idle_list = self._idle_connections.get(key)
+            if idle_list:
+                return idle_list.pop(), True
+        return self._connect(key), False
+
+    def _release(self, key, connection):
+        with self._lock:
+            self._idle_connections.setdefault(key, []).append(connection)
+
+    def get(self, url, chunk_handler, chunk_size=64 * 1024):
+        """
+        GET the URL, and feed response body to chunk_handler chunk by chunk
+        :param url: URL to get
+        :param chunk_handler: an executable object take one arg (bytes of chunk)
+        :param chunk_size: size of chunk
+        :return: None
+        """
+        parsed_url = urllib_parse.urlsplit(url)
+        if parsed_url.scheme not in POOLED_SCHEME_LIST or self._is_proxied(parsed_url):
+            self._urlopen(url, chunk_handler, chunk_size)
+            return
+
+        key = (parsed_url.scheme, parsed_url.hostname, parsed_url.port)
+        path = parsed_url.path or '/'
+        if parsed_url.query:
+            path += '?' + parsed_url.query
+
+        connection, reused = self._acquire(key)
+        try:
+            connection.request('GET', path)
+            response = connection.getresponse()
+        except STALE_CONNECTION_ERRORS:
+            connection.close()
+            if not reused:
+                raise
+            # server closed the idle connection, retry on a new one
+            logger.info("connection to <%s> is stale, reconnect", parsed_url.netloc)
+            connection = self._connect(key)
+            connection.request('GET', path)
+            response = connection.getresponse()
+
+        if response.status in REDIRECT_STATUS_LIST:
+            response.read()
+            self._release(key, connection)
+            # urlopen follows the redirection, which may go to another host
+            logger.info("<%s> is redirected, open it by urlopen", url)
+            self._urlopen(url, chunk_handler, chunk_size)
+            return
+
+        try:
+            if response.status != 200:
+                response.read()
+                raise urllib_error.HTTPError(url, response.status, response.reason, response.msg, None)
+            for chunk in iter(lambda: response.read(chunk_size), b''):
+                chunk_handler(chunk)
+        except Exception:
+            connection.close()
+            raise
+
+        if response.getheader('Connection', '').lower() == 'close':
+            connection.close()
+        else:
+            self._release(key, connection)
+
+    @staticmethod
+    def _is_proxied(parsed_url):
+        """
+        Whether the URL goes through proxy of 'http_proxy' and the like, which only urlopen knows how to use
+        """
+        proxy_dict = urllib_request.getproxies()
+        return parsed_url.scheme in proxy_dict and not urllib_request.proxy_bypass(parsed_url.hostname)
+
+    @staticmethod
+    def _urlopen(url, chunk_handler, chunk_size):
+        import contextlib
+
+        with contextlib.closing(urllib_request.urlopen(url)) as fd:
+            for chunk in iter(lambda: fd.read(chunk_size), b''):
+                chunk_handler(chunk)
+
+    def close(self):
+        """
+        Close all idle connections
+        :return: None
+        """
+        with self._lock:
+            for idle_list in self._idle_connections.values():
+                for connection in idle_list:
+                    connection.close()
+            self._idle_connections = {}
@@ -1,12 +1,29 @@
 #!/usr/bin/env python
 
-import os
+import hashlib
 import logging
 
 from .data_format import loads
+from .VapExtract import VapExtract, is_vap
+from .MemberWriter import MemberWriter
 
 logger = logging.getLogger(__name__)
 
+# size of chunk used when copy member's data of VPB v2
+CHUNK_SIZE = 64 * 1024
+
+
+def open_package(input_file, output_dir):
+    """
+    Get extract object of package, format (VAP or VPB) is detected by content of file
+    :param input_file: location of package file
+    :param output_dir: directory that package will extract to
+    :return: VapExtract or Extract object
+    """
+    if is_vap(input_file):
+        return VapExtract(input_file, output_dir)
+    return Extract(input_file, output_dir)
+
 
 class Extract(object):
     def __init__(self, input_file, output_dir):
@@ -14,72 +31,205 @@ class Extract(object):
         self.output_dir = output_dir
         self.hook_object = None
         self.filter_object = None
+        self.select_object = None
+        self.store = None  # ObjectStore object, files are hardlinked to it when bound
+
+        self.meta_stream = self._read_meta()
+        self.format_version, self.member_list = self._parse_meta()
+
+    def _read_meta(self):
+        """
+        Read the meta block, which ends at the first empty line of the package
+        :return: string, content of meta block
+        """
+        meta_lines = []
+        with open(self.input_file, 'rb') as fd:
+            # use readline() rather than iteration, so that tell() is exact on python2 too
+            line = fd.readline()
+            while line and line not in (b'\n', b'\r\n'):
+                meta_lines.append(line)
+                line = fd.readline()
+            self.ball_offset = fd.tell()
+        return b''.join(meta_lines).decode('utf-8')
+
+    def _parse_meta(self):
+        """
+        Detect format of package by its meta data.
+        VPB v1 meta is a list of [file name, line number],
+        VPB v2 meta is a dict like {'format': 2, 'files': [[file name, byte offset, byte length], ...]},
+        the offset is relative to the beginning of ball.
+        :return: tuple of format version and list of members
+        """
+        meta_data = loads(self.meta_stream) or []  # load meta, use YAML format
+
+        if isinstance(meta_data, dict):
+            if meta_data.get('format') == 2:
+                return 2, [tuple(i) for i in meta_data.get('files') or []]
+            # very early VPB put the v1 file list under 'package' key
+            meta_data = meta_data.get('package') or []
 
-        fd = open(self.input_file, 'r')
-        file_stream = fd.read()
-        fd.close()
-        self.meta_stream, self.ball_stream = file_stream.split('\n\n', 1)  # split the meta and data
+        return 1, [tuple(i) for i in meta_data]
 
-    def extract(self):
+    def extract(self, jobs=1):
         """
-        extract input_file to output_dir
+        extract input_file to output_dir, member by member, without loading the whole package.
+        Members of VPB v2 are written by many threads, VPB v1 is line based and have to be read in order.
+        :param jobs: max number of threads that write members
         :return: None
         """
-        meta_data = self.get_file_list()
-        ball_lines = self.ball_stream.split('\n')
-        start_point = 0
-        for file_name, file_length in meta_data:
-            end_point = start_point + file_length
-            list_data = ball_lines[start_point: end_point]
-            file_stream = "\n".join(list_data)
-            if self.filter_object:  # unfinished part
-                # hook to filter_object
-                if not self.filter_object(file_name, file_stream):
-                    # this file will be ignored
-                    start_point += file_length
+        writer = MemberWriter(self.output_dir, jobs, self.store)
+        if self.format_version == 2 and not self.hook_object and not self.filter_object:
+            member_list = [member for member in self.member_list if self._is_selected(member[0], member[-1])]
+            writer.write(lambda batch: self._write_members(writer, batch), member_list)
+            return
 
-                    logger.info("package <%s>: <%s> was passed.", self.input_file, file_name)
+        with open(self.input_file, 'rb') as fd:
+            fd.seek(self.ball_offset)
+            for member in self.member_list:
+                file_name = member[0]
+                file_length = member[-1]
 
+                if self.format_version == 2:
+                    fd.seek(self.ball_offset + member[1])
+
+                if not self._is_selected(file_name, file_length):
+                    # this file will be ignored
+                    if self.format_version == 1:
+                        self._skip_lines(fd, file_length)
                     continue
-            if self.hook_object:  # unfinished part
-                # hook to hook_object
-                file_name, file_stream = self.hook_object(file_name, file_stream)
-            ball_dir = os.path.dirname(file_name)
-            ball_absolute_dir = os.path.join(self.output_dir, ball_dir)
-            ball_abspath_file = os.path.join(self.output_dir, file_name)
-            if not os.path.isdir(ball_absolute_dir):
-                os.makedirs(ball_absolute_dir)
-            fd = open(ball_abspath_file, 'w')
-            fd.write(file_stream)
-            fd.close()
-
-            logger.info("package <%s>: <%s> was write.", self.input_file, ball_abspath_file)
-
-            start_point += file_length
+
+                if self.hook_object or self.filter_object:
+                    # filter and hook object need the whole content of this member
+                    file_stream = self._read_member_data(fd, file_length).decode('utf-8')
+                    if self.filter_object and not self.filter_object(file_name, file_stream):
+                        # this file will be ignored
+                        logger.info("package <%s>: <%s> was passed.", self.input_file, file_name)
+                        continue
+                    if self.hook_object:
+                        file_name, file_stream = self.hook_object(file_name, file_stream)
+                    file_stream = file_stream.encode('utf-8')
+                    digest = hashlib.sha256(file_stream).hexdigest()
+                    ball_abspath_file = writer.get_path(file_name)
+                    with open(ball_abspath_file, 'wb') as output_fd:
+                        output_fd.write(file_stream)
+                else:
+                    ball_abspath_file = writer.get_path(file_name)
+                    with open(ball_abspath_file, 'wb') as output_fd:
+                        digest = self._copy_member_data(fd, output_fd, file_length)
+                writer.add(file_name, digest)
+
+                logger.debug("package <%s>: <%s> was write.", self.input_file, ball_abspath_file)
+
+    def _is_selected(self, file_name, file_length):
+        """
+        Ask select object whether member should be extracted, before its content is read
+        :return: Boolean
+        """
+        if self.select_object and not self.select_object(file_name, file_length):
+            logger.info("package <%s>: <%s> was passed.", self.input_file, file_name)
+            return False
+        return True
+
+    def _write_members(self, writer, member_list):
+        """
+        Write members of VPB v2, by their own file object, so that it can be run by many threads
+        :param writer: MemberWriter object that made directories of members
+        :param member_list: list of members
+        :return: None
+        """
+        with open(self.input_file, 'rb') as fd:
+            for file_name, offset, file_length in member_list:
+                fd.seek(self.ball_offset + offset)
+                ball_abspath_file = writer.get_path(file_name)
+                with open(ball_abspath_file, 'wb') as output_fd:
+                    digest = self._copy_member_data(fd, output_fd, file_length)
+                writer.add(file_name, digest)
+                logger.debug("package <%s>: <%s> was write.", self.input_file, ball_abspath_file)
+
+    def read(self, file_name):
+        """
+        Read content of single member without extract the package.
+        VPB v2 seek to the member directly, VPB v1 have to scan the lines before it.
+        :param file_name: relative path of member, e.g. 'vimapt/control/vimapt.yaml'
+        :return: string, content of member
+        """
+        with open(self.input_file, 'rb') as fd:
+            fd.seek(self.ball_offset)
+            for member in self.member_list:
+                if self.format_version == 2:
+                    if member[0] == file_name:
+                        fd.seek(self.ball_offset + member[1])
+                        return self._read_member_data(fd, member[2]).decode('utf-8')
+                else:
+                    if member[0] == file_name:
+                        return self._read_member_data(fd, member[1]).decode('utf-8')
+                    self._skip_lines(fd, member[1])
+
+        raise KeyError("package <%s> has no member <%s>" % (self.input_file, file_name))
+
+    def _copy_member_data(self, input_fd, output_fd, length):
+        """
+        Copy member's data, and hash it on the way, so that it need not be read again for object store
+        :return: sha256 of member's data
+        """
+        checksum = hashlib.sha256()
+        if self.format_version == 1:
+            for _ in range(length):
+                line = input_fd.readline()
+                checksum.update(line)
+                output_fd.write(line)
+        else:
+            while length > 0:
+                chunk = input_fd.read(min(length, CHUNK_SIZE))
+                if not chunk:
+                    break
+                checksum.update(chunk)
+                output_fd.write(chunk)
+                length -= len(chunk)
+        return checksum.hexdigest()
+
+    def _read_member_data(self, input_fd, length):
+        if self.format_version == 1:
+            return b''.join(input_fd.readline() for _ in range(length))
+        return input_fd.read(length)
+
+    @staticmethod
+    def _skip_lines(input_fd, line_number):
+        for _ in range(line_number):
+            input_fd.readline()
 
     def get_file_list(self):
         """
         get file list of a package
         :return: List of file name and length pair
         """
-        meta_data = loads(self.meta_stream)  # load list from meta, use YAML format
-        return meta_data
+        return [[member[0], member[-1]] for member in self.member_list]
 
     def hook(self, hook_object):
         """
-        Bind hook object. 
-        :param hook_object: an executable object take to args (file name and content) and return boolean.
-                            Return False means the file is not extract to system, used to protect overwrite.
+        Bind hook object
+        :param hook_object: an executable object take to args (file name and content)
+                            and return tuple of file name and content.
+                            This object can change the file name and file content.
         :return: None
         """
         self.hook_object = hook_object
 
     def filter(self, filter_object):
         """
-        Bind filter object
-        :param filter_object: an executable object take to args (file name and content)
-                              and return tuple of file name and content.
-                              This object can change the file name and file content.
+        Bind filter object.
+        :param filter_object: an executable object take to args (file name and content) and return boolean.
+                              Return False means the file is not extract to system, used to protect overwrite.
         :return: None
         """
         self.filter_object = filter_object
+
+    def select(self, select_object):
+        """
+        Bind select object, which is like filter object but never need the content,
+        so that members are streamed, and the ones ignored are not even read.
+        :param select_object: an executable object take to args (file name and length) and return boolean.
+                              Return False means the file is not extract to system.
+        :return: None
+        """
+        self.select_object = select_object
@@ -1,58 +1,94 @@
 #!/usr/bin/env python
 
 import os
-import tempfile
 import logging
 
-import requirements
-import semantic_version
-
 from .data_format import loads
 from vimapt.exception import VimaptAbortOperationException
-from . import Record
 from . import LocalRepo
 from . import Vimapt
+from . import PackageDatabase
 from . import Extract
+from . import Loader
+from . import MemberWriter
+from . import ObjectStore
+from . import Timing
+from . import Transaction
+from .RemoteRepo import version_key
 
 logger = logging.getLogger(__name__)
 
+# max number of threads that write files of a package
+EXTRACT_JOBS = 4
+
 
 class Install(object):
     def __init__(self, vim_dir):
         self.vim_dir = vim_dir  # user's .vim dir path
         self.pkg_name = None  # package's name
-        self.tmp_dir = None
+        self.package = None  # Extract object of package file
+        self.control_data = None  # parsed control file of package
+        self.progress_handler = None  # an executable object take one arg (message), e.g. for background worker
+        self.existing_path_set = set()  # files of package that already exist in vim dir, checked by _extract_hook
+
+    def _report_progress(self, message):
+        logger.info(message)
+        if self.progress_handler:
+            self.progress_handler(message)
 
     def _extract_hook(self, file_name, _):
         """
         Installer filter object: if *.vimrc file exists in the system, new *.vimrc file will not overwrite it.
         :param file_name: name of the file
-        :param _: stream of the file, just ignore it
+        :param _: length of the file, just ignore it
         :return: Boolean, False means not extract this file to system, so keep the old config file alive.
         """
         token = file_name.split("/")
         if token[0] == "vimrc":
-            file_path = os.path.join(self.vim_dir, file_name)
-            if os.path.exists(file_path):
+            if file_name in self.existing_path_set:
                 logger.info("<%s> keep local version, developer's version is not overwrite.", file_name)
                 return False
         return True
 
-    def _install_package(self, package_file):
+    def _install_package(self, package_file, update_loader=True):
         """
         The real method that install package from local file
         :param package_file: locaton of the package file
+        :param update_loader: whether regenerate startup loader, installing many packages do it once at the end
         :return: None
         """
-        self._init_check(package_file)
-        self._check_repeat_install()
-        self._check_depend()
-        install = Extract.Extract(package_file, self.vim_dir)
-        file_list = install.get_file_list()
-        install.filter(self._extract_hook)
-        install.extract()
-        record = Record.Record(self.vim_dir)
-        record.install(self.pkg_name, file_list)
+        with Timing.span('install.package', file=os.path.basename(package_file)) as fields:
+            Transaction.recover(self.vim_dir)
+            with Timing.span('install.control'):
+                self._init_check(package_file)
+            fields['name'] = self.pkg_name
+
+            with Timing.span('install.check', name=self.pkg_name):
+                self._check_repeat_install()
+                self._check_depend()
+                file_list = self.package.get_file_list()
+                self._check_file_conflict([file_name for file_name, _ in file_list])
+
+            # extract into staging directory, vim dir is only touched by commit
+            transaction = Transaction.Transaction(self.vim_dir, self.pkg_name)
+            with Timing.span('install.extract', name=self.pkg_name, files=len(file_list)):
+                self.package.output_dir = transaction.begin()
+                try:
+                    # one listdir() per directory, rather than one stat() per file
+                    self.existing_path_set = MemberWriter.get_existing_path_set(
+                        self.vim_dir, [file_name for file_name, _ in file_list if file_name.split("/")[0] == "vimrc"])
+                    self.package.select(self._extract_hook)
+                    self.package.store = ObjectStore.ObjectStore(self.vim_dir)
+                    self.package.extract(EXTRACT_JOBS)
+                except BaseException:
+                    transaction.abort()
+                    raise
+            with Timing.span('install.record', name=self.pkg_name):
+                transaction.commit(self.control_data, file_list)
+
+            if update_loader:
+                with Timing.span('install.loader'):
+                    Loader.Loader(self.vim_dir).generate()
 
     def file_install(self, package_file):
         """
@@ -65,61 +101,148 @@ class Install(object):
     def repo_install(self, package_name):
         """
         Install package from package repository
-        :param package_name: name of the package
+        :param package_name: name of the package, 'name=version' to install specified version
         :return: None
         """
-        repo = LocalRepo.LocalRepo(self.vim_dir)
-        package_path = repo.get_package(package_name)
-        if package_path:
-            self._install_package(package_path)
-        else:
-            raise VimaptAbortOperationException("use network to get repository package error!")
+        self.repo_install_list([package_name])
+
+    def repo_install_list(self, package_name_list, jobs=4):
+        """
+        Install many packages from package repository, with their dependencies.
+        Packages are downloaded concurrently, and installed only when all downloads succeed.
+        :param package_name_list: list of package names, 'name=version' to install specified version
+        :param jobs: number of download threads
+        :return: None
+        """
+        if not package_name_list:
+            raise VimaptAbortOperationException("no package to install")
+
+        with Timing.span('install', packages=len(package_name_list)):
+            repo = LocalRepo.LocalRepo(self.vim_dir)
+            self._report_progress("resolving %s" % ", ".join(package_name_list))
+            with Timing.span('install.resolve'):
+                plan = self.make_install_plan(repo, package_name_list)
+            if not plan:
+                # every package requested is installed, and so are their dependencies
+                msg = "package: '" + ", ".join(package_name_list) + "' already installed!"
+                raise VimaptAbortOperationException(msg)
+
+            package_spec_list = [(entry['name'], entry['version']) for entry in plan]
+            self._report_progress("downloading %s" % ", ".join("%s %s" % i for i in package_spec_list))
+            with Timing.span('install.download', packages=len(package_spec_list), jobs=jobs):
+                package_path_list = repo.get_packages(package_spec_list, jobs)
+            if not package_path_list:
+                raise VimaptAbortOperationException("use network to get repository package error!")
+
+            try:
+                for (package_name, version), package_path in zip(package_spec_list, package_path_list):
+                    self._report_progress("installing %s %s" % (package_name, version))
+                    self._install_package(package_path, update_loader=False)
+            finally:
+                with Timing.span('install.loader'):
+                    Loader.Loader(self.vim_dir).generate()
+
+    def make_install_plan(self, repo, package_name_list):
+        """
+        Resolve packages and their dependencies from repository index
+        :param repo: LocalRepo object
+        :param package_name_list: list of package names, 'name=version' to install specified version
+        :return: list of index entries, in install order
+        """
+        requirement_list = []
+        for package_name in package_name_list:
+            package_name, _, version = package_name.partition('=')
+            requirement_list.append(package_name + ('==' + version if version else ''))
+
+        from . import Resolver
+
+        vimapt = Vimapt.Vimapt(self.vim_dir)
+        try:
+            installed_version_dict = vimapt.get_version_dict()
+        finally:
+            vimapt.close()
+        resolver = Resolver.Resolver(repo.get_index(), installed_version_dict)
+        plan = resolver.resolve(requirement_list)
+
+        logger.info("install plan: %s", [(entry['name'], entry['version']) for entry in plan])
+        return plan
 
     def _init_check(self, package_file):
-        self.tmp_dir = tempfile.mkdtemp()
-        Extract.Extract(package_file, self.tmp_dir).extract()
+        """
+        Read package name and control data from package file, without extract it
+        :param package_file: location of the package file
+        :return: None
+        """
+        self.package = Extract.open_package(package_file, self.vim_dir)
+
+        controller_file = None
+        for file_name, _ in self.package.get_file_list():
+            dir_name, base_name = os.path.split(file_name)
+            if dir_name == "vimapt/control" and not base_name.startswith('.'):
+                controller_file = file_name
+                break
+
+        if controller_file is None:
+            msg = "package: '" + package_file + "' has no control file!"
+            raise VimaptAbortOperationException(msg)
+
+        self.pkg_name = os.path.splitext(os.path.basename(controller_file))[0]
+
+        file_stream = self.package.read(controller_file)
+        self.control_data = loads(file_stream) or dict()  # in case control file is empty
+
+        logger.info("<%s> control data: %s", controller_file, self.control_data)
 
     def _check_repeat_install(self):
         """
         Check if same package name has been installed
         :return: None
         """
-        self.pkg_name = Vimapt.Vimapt(self.tmp_dir).scan_package_name()
-        installed_list = Vimapt.Vimapt(self.vim_dir).get_installed_list()
-        if self.pkg_name in installed_list:
+        vimapt = Vimapt.Vimapt(self.vim_dir)
+        try:
+            is_installed = vimapt.is_installed(self.pkg_name)
+        finally:
+            vimapt.close()
+        if is_installed:
             msg = "package: '" + self.pkg_name + "' already installed!"
             raise VimaptAbortOperationException(msg)
 
+    def _check_file_conflict(self, path_list):
+        """
+        Check if any file of package is owned by other package, before anything is written
+        :param path_list: List of paths in package
+        :return: None
+        """
+        database = PackageDatabase.PackageDatabase(self.vim_dir)
+        try:
+            owner_dict = database.get_owner_dict(path_list)
+        finally:
+            database.close()
+        clash_list = sorted((path, owner) for path, owner in owner_dict.items() if owner != self.pkg_name)
+        if clash_list:
+            msg = "package: '%s' has files owned by other package: %s" % (
+                self.pkg_name, ", ".join("%s (%s)" % i for i in clash_list))
+            raise VimaptAbortOperationException(msg)
+
     def _check_depend(self):
         """
         Check if all the requirements is meet
         :return: None
         """
-        controller_dir = os.path.join(self.tmp_dir, "vimapt/control/")
-        dir_list = os.listdir(controller_dir)
-        controller_file = os.path.join(controller_dir, dir_list[0])
-
-        with open(controller_file) as fp:
-            file_stream = fp.read()
-
-        control_data = loads(file_stream) or dict()  # in case control file is empty
-
-        logger.info("<%s> control data: %s", controller_file, control_data)
-
-        depends_data = control_data.get("depends", [])
-        conflicts_data = control_data.get("conflicts", [])
+        depends_data = self.control_data.get("depends", [])
+        conflicts_data = self.control_data.get("conflicts", [])
 
         depend_items = self._parse_requirement(depends_data)
         conflicts_items = self._parse_requirement(conflicts_data)
 
-        logger.info("<%s> depend data: %s", controller_file, depend_items)
-        logger.info("<%s> conflicts data: %s", controller_file, conflicts_items)
+        logger.info("<%s> depend data: %s", self.pkg_name, depend_items)
+        logger.info("<%s> conflicts data: %s", self.pkg_name, conflicts_items)
 
         _, not_matched_requirements = self._check_requirement(depend_items)
         matched_requirements, _ = self._check_requirement(conflicts_items)
 
         if not len(not_matched_requirements) and not len(matched_requirements):
-            logger.info("<%s> check depend is pass!", controller_file)
+            logger.info("<%s> check depend is pass!", self.pkg_name)
             return True
 
         msg = ("package requirements is not meet,"
@@ -134,6 +257,8 @@ class Install(object):
         :param requirements_data: list of string or string
         :return: list of requirements object
         """
+        import requirements
+
         requirements_items = []
 
         # if requirement is a string, then translate to a single element list
@@ -153,29 +278,31 @@ class Install(object):
         not_matched_requirements = []
         matched_requirements = []
 
-        version_dict = Vimapt.Vimapt(self.vim_dir).get_version_dict()
-
-        for requirement in requirements:
-            try:
-                package_version = version_dict[requirement.name]
-            except KeyError:
-                not_matched_requirements.append(requirement)
-                continue
+        vimapt = Vimapt.Vimapt(self.vim_dir)
+        try:
+            for requirement in requirements:
+                try:
+                    package_version = vimapt.get_version(requirement.name)
+                except KeyError:
+                    not_matched_requirements.append(requirement)
+                    continue
 
-            check_pass_flag = True
+                check_pass_flag = True
 
-            installed_version = semantic_version.Version(package_version)
+                installed_version = version_key(package_version)
 
-            for spec_requirement in requirement.specs:
-                version_comparer = self._get_comparer(spec_requirement[0])
-                require_version = semantic_version.Version(spec_requirement[1])
-                if not version_comparer(installed_version, require_version):
-                    not_matched_requirements.append(requirement)
-                    check_pass_flag = False
-                    break
+                for spec_requirement in requirement.specs:
+                    version_comparer = self._get_comparer(spec_requirement[0])
+                    require_version = version_key(spec_requirement[1])
+                    if not version_comparer(installed_version, require_version):
+                        not_matched_requirements.append(requirement)
+                        check_pass_flag = False
+                        break
 
-            if check_pass_flag:
-                matched_requirements.append(requirement)
+                if check_pass_flag:
+                    matched_requirements.append(requirement)
+        finally:
+            vimapt.close()
 
         return matched_requirements, not_matched_requirements
 
@@ -189,7 +316,9 @@ class Install(object):
             "<": lambda x, y: x < y,
             ">": lambda x, y: x > y,
             "<=": lambda x, y: x <= y,
-            ">=": lambda x, y: x >= y
+            ">=": lambda x, y: x >= y,
+            "==": lambda x, y: x == y,
+            "!=": lambda x, y: x != y
         }
 
         try:
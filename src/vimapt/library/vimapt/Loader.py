@@ -0,0 +1,198 @@
+#!/usr/bin/env python
+
+import io
+import os
+import re
+import shutil
+import logging
+
+import six
+
+from . import PackageDatabase
+
+logger = logging.getLogger(__name__)
+
+LOADER_RELATIVE_PATH = 'vimapt/loader.vim'
+# loader used by 'VimApt profile', chunk of every package is sourced from a file named after the package
+PROFILE_LOADER_RELATIVE_PATH = 'vimapt/profile/loader.vim'
+PROFILE_CHUNK_RELATIVE_DIR = 'vimapt/profile/chunk'
+
+LOADER_HEADER = ('" Generated by vimapt from configure files of installed packages, do not edit.\n'
+                 '" Run ":VimApt reload" after changing files in vimrc directory.\n')
+
+# scripts use these can not be inlined, they depend on being a file of their own,
+# ':finish' anywhere, e.g. 'if !has("python3") | finish | endif', would stop the rest of loader
+NOT_INLINABLE_PATTERN = re.compile(r'\bfini(sh?)?\b|\bs:|<SID>|<sfile>')
+# characters escaped by Vim's fnameescape()
+FNAME_SPECIAL_PATTERN = re.compile(r'([ \t\n*?\[{`$\\%#\'"|!<])')
+
+
+def fnameescape(file_path):
+    """
+    Escape path for Vim's ':source' like fnameescape() does, with '/' separator which Vim accepts on every platform
+    :param file_path: location of file
+    :return: string
+    """
+    file_path = file_path.replace(os.sep, '/')
+    file_path = FNAME_SPECIAL_PATTERN.sub(r'\\\1', file_path)
+    if file_path[:1] in ('-', '+', '>'):
+        file_path = '\\' + file_path
+    return file_path
+
+
+class Loader(object):
+    """
+    Startup loader, a single Vim script made from configure files ('vimrc/*.vimrc') of installed packages,
+    so that Vim opens one file at startup however many packages are installed.
+    Packages are ordered so that dependencies come first, configure files which can not be inlined are sourced.
+    """
+
+    def __init__(self, vim_dir):
+        self.vim_dir = vim_dir
+        self.loader_path = os.path.join(self.vim_dir, LOADER_RELATIVE_PATH)
+
+    def get_package_order(self, database):
+        """
+        Order installed packages, dependencies first, then by name
+        :param database: PackageDatabase object
+        :return: List of package names
+        """
+        name_list = database.get_name_list(PackageDatabase.STATE_INSTALLED)
+        installed_set = set(name_list)
+
+        order = []
+        visited = set()
+        for root_name in name_list:
+            if root_name in visited:
+                continue
+            visited.add(root_name)
+            walk_stack = [(root_name, iter(self._get_depend_names(database, root_name)))]
+            while walk_stack:
+                name, depend_iter = walk_stack[-1]
+                for depend_name in depend_iter:
+                    if depend_name in installed_set and depend_name not in visited:
+                        visited.add(depend_name)
+                        walk_stack.append((depend_name, iter(self._get_depend_names(database, depend_name))))
+                        break
+                else:
+                    walk_stack.pop()
+                    order.append(name)
+        return order
+
+    @staticmethod
+    def _get_depend_names(database, name):
+        depend_list = database.get_package(name)['depends'] or []
+        if not isinstance(depend_list, list):
+            depend_list = [depend_list]
+        import requirements
+
+        name_list = []
+        for requirement_str in depend_list:
+            name_list.extend(i.name for i in requirements.parse(requirement_str))
+        return sorted(name_list)
+
+    def make_chunk_list(self):
+        """
+        Make chunks of loader, one for each package in order, configure files not owned by any package come last
+        :return: List of (package name, chunk), package name is None for the configure files not owned
+        """
+        database = PackageDatabase.PackageDatabase(self.vim_dir)
+        try:
+            chunk_list = []
+            for package_name in self.get_package_order(database):
+                part_list = []
+                for path in database.get_path_list(package_name, 'vimrc/'):
+                    if not path.endswith('.vimrc'):
+                        continue
+                    file_path = os.path.join(self.vim_dir, path)
+                    if not os.path.isfile(file_path):
+                        continue
+                    part_list.append(self._make_chunk(package_name, path, file_path))
+                if part_list:
+                    chunk_list.append((package_name, ''.join(part_list)))
+
+            # configure files written by user are sourced, like Vim did before there is a loader
+            unowned_path_list = self._get_unowned_path_list(database)
+            if unowned_path_list:
+                chunk_list.append((None, '\n" not owned by any package\n' + ''.join(
+                    'source %s\n' % fnameescape(os.path.join(self.vim_dir, path)) for path in unowned_path_list)))
+        finally:
+            database.close()
+        return chunk_list
+
+    def make_loader(self):
+        """
+        :return: string, content of loader
+        """
+        return LOADER_HEADER + ''.join(chunk for _, chunk in self.make_chunk_list())
+
+    def _get_unowned_path_list(self, database):
+        """
+        :return: List of relative paths of configure files not owned by any package, sorted like Vim's glob()
+        """
+        vimrc_dir = os.path.join(self.vim_dir, 'vimrc')
+        if not os.path.isdir(vimrc_dir):
+            return []
+        path_list = ['vimrc/' + file_name for file_name in sorted(os.listdir(vimrc_dir))
+                     if file_name.endswith('.vimrc') and os.path.isfile(os.path.join(vimrc_dir, file_name))]
+        owner_dict = database.get_owner_dict(path_list)
+        return [path for path in path_list if path not in owner_dict]
+
+    @staticmethod
+    def _make_chunk(package_name, path, file_path):
+        with open(file_path, 'rb') as fd:
+            content = fd.read()
+        header = '\n" %s: %s\n' % (package_name, path)
+        try:
+            content = content.decode('utf-8')
+        except UnicodeDecodeError:
+            # e.g. latin-1 text carried by VAP package, loader is utf-8, Vim reads the file by its own encoding
+            return header + 'source %s\n' % fnameescape(file_path)
+        if NOT_INLINABLE_PATTERN.search(content):
+            return header + 'source %s\n' % fnameescape(file_path)
+        if content and not content.endswith('\n'):
+            content += '\n'
+        return header + content
+
+    def generate(self):
+        """
+        Write loader file, the old one is replaced atomically
+        :return: path of loader file
+        """
+        self._write(self.loader_path, self.make_loader())
+        logger.info("startup loader <%s> is generated", self.loader_path)
+        return self.loader_path
+
+    def generate_profile_loader(self):
+        """
+        Write loader used to profile startup, it sources chunk of every package from a file of its own,
+        so that 'vim --startuptime' reports each package, rather than the loader as a whole.
+        :return: path of profile loader
+        """
+        chunk_dir = os.path.join(self.vim_dir, PROFILE_CHUNK_RELATIVE_DIR)
+        if os.path.isdir(chunk_dir):
+            shutil.rmtree(chunk_dir)
+        os.makedirs(chunk_dir)
+
+        content_list = [LOADER_HEADER]
+        for package_name, chunk in self.make_chunk_list():
+            if package_name is None:
+                content_list.append(chunk)
+                continue
+            chunk_path = os.path.join(chunk_dir, package_name + '.vim')
+            self._write(chunk_path, chunk)
+            content_list.append('source %s\n' % fnameescape(chunk_path))
+
+        profile_loader_path = os.path.join(self.vim_dir, PROFILE_LOADER_RELATIVE_PATH)
+        self._write(profile_loader_path, ''.join(content_list))
+        return profile_loader_path
+
+    @staticmethod
+    def _write(file_path, content):
+        """
+        Write file, the old one is replaced atomically
+        """
+        tmp_path = file_path + '.part'
+        with io.open(tmp_path, 'w', encoding='utf-8') as fd:
+            fd.write(six.text_type(content))
+        getattr(os, 'replace', os.rename)(tmp_path, file_path)
@@ -1,12 +1,28 @@
 #!/usr/bin/env python
 
 import os
+import zlib
+import hashlib
+import logging
 import contextlib
 
+from six.moves import cPickle as pickle
+
 import six
-import six.moves.urllib.request as urllib_request
 
-from .data_format import loads
+from .data_format import dumps, loads
+from . import Timing
+from vimapt.exception import VimaptAbortOperationException
+
+# urllib, http client and thread pool are imported where they are used, reading the index need none of them
+
+logger = logging.getLogger(__name__)
+
+# suffix of package being downloaded, renamed to package when download is finished
+PARTIAL_SUFFIX = '.part'
+
+# default size limit of package download cache
+DEFAULT_CACHE_SIZE_LIMIT = 100 * 1024 * 1024
 
 
 class LocalRepo(object):
@@ -15,24 +31,78 @@ class LocalRepo(object):
         self.config_path = os.path.join(self.vim_dir, 'vimapt/source')
         self.cache_dir = os.path.join(self.vim_dir, 'vimapt/cache')
         self.cache_pool_dir = os.path.join(self.cache_dir, 'pool')
+        # optional, size limit of cache_pool_dir in bytes
+        self.cache_size_limit_path = os.path.join(self.vim_dir, 'vimapt/cache_size_limit')
         self.local_package_index_path = os.path.join(self.cache_dir,
                                                      'index/package')
+        # parsed index in pickle format, protocol 2 can be read by both python2 and python3
+        self.local_package_index_cache_path = os.path.join(self.cache_dir,
+                                                           'index/package.pickle')
+        # ETag and Last-Modified of the index, used to make conditional request
+        self.local_package_index_validator_path = os.path.join(self.cache_dir,
+                                                               'index/package.validator')
         self.remote_package_index_relative_path = 'index/package'
+        # pre-compressed index, optional on server side
+        self.remote_compressed_package_index_relative_path = 'index/package.gz'
 
-    def _get_remote_package_index(self, source_url):
+    def _get_remote_package_index(self, source_url, validator=None):
         """
-        Get package repository's index content
+        Get package repository's index content, by conditional request if validator is given
         :param source_url: URL of repository's index
-        :return: string, content of index
+        :param validator: Dict of 'etag' and 'last_modified' of local index
+        :return: tuple of (string, content of index, None if not modified; Dict, new validator)
         """
-        fd = urllib_request.urlopen(source_url)
-        source_stream = fd.read()
-        fd.close()
+        import six.moves.urllib.error as urllib_error
+        import six.moves.urllib.request as urllib_request
+
+        validator = validator or {}
+        request = urllib_request.Request(source_url)
+        request.add_header('Accept-Encoding', 'gzip')
+        if validator.get('etag'):
+            request.add_header('If-None-Match', validator['etag'])
+        if validator.get('last_modified'):
+            request.add_header('If-Modified-Since', validator['last_modified'])
+
+        try:
+            fd = urllib_request.urlopen(request)
+        except urllib_error.HTTPError as e:
+            if e.code == 304:
+                return None, validator
+            raise
+
+        with contextlib.closing(fd):
+            source_stream = fd.read()
+            headers = fd.info()
+
+        # pre-compressed index and gzip content-encoding both have one gzip layer only
+        if headers.get('Content-Encoding') == 'gzip' or source_url.endswith('.gz'):
+            source_stream = zlib.decompress(source_stream, 16 + zlib.MAX_WBITS)
+
+        new_validator = {'url': source_url,
+                         'etag': headers.get('ETag'),
+                         'last_modified': headers.get('Last-Modified')}
 
         if six.PY2:
-            return source_stream
+            return source_stream, new_validator
         else:
-            return source_stream.decode('utf-8')
+            return source_stream.decode('utf-8'), new_validator
+
+    def _read_validator(self):
+        """
+        Read validator of local index, empty if local index is missing
+        :return: Dict of 'url', 'etag' and 'last_modified'
+        """
+        if not os.path.isfile(self.local_package_index_path):
+            return {}
+        try:
+            with open(self.local_package_index_validator_path) as fd:
+                return loads(fd.read()) or {}
+        except (IOError, OSError, ValueError):
+            return {}
+
+    def _write_validator(self, validator):
+        with open(self.local_package_index_validator_path, 'w') as fd:
+            fd.write(dumps(validator, 'json'))
 
     def _write_local_package_index(self, stream):
         """
@@ -56,52 +126,329 @@ class LocalRepo(object):
 
     def update(self):
         """
-        Update local repository's index from remote index
-        :return: 
+        Update local repository's index from remote index.
+        Pre-compressed index is preferred, and index not modified since last update is not downloaded again.
+        :return: Boolean, False means remote index is not modified
+        """
+        import six.moves.urllib.error as urllib_error
+
+        with Timing.span('update') as fields:
+            source_server = self._get_config()
+            validator = self._read_validator()
+
+            relative_path_list = [self.remote_compressed_package_index_relative_path,
+                                  self.remote_package_index_relative_path]
+            with Timing.span('update.download'):
+                for relative_path in relative_path_list:
+                    remote_source_url = os.path.join(source_server, relative_path)
+                    # validator is only meaningful for the URL it come from
+                    url_validator = validator if validator.get('url') == remote_source_url else None
+                    try:
+                        source_stream, new_validator = self._get_remote_package_index(remote_source_url,
+                                                                                      url_validator)
+                    except urllib_error.HTTPError as e:
+                        if e.code == 404 and relative_path != self.remote_package_index_relative_path:
+                            continue  # server don't have pre-compressed index
+                        raise
+                    except urllib_error.URLError:
+                        # source is not HTTP, e.g. 'file://', missing file is reported as URLError
+                        if relative_path != self.remote_package_index_relative_path:
+                            continue
+                        raise
+                    break
+
+            fields['modified'] = source_stream is not None
+            if source_stream is None:
+                return False
+
+            with Timing.span('update.write', size=len(source_stream)):
+                self._write_local_package_index(source_stream)
+                self._write_index_cache(loads(source_stream))
+                self._write_validator(new_validator)
+            return True
+
+    def _get_index_signature(self):
+        """
+        Signature of YAML index, cache is only valid when it is made from the index with same signature
+        :return: tuple of size and mtime of YAML index
+        """
+        stat = os.stat(self.local_package_index_path)
+        return stat.st_size, stat.st_mtime
+
+    def _write_index_cache(self, source_data):
+        """
+        Write parsed index to cache
+        :param source_data: Dict, repository's index
+        :return: None
         """
-        source_server = self._get_config()
-        remote_source_url = os.path.join(source_server,
-                                         self.remote_package_index_relative_path)
-        source_stream = self._get_remote_package_index(remote_source_url)
-        self._write_local_package_index(source_stream)
+        cache_data = (self._get_index_signature(), source_data)
+        tmp_path = self.local_package_index_cache_path + '.tmp'
+        with open(tmp_path, 'wb') as fd:
+            pickle.dump(cache_data, fd, 2)
+        # os.replace is atomic on every platform, python2 only has os.rename
+        getattr(os, 'replace', os.rename)(tmp_path, self.local_package_index_cache_path)
+
+    def _read_index_cache(self):
+        """
+        Read parsed index from cache
+        :return: Dict of repository's index, None if cache is missing, broken or out of date
+        """
+        try:
+            with open(self.local_package_index_cache_path, 'rb') as fd:
+                signature, source_data = pickle.load(fd)
+        except Exception:
+            return None
+        if tuple(signature) != self._get_index_signature():
+            return None
+        return source_data
 
     def _extract(self):
         """
-        Load local repository's index
+        Load local repository's index, from cache if it is fresh, otherwise from YAML index
         :return: Dict, repository's index
         """
+        source_data = self._read_index_cache()
+        if source_data is not None:
+            return source_data
+
         fd = open(self.local_package_index_path)
         source_stream = fd.read()
         fd.close()
         source_data = loads(source_stream)
+
+        try:
+            self._write_index_cache(source_data)
+        except (IOError, OSError):
+            pass  # cache is only an optimization
         return source_data
 
-    def get_package(self, package_name):
+    def get_index(self):
         """
-        Get package by name from remote repository
+        Get local repository's index
+        :return: Dict, repository's index
+        """
+        return self._extract()
+
+    def get_package_name_list(self):
+        """
+        Get name of all packages in local repository's index
+        :return: List of package names
+        """
+        return list(self._extract().keys())
+
+    def _get_package_info(self, package_name, version=None):
+        """
+        Get package's index entry
         :param package_name: name of package
-        :return: local path of package file
+        :param version: version of package, None means the newest one
+        :return: Dict of package info, False if not found
         """
         source_data = self._extract()
+        # never print, stdout of worker carries JSON messages only
         if package_name not in source_data:
-            print("Not found package: " + package_name)
+            logger.warning("Not found package: %s", package_name)
             return False
-        else:
-            package_relative_path = source_data[package_name]['path']
+
+        package_info = source_data[package_name]
+        if version is not None:
+            # index made by old vimapt-makeindex only have the newest version
+            version_list = package_info.get('versions') or [package_info]
+            matched_list = [i for i in version_list if i['version'] == version]
+            if not matched_list:
+                logger.warning("Not found package: %s version: %s", package_name, version)
+                return False
+            package_info = matched_list[0]
+        return package_info
+
+    def _fetch_package(self, package_info, connection_pool=None):
+        """
+        Get package file from cache, or download it from remote repository
+        :param package_info: Dict of package info in index
+        :param connection_pool: ConnectionPool object, None means use a new connection
+        :return: local path of package file
+        """
+        package_relative_path = package_info['path']
+        package_full_name = os.path.basename(package_relative_path)
+        local_package_path = os.path.join(self.cache_pool_dir,
+                                          package_full_name)
+        package_hash = package_info.get('sha256')
+
+        # run by download threads, so the span has no parent
+        with Timing.span('download.package', file=package_full_name) as fields:
+            if package_hash and self._get_file_hash(local_package_path) == package_hash:
+                # cached package is verified, reuse it and mark it as recently used
+                os.utime(local_package_path, None)
+                fields['cached'] = True
+                return local_package_path
+
             source_server = self._get_config()
             package_url = os.path.join(source_server, package_relative_path)
+            self._download_package(package_url, local_package_path, package_hash, connection_pool)
+            fields['cached'] = False
+            return local_package_path
+
+    def get_package(self, package_name, version=None):
+        """
+        Get package by name from remote repository
+        :param package_name: name of package
+        :param version: version of package, None means the newest one
+        :return: local path of package file
+        """
+        package_info = self._get_package_info(package_name, version)
+        if not package_info:
+            return False
 
-            with contextlib.closing(urllib_request.urlopen(package_url)) as fd:  # TODO: add proxy and timeout, may use requests library
-                package_stream = fd.read()
+        local_package_path = self._fetch_package(package_info)
+        self.evict_cache(keep_path_list=[local_package_path])
+        return local_package_path
 
-            if six.PY3:
-                package_stream = package_stream.decode('utf-8')
+    def get_packages(self, package_spec_list, jobs=4):
+        """
+        Get many packages concurrently, by a bounded thread pool over keep-alive connections
+        :param package_spec_list: list of tuple (package name, version), version None means the newest one
+        :param jobs: number of download threads
+        :return: list of local path of package files, False if any package is not found
+        """
+        package_info_list = []
+        for package_name, version in package_spec_list:
+            package_info = self._get_package_info(package_name, version)
+            if not package_info:
+                return False
+            package_info_list.append(package_info)
 
-            package_full_name = os.path.basename(package_url)
-            local_package_path = os.path.join(self.cache_pool_dir,
-                                              package_full_name)
+        # same package asked twice is downloaded once, threads must not write the same file
+        unique_info_dict = dict((package_info['path'], package_info) for package_info in package_info_list)
+        unique_info_list = list(unique_info_dict.values())
 
-            fd = open(local_package_path, 'w')
-            fd.write(package_stream)
-            fd.close()
-            return local_package_path
+        from multiprocessing.pool import ThreadPool
+        from . import ConnectionPool
+
+        connection_pool = ConnectionPool.ConnectionPool()
+        thread_pool = ThreadPool(max(1, min(jobs, len(unique_info_list))))
+        try:
+            unique_path_list = thread_pool.map(
+                lambda package_info: self._fetch_package(package_info, connection_pool),
+                unique_info_list)
+        finally:
+            thread_pool.close()
+            thread_pool.join()
+            connection_pool.close()
+
+        local_path_dict = dict(zip([package_info['path'] for package_info in unique_info_list], unique_path_list))
+        local_package_path_list = [local_path_dict[package_info['path']] for package_info in package_info_list]
+
+        self.evict_cache(keep_path_list=local_package_path_list)
+        return local_package_path_list
+
+    def _download_package(self, package_url, local_package_path, package_hash=None, connection_pool=None):
+        """
+        Download package to local path, verify its hash if index has one
+        :param package_url: URL of package
+        :param local_package_path: location to save package
+        :param package_hash: sha256 of package, None means not verify
+        :param connection_pool: ConnectionPool object, None means use a new connection
+        :return: None
+        """
+        checksum = hashlib.sha256()
+        tmp_path = local_package_path + PARTIAL_SUFFIX
+        # keep package as bytes, VAP package is binary
+        try:
+            with open(tmp_path, 'wb') as output_fd:
+                def write_chunk(chunk):
+                    checksum.update(chunk)
+                    output_fd.write(chunk)
+
+                if connection_pool:
+                    connection_pool.get(package_url, write_chunk)
+                else:
+                    import six.moves.urllib.request as urllib_request
+                    with contextlib.closing(urllib_request.urlopen(package_url)) as fd:  # TODO: add proxy and timeout, may use requests library
+                        for chunk in iter(lambda: fd.read(64 * 1024), b''):
+                            write_chunk(chunk)
+        except Exception:
+            # failed download leaves nothing in cache
+            if os.path.isfile(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+        if package_hash and checksum.hexdigest() != package_hash:
+            os.unlink(tmp_path)
+            msg = "package: '%s' is broken, checksum is not matched!" % package_url
+            raise VimaptAbortOperationException(msg)
+
+        # broken package in cache is replaced
+        getattr(os, 'replace', os.rename)(tmp_path, local_package_path)
+
+    @staticmethod
+    def _get_file_hash(file_path):
+        """
+        Get sha256 of file
+        :param file_path: location of file
+        :return: string of hex digest, None if file not exists
+        """
+        if not os.path.isfile(file_path):
+            return None
+        checksum = hashlib.sha256()
+        with open(file_path, 'rb') as fd:
+            for chunk in iter(lambda: fd.read(64 * 1024), b''):
+                checksum.update(chunk)
+        return checksum.hexdigest()
+
+    def _get_cache_size_limit(self):
+        """
+        read size limit of package cache
+        :return: int, size limit in bytes
+        """
+        try:
+            with open(self.cache_size_limit_path) as fd:
+                return int(fd.read().strip())
+        except (IOError, OSError, ValueError):
+            return DEFAULT_CACHE_SIZE_LIMIT
+
+    def _get_cache_file_list(self, partial=False):
+        """
+        Get cached package files, the least recently used first
+        :param partial: True means get packages left by unfinished downloads instead
+        :return: List of tuple (mtime, size, path)
+        """
+        file_list = []
+        for f in os.listdir(self.cache_pool_dir):
+            file_path = os.path.join(self.cache_pool_dir, f)
+            if f.startswith('.') or f.endswith(PARTIAL_SUFFIX) != partial:
+                continue
+            if os.path.isfile(file_path):
+                stat = os.stat(file_path)
+                file_list.append((stat.st_mtime, stat.st_size, file_path))
+        file_list.sort()
+        return file_list
+
+    def evict_cache(self, keep_path_list=()):
+        """
+        Remove the least recently used packages until cache size is under limit
+        :param keep_path_list: packages that must be kept, e.g. the ones going to be installed
+        :return: List of removed file path
+        """
+        size_limit = self._get_cache_size_limit()
+        file_list = self._get_cache_file_list()
+        total_size = sum(size for _, size, _ in file_list)
+        removed_list = []
+        for _, size, file_path in file_list:
+            if total_size <= size_limit:
+                break
+            if file_path in keep_path_list:
+                continue
+            os.unlink(file_path)
+            removed_list.append(file_path)
+            total_size -= size
+        return removed_list
+
+    def clean(self):
+        """
+        Remove all cached packages, and the ones left by unfinished downloads
+        :return: List of removed file path
+        """
+        removed_list = []
+        for _, _, file_path in self._get_cache_file_list() + self._get_cache_file_list(partial=True):
+            os.unlink(file_path)
+            removed_list.append(file_path)
+        return removed_list
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+
+import os
+
+# members written by one thread at least, thread pool is not worth it for small packages
+MIN_BATCH_SIZE = 32
+
+
+def get_existing_path_set(base_dir, path_list):
+    """
+    Check which paths exist by listing each directory once, rather than stat() every path
+    :param base_dir: directory that paths are relative to
+    :param path_list: List of relative paths with '/' separator
+    :return: set of relative paths that exist
+    """
+    name_set_dict = {}
+    existing_path_set = set()
+    for path in path_list:
+        dir_name, base_name = os.path.split(path)
+        if dir_name not in name_set_dict:
+            try:
+                name_set_dict[dir_name] = set(os.listdir(os.path.join(base_dir, dir_name)))
+            except OSError:
+                name_set_dict[dir_name] = set()
+        if base_name in name_set_dict[dir_name]:
+            existing_path_set.add(path)
+    return existing_path_set
+
+
+class MemberWriter(object):
+    """
+    Write members of package into output dir: each directory is made once,
+    and members are written by a bounded thread pool, every thread take a batch of members.
+    """
+
+    def __init__(self, output_dir, jobs=1, store=None):
+        self.output_dir = output_dir
+        self.jobs = jobs
+        self.store = store  # ObjectStore object, None means members are plain files
+        self._dir_set = set()  # directories known to exist
+
+    def get_path(self, file_name):
+        """
+        Make sure the directory of member exists
+        :param file_name: relative path of member
+        :return: absolute path of member in output_dir
+        """
+        file_path = os.path.join(self.output_dir, file_name)
+        dir_path = os.path.dirname(file_path)
+        if dir_path not in self._dir_set:
+            if not os.path.isdir(dir_path):
+                os.makedirs(dir_path)
+            self._dir_set.add(dir_path)
+        return file_path
+
+    def link(self, file_name, digest, size):
+        """
+        Make member from object store without writing it, when its content is known before extraction
+        :param file_name: relative path of member
+        :param digest: sha256 of member
+        :param size: size of member
+        :return: Boolean, False means member should be written
+        """
+        if self.store is None or not self.store.is_storable(file_name):
+            return False
+        return self.store.link(digest, size, self.get_path(file_name))
+
+    def add(self, file_name, digest):
+        """
+        Put member just written into object store
+        :param file_name: relative path of member
+        :param digest: sha256 of member, hashed while it was written
+        :return: None
+        """
+        if self.store is not None and self.store.is_storable(file_name):
+            self.store.add(self.get_path(file_name), digest)
+
+    def write(self, write_batch, member_list):
+        """
+        Make directories of all members, then write members in batches
+        :param write_batch: an executable object take list of members and write them, run by threads
+        :param member_list: list of members, file name is the first item of member
+        :return: None
+        """
+        # directories are made here, so threads never race on them
+        for member in member_list:
+            self.get_path(member[0])
+
+        jobs = min(self.jobs, len(member_list) // MIN_BATCH_SIZE)
+        if jobs <= 1:
+            write_batch(member_list)
+            return
+
+        from multiprocessing.pool import ThreadPool
+
+        thread_pool = ThreadPool(jobs)
+        try:
+            thread_pool.map(write_batch, [member_list[i::jobs] for i in range(jobs)])
+        finally:
+            thread_pool.close()
+            thread_pool.join()
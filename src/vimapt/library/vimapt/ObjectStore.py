@@ -0,0 +1,201 @@
+#!/usr/bin/env python
+
+import os
+import shutil
+import hashlib
+import tempfile
+import logging
+
+logger = logging.getLogger(__name__)
+
+OBJECT_RELATIVE_DIR = 'vimapt/cache/objects'
+# optional, location of object store shared by many vim dirs, must be on the same filesystem to be hardlinked
+STORE_DIR_CONFIG_RELATIVE_PATH = 'vimapt/store_dir'
+# files user edit in place are never shared, editing one would change every copy of it
+NOT_STORED_DIR_LIST = ['vimrc']
+
+# objects and the files linked to them are read-only, so that editing one in place can not change the others
+OBJECT_MODE = 0o444
+
+CHUNK_SIZE = 64 * 1024
+
+
+def get_file_hash(file_path):
+    checksum = hashlib.sha256()
+    with open(file_path, 'rb') as fd:
+        for chunk in iter(lambda: fd.read(CHUNK_SIZE), b''):
+            checksum.update(chunk)
+    return checksum.hexdigest()
+
+
+def remove_file(file_path):
+    """
+    Remove file, which may be a read-only object link, windows refuse to remove read-only file
+    :param file_path: location of file
+    :return: None
+    """
+    try:
+        os.unlink(file_path)
+    except OSError:
+        if not os.path.lexists(file_path):
+            raise
+        os.chmod(file_path, 0o644)
+        os.unlink(file_path)
+
+
+class ObjectStore(object):
+    """
+    Content-addressed store of installed files: every unique file is kept once as 'objects/<aa>/<sha256>',
+    and files in vim dir are hardlinks to it. Link count of object is its reference count,
+    object only linked by the store itself is not used by any package, and is removed by collect().
+    When hardlink is not possible, e.g. across filesystems, files are plain copies as before.
+    """
+
+    def __init__(self, vim_dir):
+        self.vim_dir = vim_dir
+        self.object_dir = self._get_object_dir()
+
+    def _get_object_dir(self):
+        config_path = os.path.join(self.vim_dir, STORE_DIR_CONFIG_RELATIVE_PATH)
+        try:
+            with open(config_path) as fd:
+                object_dir = fd.read().strip()
+        except (IOError, OSError):
+            object_dir = None
+        return os.path.expanduser(object_dir) if object_dir else os.path.join(self.vim_dir, OBJECT_RELATIVE_DIR)
+
+    def get_object_path(self, digest):
+        return os.path.join(self.object_dir, digest[:2], digest)
+
+    @staticmethod
+    def is_storable(file_name):
+        """
+        :param file_name: relative path of member
+        :return: Boolean, False means the file should be a plain copy
+        """
+        return file_name.split('/')[0] not in NOT_STORED_DIR_LIST
+
+    def _is_intact(self, object_path, digest, size):
+        """
+        Check content of object against its digest, object changed in place is removed from store,
+        files linked to it keep the changed content, but no file is linked to it any more.
+        :return: Boolean
+        """
+        try:
+            if os.path.getsize(object_path) == size and get_file_hash(object_path) == digest:
+                return True
+        except (IOError, OSError):
+            return False
+        logger.info("object <%s> is changed, remove it from store", object_path)
+        remove_file(object_path)
+        return False
+
+    def link(self, digest, size, file_path):
+        """
+        Make file from stored object, without writing its content again.
+        Object is verified by its digest before it is linked.
+        :param digest: sha256 of file content
+        :param size: size of file content
+        :param file_path: location of file to make, must not exist
+        :return: Boolean, False means object is not in store or is not intact
+        """
+        object_path = self.get_object_path(digest)
+        if not self._is_intact(object_path, digest, size):
+            return False
+
+        try:
+            os.link(object_path, file_path)
+        except (OSError, AttributeError):
+            # python2 on windows has no os.link
+            shutil.copyfile(object_path, file_path)
+        return True
+
+    def add(self, file_path, digest=None):
+        """
+        Put file just written into store. If the same content is stored already and is intact,
+        file is replaced by a hardlink to the object, otherwise file become the object, and is made read-only.
+        :param file_path: location of file
+        :param digest: sha256 of file content, None means hash the file
+        :return: Boolean, True means file is linked with store
+        """
+        digest = digest or get_file_hash(file_path)
+        object_path = self.get_object_path(digest)
+        try:
+            if os.path.exists(object_path) and self._is_intact(object_path, digest, os.path.getsize(file_path)):
+                self._replace_with_link(object_path, file_path)
+            else:
+                self._make_dir(os.path.dirname(object_path))
+                os.link(file_path, object_path)
+                os.chmod(object_path, OBJECT_MODE)
+        except (OSError, AttributeError) as e:
+            # store on another filesystem, or made by another thread just now, the file stays a plain copy
+            logger.debug("<%s> is not linked with store: %s", file_path, e)
+            return False
+        return True
+
+    @staticmethod
+    def _replace_with_link(object_path, file_path):
+        # link is made in a directory of its own, so its name never clash with other members
+        tmp_dir = tempfile.mkdtemp(prefix='.vimapt-link-', dir=os.path.dirname(file_path))
+        tmp_path = os.path.join(tmp_dir, 'link')
+        try:
+            os.link(object_path, tmp_path)
+            # os.replace is atomic on every platform, python2 only has os.rename
+            getattr(os, 'replace', os.rename)(tmp_path, file_path)
+        finally:
+            if os.path.lexists(tmp_path):
+                os.unlink(tmp_path)
+            os.rmdir(tmp_dir)
+
+    def unlink(self, file_path):
+        """
+        Remove installed file, and its object when no other file links to it.
+        Only file linked by nothing but its object is hashed, to find the object.
+        :param file_path: location of file
+        :return: None
+        """
+        stat = os.stat(file_path)
+        object_path = None
+        if stat.st_nlink == 2:
+            object_path = self.get_object_path(get_file_hash(file_path))
+        remove_file(file_path)
+
+        try:
+            object_stat = os.stat(object_path) if object_path else None
+        except OSError:
+            return
+        if object_stat and (object_stat.st_dev, object_stat.st_ino) == (stat.st_dev, stat.st_ino) \
+                and object_stat.st_nlink <= 1:
+            remove_file(object_path)
+
+    @staticmethod
+    def _make_dir(dir_path):
+        if not os.path.isdir(dir_path):
+            try:
+                os.makedirs(dir_path)
+            except OSError:
+                # made by another thread
+                if not os.path.isdir(dir_path):
+                    raise
+
+    def collect(self):
+        """
+        Remove objects not linked by any file, by scanning the whole store.
+        Remove and Purge remove objects of their files already, this is for objects left by anything else,
+        e.g. a file changed in place, which can not be found by its digest.
+        :return: List of removed object paths
+        """
+        removed_list = []
+        if not os.path.isdir(self.object_dir):
+            return removed_list
+        for sub_dir in os.listdir(self.object_dir):
+            sub_dir_path = os.path.join(self.object_dir, sub_dir)
+            if not os.path.isdir(sub_dir_path):
+                continue
+            for file_name in os.listdir(sub_dir_path):
+                object_path = os.path.join(sub_dir_path, file_name)
+                if os.stat(object_path).st_nlink <= 1:
+                    remove_file(object_path)
+                    removed_list.append(object_path)
+        logger.info("%d unused object is removed from store", len(removed_list))
+        return removed_list
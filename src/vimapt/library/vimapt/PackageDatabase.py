@@ -0,0 +1,261 @@
+#!/usr/bin/env python
+
+import os
+import sqlite3
+import logging
+
+from .data_format import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 2
+
+# sqlite limits number of host parameters in one statement
+QUERY_BATCH_SIZE = 500
+
+STATE_INSTALLED = 'installed'
+STATE_REMOVED = 'removed'
+
+
+class PackageDatabase(object):
+    """
+    Transactional store of installed packages and the paths they own, kept in 'vimapt/status.db'.
+    Rebuilt from 'vimapt/control', 'vimapt/install' and 'vimapt/remove' when it is missing or broken.
+    """
+
+    def __init__(self, vim_dir):
+        self.vim_dir = vim_dir
+        self.db_path = os.path.join(self.vim_dir, 'vimapt/status.db')
+        self._connection = None
+
+    @property
+    def connection(self):
+        if self._connection is None:
+            self._connection = self._open()
+        return self._connection
+
+    def _open(self):
+        exists = os.path.isfile(self.db_path)
+        db_dir = os.path.dirname(self.db_path)
+        if not os.path.isdir(db_dir):
+            # fresh vim dir, nothing is installed yet
+            os.makedirs(db_dir)
+        connection = sqlite3.connect(self.db_path)
+        try:
+            user_version = connection.execute('PRAGMA user_version').fetchone()[0]
+        except sqlite3.DatabaseError:
+            logger.info("package database <%s> is broken, rebuild it", self.db_path)
+            connection.close()
+            os.unlink(self.db_path)
+            connection = sqlite3.connect(self.db_path)
+            exists, user_version = False, 0
+
+        if not exists or user_version != SCHEMA_VERSION:
+            self._create_schema(connection)
+            self._rebuild(connection)
+        return connection
+
+    @staticmethod
+    def _create_schema(connection):
+        with connection:
+            connection.execute('DROP TABLE IF EXISTS package')
+            connection.execute('DROP TABLE IF EXISTS file')
+            connection.execute('CREATE TABLE package ('
+                               ' name TEXT PRIMARY KEY,'
+                               ' version TEXT,'
+                               ' depends TEXT,'
+                               ' conflicts TEXT,'
+                               ' state TEXT NOT NULL)')
+            connection.execute('CREATE INDEX package_state ON package (state)')
+            # reverse index of path owned by package
+            connection.execute('CREATE TABLE file ('
+                               ' path TEXT PRIMARY KEY,'
+                               ' package TEXT NOT NULL)')
+            connection.execute('CREATE INDEX file_package ON file (package)')
+            connection.execute('PRAGMA user_version = %d' % SCHEMA_VERSION)
+
+    def rebuild(self):
+        """
+        Rebuild database from files on disk
+        :return: None
+        """
+        self._rebuild(self.connection)
+
+    def _rebuild(self, connection):
+        logger.info("rebuild package database <%s> from disk", self.db_path)
+        row_list = []
+        file_row_list = []
+        control_dir = os.path.join(self.vim_dir, 'vimapt/control')
+        for name in self._scan_dir('vimapt/install'):
+            control_data = {}
+            control_file = os.path.join(control_dir, name + '.yaml')
+            if os.path.isfile(control_file):
+                with open(control_file) as fd:
+                    control_data = loads(fd.read()) or dict()
+            row_list.append(self._make_row(name, control_data, STATE_INSTALLED))
+            file_row_list.extend((path, name) for path in self._read_record('vimapt/install', name))
+        for name in self._scan_dir('vimapt/remove'):
+            row_list.append(self._make_row(name, {}, STATE_REMOVED))
+            file_row_list.extend((path, name) for path in self._read_record('vimapt/remove', name)
+                                 if self._is_config_path(path))
+
+        with connection:
+            connection.execute('DELETE FROM package')
+            connection.execute('DELETE FROM file')
+            connection.executemany('INSERT OR REPLACE INTO package VALUES (?, ?, ?, ?, ?)', row_list)
+            connection.executemany('INSERT OR REPLACE INTO file VALUES (?, ?)', file_row_list)
+
+    def _scan_dir(self, relative_dir):
+        record_dir = os.path.join(self.vim_dir, relative_dir)
+        if not os.path.isdir(record_dir):
+            return []
+        return [f for f in os.listdir(record_dir)
+                if os.path.isfile(os.path.join(record_dir, f)) and not f.startswith('.')]
+
+    def _read_record(self, relative_dir, name):
+        with open(os.path.join(self.vim_dir, relative_dir, name)) as fd:
+            meta_data = loads(fd.read()) or []
+        return [file_name for file_name, _ in meta_data]
+
+    @staticmethod
+    def _is_config_path(path):
+        # configure files under 'vimrc' are kept by Remove
+        return path.split('/')[0] == 'vimrc'
+
+    @staticmethod
+    def _make_row(name, control_data, state):
+        version = control_data.get('version')
+        return (name,
+                None if version is None else str(version),
+                dumps(control_data.get('depends') or [], 'json'),
+                dumps(control_data.get('conflicts') or [], 'json'),
+                state)
+
+    def install(self, name, control_data, path_list=()):
+        """
+        Mark package as installed
+        :param name: name of package
+        :param control_data: Dict of control data
+        :param path_list: List of paths owned by package, relative to vim dir
+        :return: None
+        """
+        with self.connection:
+            self.connection.execute('INSERT OR REPLACE INTO package VALUES (?, ?, ?, ?, ?)',
+                                    self._make_row(name, control_data, STATE_INSTALLED))
+            self.connection.executemany('INSERT OR REPLACE INTO file VALUES (?, ?)',
+                                        ((path, name) for path in path_list))
+
+    def remove(self, name):
+        """
+        Mark package as removed, its configure files are kept
+        :param name: name of package
+        :return: None
+        """
+        with self.connection:
+            self.connection.execute('UPDATE package SET state = ? WHERE name = ?', (STATE_REMOVED, name))
+            self.connection.execute("DELETE FROM file WHERE package = ? AND path NOT LIKE 'vimrc/%'", (name,))
+
+    def purge(self, name):
+        """
+        Forget package
+        :param name: name of package
+        :return: None
+        """
+        with self.connection:
+            self.connection.execute('DELETE FROM package WHERE name = ?', (name,))
+            self.connection.execute('DELETE FROM file WHERE package = ?', (name,))
+
+    def get_version(self, name):
+        """
+        Get version of installed package
+        :param name: name of package
+        :return: string of version
+        :raise KeyError: package is not installed
+        """
+        row = self.connection.execute('SELECT version FROM package WHERE name = ? AND state = ?',
+                                      (name, STATE_INSTALLED)).fetchone()
+        if row is None:
+            raise KeyError(name)
+        return row[0]
+
+    def is_installed(self, name):
+        row = self.connection.execute('SELECT 1 FROM package WHERE name = ? AND state = ?',
+                                      (name, STATE_INSTALLED)).fetchone()
+        return row is not None
+
+    def get_package(self, name):
+        """
+        Get package record
+        :param name: name of package
+        :return: Dict of 'name', 'version', 'depends', 'conflicts' and 'state', None if not exists
+        """
+        row = self.connection.execute('SELECT name, version, depends, conflicts, state FROM package'
+                                      ' WHERE name = ?', (name,)).fetchone()
+        if row is None:
+            return None
+        return {'name': row[0], 'version': row[1], 'depends': loads(row[2], 'json'),
+                'conflicts': loads(row[3], 'json'), 'state': row[4]}
+
+    def get_version_dict(self):
+        """
+        :return: Dict of installed package name-version mapping
+        """
+        return dict(self.connection.execute('SELECT name, version FROM package WHERE state = ?',
+                                            (STATE_INSTALLED,)))
+
+    def get_name_list(self, state=None):
+        """
+        :param state: 'installed', 'removed', None means both
+        :return: List of package names
+        """
+        if state is None:
+            cursor = self.connection.execute('SELECT name FROM package ORDER BY name')
+        else:
+            cursor = self.connection.execute('SELECT name FROM package WHERE state = ? ORDER BY name', (state,))
+        return [row[0] for row in cursor]
+
+    def get_owner(self, path):
+        """
+        Get package which owns the path
+        :param path: path relative to vim dir, e.g. 'plugin/foo.vim'
+        :return: name of package, None if no package owns it
+        """
+        row = self.connection.execute('SELECT package FROM file WHERE path = ?', (path,)).fetchone()
+        return row[0] if row else None
+
+    def get_owner_dict(self, path_list):
+        """
+        Get owners of many paths at once
+        :param path_list: List of paths relative to vim dir
+        :return: Dict of path-package mapping, paths no package owns are left out
+        """
+        path_list = list(path_list)
+        owner_dict = {}
+        for i in range(0, len(path_list), QUERY_BATCH_SIZE):
+            batch = path_list[i:i + QUERY_BATCH_SIZE]
+            sql = 'SELECT path, package FROM file WHERE path IN (%s)' % ','.join('?' * len(batch))
+            owner_dict.update(self.connection.execute(sql, batch))
+        return owner_dict
+
+    def get_path_list(self, name, prefix=''):
+        """
+        Get paths owned by package
+        :param name: name of package
+        :param prefix: only paths start with it, e.g. 'vimrc/'
+        :return: List of paths, sorted
+        """
+        cursor = self.connection.execute('SELECT path FROM file WHERE package = ? AND substr(path, 1, ?) = ?'
+                                         ' ORDER BY path', (name, len(prefix), prefix))
+        return [row[0] for row in cursor]
+
+    def get_data_version(self):
+        """
+        :return: integer, changed whenever another connection commits to the database,
+                 even if size and mtime of the database file stay the same
+        """
+        return self.connection.execute('PRAGMA data_version').fetchone()[0]
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
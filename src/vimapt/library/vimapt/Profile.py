@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+
+import io
+import os
+import re
+import logging
+
+from . import Loader
+from . import PackageDatabase
+
+logger = logging.getLogger(__name__)
+
+# e.g. "012.281  005.623  005.623: sourcing /home/user/.vim/plugin/ctrlp.vim"
+SOURCING_PATTERN = re.compile(r'^\s*(\d+\.\d+)\s+(\d+\.\d+)\s+(\d+\.\d+):\s+sourcing\s+(.+?)\s*$')
+
+LOADER_GROUP = '(vimapt loader)'
+UNMANAGED_GROUP = '(not managed by vimapt)'
+
+
+def parse_startuptime(stream):
+    """
+    Parse log made by 'vim --startuptime', only the last startup is kept when Vim appended many to the log
+    :param stream: string, content of log
+    :return: List of (path, self time, self+sourced time), times are in msec
+    """
+    entry_list = []
+    for line in stream.splitlines():
+        if line.startswith('times in msec'):
+            entry_list = []
+            continue
+        match = SOURCING_PATTERN.match(line)
+        if match:
+            _, sourced_time, self_time, path = match.groups()
+            entry_list.append((path, float(self_time), float(sourced_time)))
+    return entry_list
+
+
+def find_outliers(time_dict, factor=3.0, min_time=1.0):
+    """
+    Find outstanding items by median absolute deviation, which is not dragged by the outliers like the mean is
+    :param time_dict: Dict of name-time mapping
+    :param factor: how many deviations above median is outstanding
+    :param min_time: items cost less than this are never outstanding, in msec
+    :return: set of names
+    """
+    if not time_dict:
+        return set()
+    median = _median(list(time_dict.values()))
+    deviation = _median([abs(i - median) for i in time_dict.values()])
+    threshold = max(median + factor * deviation, min_time)
+    return set(name for name, time_cost in time_dict.items() if time_cost > threshold)
+
+
+def _median(value_list):
+    value_list = sorted(value_list)
+    middle = len(value_list) // 2
+    if len(value_list) % 2:
+        return value_list[middle]
+    return (value_list[middle - 1] + value_list[middle]) / 2.0
+
+
+class Profile(object):
+    """
+    Attribute Vim startup time to installed packages, by joining sourced scripts with files owned by packages
+    """
+
+    def __init__(self, vim_dir):
+        self.vim_dir = vim_dir
+
+    def _get_relative_path(self, path):
+        """
+        :return: path relative to vim dir with '/' separator, None if path is out of vim dir
+        """
+        path = os.path.expanduser(path)
+        for base_dir, file_path in [(self.vim_dir, path),
+                                    (os.path.realpath(self.vim_dir), os.path.realpath(path))]:
+            try:
+                relative_path = os.path.relpath(file_path, base_dir)
+            except ValueError:
+                # path on another drive of windows
+                continue
+            if not relative_path.startswith(os.pardir):
+                return relative_path.replace(os.sep, '/')
+        return None
+
+    def attribute(self, entry_list):
+        """
+        Sum self time of sourced scripts by package. Self time is used so that nested sourcing is not counted twice.
+        :param entry_list: result of parse_startuptime()
+        :return: tuple of (List of Dict with 'name', 'time', 'files' and 'outlier', most costly first,
+                 time of scripts out of vim dir)
+        """
+        relative_path_dict = {}
+        other_time = 0.0
+        for path, self_time, _ in entry_list:
+            relative_path = self._get_relative_path(path)
+            if relative_path is None:
+                other_time += self_time
+            else:
+                relative_path_dict.setdefault(relative_path, []).append(self_time)
+
+        database = PackageDatabase.PackageDatabase(self.vim_dir)
+        try:
+            owner_dict = database.get_owner_dict(relative_path_dict.keys())
+        finally:
+            database.close()
+
+        time_dict = {}
+        file_count_dict = {}
+        chunk_prefix = Loader.PROFILE_CHUNK_RELATIVE_DIR + '/'
+        for relative_path, time_list in relative_path_dict.items():
+            if relative_path in (Loader.LOADER_RELATIVE_PATH, Loader.PROFILE_LOADER_RELATIVE_PATH):
+                name = LOADER_GROUP
+            elif relative_path.startswith(chunk_prefix):
+                # configure files of package, sourced by profile loader from a file of its own
+                name = os.path.splitext(relative_path[len(chunk_prefix):])[0]
+            else:
+                name = owner_dict.get(relative_path, UNMANAGED_GROUP)
+            time_dict[name] = time_dict.get(name, 0.0) + sum(time_list)
+            file_count_dict[name] = file_count_dict.get(name, 0) + 1
+
+        package_time_dict = dict((name, time_cost) for name, time_cost in time_dict.items()
+                                 if name not in (LOADER_GROUP, UNMANAGED_GROUP))
+        outlier_set = find_outliers(package_time_dict)
+
+        result_list = [{'name': name, 'time': time_cost, 'files': file_count_dict[name], 'outlier': name in outlier_set}
+                       for name, time_cost in time_dict.items()]
+        result_list.sort(key=lambda i: (-i['time'], i['name']))
+        return result_list, other_time
+
+    def profile(self, log_file):
+        """
+        :param log_file: location of log made by 'vim --startuptime'
+        :return: string, report
+        """
+        with io.open(log_file, encoding='utf-8', errors='replace') as fd:
+            entry_list = parse_startuptime(fd.read())
+        if not entry_list:
+            return "No script sourcing found in %s" % log_file
+
+        result_list, other_time = self.attribute(entry_list)
+        line_list = ["%10s  %5s  %s" % ("msec", "files", "package")]
+        for result in result_list:
+            line_list.append("%10.3f  %5d  %s%s" % (result['time'], result['files'], result['name'],
+                                                    "  <- outlier" if result['outlier'] else ""))
+        line_list.append("%10.3f  %5s  %s" % (other_time, "", "(vim runtime and others)"))
+        return "\n".join(line_list)
@@ -3,6 +3,11 @@
 import os
 
 from .data_format import loads
+from . import Loader
+from . import ObjectStore
+from . import PackageDatabase
+from . import Timing
+from . import Transaction
 
 
 class Purge(object):
@@ -11,27 +16,52 @@ class Purge(object):
         self.package_name = None
 
     def purge_package(self, package_name):
-        self.package_name = package_name
-
-        file_install_path = os.path.join(self.vim_dir,
-                                         'vimapt/install',
-                                         self.package_name)
-        file_remove_path = os.path.join(self.vim_dir,
-                                        'vimapt/remove',
-                                        self.package_name)
-        if os.path.isfile(file_install_path):
-            file_path = file_install_path
-        else:
-            file_path = file_remove_path
-        fd = open(file_path, 'r')
-        file_stream = fd.read()
-        fd.close()
-        meta_data = loads(file_stream)
-
-        for file_name, _ in meta_data:
-            target_path = os.path.join(self.vim_dir, file_name)
-            if os.path.isfile(target_path):
-                os.unlink(target_path)
-            else:
-                pass
-        os.unlink(file_path)
+        with Timing.span('purge', name=package_name):
+            Transaction.recover(self.vim_dir)
+
+            self.package_name = package_name
+
+            file_install_path = os.path.join(self.vim_dir,
+                                             'vimapt/install',
+                                             self.package_name)
+            file_remove_path = os.path.join(self.vim_dir,
+                                            'vimapt/remove',
+                                            self.package_name)
+            with Timing.span('purge.control', name=package_name):
+                if os.path.isfile(file_install_path):
+                    file_path = file_install_path
+                else:
+                    file_path = file_remove_path
+                fd = open(file_path, 'r')
+                file_stream = fd.read()
+                fd.close()
+                meta_data = loads(file_stream)
+
+            database = PackageDatabase.PackageDatabase(self.vim_dir)
+            try:
+                owner_dict = database.get_owner_dict(file_name for file_name, _ in meta_data)
+            finally:
+                database.close()
+
+            store = ObjectStore.ObjectStore(self.vim_dir)
+            with Timing.span('purge.files', name=package_name, files=len(meta_data)):
+                for file_name, _ in meta_data:
+                    if owner_dict.get(file_name) != package_name:
+                        # file is owned by other package, or removed already
+                        continue
+                    target_path = os.path.join(self.vim_dir, file_name)
+                    if os.path.isfile(target_path):
+                        store.unlink(target_path)
+                    else:
+                        pass
+
+            with Timing.span('purge.record', name=package_name):
+                os.unlink(file_path)
+                database = PackageDatabase.PackageDatabase(self.vim_dir)
+                try:
+                    database.purge(package_name)
+                finally:
+                    database.close()
+
+            with Timing.span('purge.loader'):
+                Loader.Loader(self.vim_dir).generate()
@@ -12,7 +12,9 @@ class Record:
     def install(self, package_name, meta_data):
         record_dir = os.path.join(self.vim_dir, "vimapt/install")
         record_file = os.path.join(record_dir, package_name)
+        if not os.path.isdir(record_dir):
+            os.makedirs(record_dir)
         fd = open(record_file, 'w')
-        meta_stream = dumps(meta_data)
+        meta_stream = dumps(meta_data, 'json')
         fd.write(meta_stream)
         fd.close()
@@ -1,8 +1,38 @@
 #!/usr/bin/env python
 
 import os
+import gzip
+import hashlib
+import logging
 
-from .data_format import dumps
+from .data_format import dumps, loads
+from . import Extract
+from . import Timing
+
+logger = logging.getLogger(__name__)
+
+PACKAGE_EXT_LIST = ['.vpb', '.vap']
+
+
+def version_key(version):
+    """
+    Sort key of package version like '2.14.1-1', which is upstream version and package revision.
+    Upstream version is compared as semantic version, revision is compared as number.
+    :param version: string of version
+    :return: tuple that can be compared
+    """
+    import semantic_version
+
+    # version in control file may be missing or parsed as number by YAML
+    version = '' if version is None else str(version)
+    upstream_version, _, revision = version.partition('-')
+    try:
+        semantic = semantic_version.Version.coerce(upstream_version)
+    except ValueError:
+        # not a semantic version at all, sort it before the others by string
+        return 0, version
+    revision_key = (int(revision), '') if revision.isdigit() else (0, revision)
+    return 1, semantic, revision_key
 
 
 class RemoteRepo(object):
@@ -12,27 +42,115 @@ class RemoteRepo(object):
         # initial setup
         pool_relative_dir = "pool"
         package_relative_path = "index/package"
+        cache_relative_path = "index/.package-cache"
         self.pool_absolute_dir = os.path.join(self.repo_dir, pool_relative_dir)
         self.package_abspath = os.path.join(self.repo_dir, package_relative_path)
+        self.cache_abspath = os.path.join(self.repo_dir, cache_relative_path)
 
     def make_package_index(self):
-        package_data = self.scan_pool()
-        package_stream = dumps(package_data)
-        fd = open(self.package_abspath, 'w')
-        fd.write(package_stream)
-        fd.close()
+        with Timing.span('index'):
+            with Timing.span('index.scan') as fields:
+                package_data = self.scan_pool()
+                fields['packages'] = len(package_data)
+
+            with Timing.span('index.write'):
+                package_stream = dumps(package_data, 'json')
+                fd = open(self.package_abspath, 'w')
+                fd.write(package_stream)
+                fd.close()
+
+                # pre-compressed copy, so that client can download less
+                with open(self.package_abspath + '.gz', 'wb') as fd:
+                    with gzip.GzipFile(fileobj=fd, mode='wb', mtime=0) as gzip_fd:
+                        gzip_fd.write(package_stream.encode('utf-8'))
 
     def scan_pool(self):
-        files = [f for f in os.listdir(self.pool_absolute_dir)
-                 if os.path.isfile(os.path.join(self.pool_absolute_dir, f))]
+        """
+        Scan the pool incrementally, only package file added or changed since last scan is hashed.
+        :return: Dict of package index, every version of package is kept and sorted by version,
+                 'version' and 'path' of the newest one are kept at the top level for old client.
+        """
+        cache = self._load_cache()
+        new_cache = {}
+        for file_name in sorted(os.listdir(self.pool_absolute_dir)):
+            file_path = os.path.join(self.pool_absolute_dir, file_name)
+            if file_name.startswith('.') or not os.path.isfile(file_path):
+                continue
+            if os.path.splitext(file_name)[1] not in PACKAGE_EXT_LIST:
+                continue
+
+            stat = os.stat(file_path)
+            entry = cache.get(file_name)
+            if not entry or entry['size'] != stat.st_size or entry['mtime'] != stat.st_mtime \
+                    or 'depends' not in entry:
+                logger.info("pool file <%s> is added or changed, scan it", file_name)
+                entry = self._scan_package_file(file_name, stat)
+            new_cache[file_name] = entry
+
+        for file_name in set(cache) - set(new_cache):
+            logger.info("pool file <%s> is removed", file_name)
+
+        self._write_cache(new_cache)
+
+        version_list_dict = {}
+        for entry in new_cache.values():
+            package_info = {'version': entry['version'], 'path': entry['path'], 'sha256': entry['sha256'],
+                            'depends': entry['depends'], 'conflicts': entry['conflicts']}
+            version_list_dict.setdefault(entry['name'], []).append(package_info)
+
         package_data = {}
-        for file_name in files:
-            pkg_name_segments = file_name.split("_")
-            package_name = '_'.join(pkg_name_segments[:-1])
-            version_and_ext = pkg_name_segments[-1]
-
-            version = os.path.splitext(version_and_ext)[0]
-            path = os.path.join('pool/', file_name)
-            package_info = {'version': version, 'path': path}
-            package_data[package_name] = package_info
+        for package_name, version_list in version_list_dict.items():
+            version_list.sort(key=lambda i: version_key(i['version']))
+            newest = version_list[-1]
+            package_data[package_name] = {'version': newest['version'],
+                                          'path': newest['path'],
+                                          'sha256': newest['sha256'],
+                                          'versions': version_list}
         return package_data
+
+    def _scan_package_file(self, file_name, stat):
+        pkg_name_segments = file_name.split("_")
+        package_name = '_'.join(pkg_name_segments[:-1])
+        version_and_ext = pkg_name_segments[-1]
+        version = os.path.splitext(version_and_ext)[0]
+
+        file_path = os.path.join(self.pool_absolute_dir, file_name)
+        checksum = hashlib.sha256()
+        with open(file_path, 'rb') as fd:
+            for chunk in iter(lambda: fd.read(64 * 1024), b''):
+                checksum.update(chunk)
+
+        control_data = self._read_control_data(file_path, package_name)
+
+        return {'name': package_name,
+                'version': version,
+                'path': 'pool/' + file_name,
+                'sha256': checksum.hexdigest(),
+                'depends': control_data.get('depends') or [],
+                'conflicts': control_data.get('conflicts') or [],
+                'size': stat.st_size,
+                'mtime': stat.st_mtime}
+
+    @staticmethod
+    def _read_control_data(file_path, package_name):
+        """
+        Read control data of package without extract it
+        :return: Dict of control data, empty if package is broken or has no control file
+        """
+        controller_file = 'vimapt/control/' + package_name + '.yaml'
+        try:
+            file_stream = Extract.open_package(file_path, None).read(controller_file)
+            return loads(file_stream) or dict()
+        except Exception as e:
+            logger.info("can not read control data of <%s>: %s", file_path, e)
+            return dict()
+
+    def _load_cache(self):
+        if not os.path.isfile(self.cache_abspath):
+            return {}
+        with open(self.cache_abspath) as fd:
+            return loads(fd.read()) or {}
+
+    def _write_cache(self, cache):
+        with open(self.cache_abspath, 'w') as fd:
+            fd.write(dumps(cache, 'json'))
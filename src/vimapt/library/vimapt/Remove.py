@@ -3,6 +3,11 @@
 import os
 
 from .data_format import loads
+from . import Loader
+from . import ObjectStore
+from . import PackageDatabase
+from . import Timing
+from . import Transaction
 
 
 class Remove(object):
@@ -10,27 +15,54 @@ class Remove(object):
         self.vim_dir = vim_dir
 
     def remove_package(self, package_name):
-        file_path = os.path.join(self.vim_dir,
-                                 'vimapt/install',
-                                 package_name)
-        # print file_path
-        fd = open(file_path, 'r')
-        file_stream = fd.read()
-        fd.close()
-        meta_data = loads(file_stream)
-
-        for file_name, _ in meta_data:
-            file_token = file_name.split("/")
-            if file_token[0] == "vimrc":
-                continue
-            target_path = os.path.join(self.vim_dir, file_name)
-
-            # print target_path
-            if os.path.isfile(target_path):
-                os.unlink(target_path)
-            else:
-                pass
-        remove_path = os.path.join(self.vim_dir,
-                                   'vimapt/remove',
-                                   package_name)
-        os.rename(file_path, remove_path)
+        with Timing.span('remove', name=package_name):
+            Transaction.recover(self.vim_dir)
+
+            file_path = os.path.join(self.vim_dir,
+                                     'vimapt/install',
+                                     package_name)
+            with Timing.span('remove.control', name=package_name):
+                # print file_path
+                fd = open(file_path, 'r')
+                file_stream = fd.read()
+                fd.close()
+                meta_data = loads(file_stream)
+
+            database = PackageDatabase.PackageDatabase(self.vim_dir)
+            try:
+                owner_dict = database.get_owner_dict(file_name for file_name, _ in meta_data)
+            finally:
+                database.close()
+
+            store = ObjectStore.ObjectStore(self.vim_dir)
+            with Timing.span('remove.files', name=package_name, files=len(meta_data)):
+                for file_name, _ in meta_data:
+                    file_token = file_name.split("/")
+                    if file_token[0] == "vimrc":
+                        continue
+                    if owner_dict.get(file_name) != package_name:
+                        # file is owned by other package, e.g. records made before file ownership is checked
+                        continue
+                    target_path = os.path.join(self.vim_dir, file_name)
+
+                    # print target_path
+                    if os.path.isfile(target_path):
+                        store.unlink(target_path)
+                    else:
+                        pass
+
+            with Timing.span('remove.record', name=package_name):
+                remove_path = os.path.join(self.vim_dir,
+                                           'vimapt/remove',
+                                           package_name)
+                if not os.path.isdir(os.path.dirname(remove_path)):
+                    os.makedirs(os.path.dirname(remove_path))
+                os.rename(file_path, remove_path)
+                database = PackageDatabase.PackageDatabase(self.vim_dir)
+                try:
+                    database.remove(package_name)
+                finally:
+                    database.close()
+
+            with Timing.span('remove.loader'):
+                Loader.Loader(self.vim_dir).generate()
@@ -0,0 +1,258 @@
+#!/usr/bin/env python
+
+import logging
+
+from .RemoteRepo import version_key
+from vimapt.exception import VimaptAbortOperationException
+
+logger = logging.getLogger(__name__)
+
+COMPARER_MAPPING = {
+    "<": lambda x, y: x < y,
+    ">": lambda x, y: x > y,
+    "<=": lambda x, y: x <= y,
+    ">=": lambda x, y: x >= y,
+    "==": lambda x, y: x == y,
+    "!=": lambda x, y: x != y,
+}
+
+
+class Resolver(object):
+    """
+    Dependency resolver, walk the version graph of repository index with backtracking
+    and produce an ordered install plan.
+    """
+
+    def __init__(self, index_data, installed_version_dict=None):
+        """
+        :param index_data: Dict of repository index, made by RemoteRepo
+        :param installed_version_dict: Dict of installed package name-version mapping
+        """
+        self.index_data = index_data
+        self.installed_version_dict = installed_version_dict or {}
+
+        # memoization
+        self._requirement_cache = {}
+        self._version_key_cache = {}
+        self._candidate_cache = {}
+
+    def parse_requirement(self, requirements_data):
+        """
+        Parse requirement data of control file, result is memoized
+        :param requirements_data: list of string or string
+        :return: tuple of (package name, tuple of (operator, version))
+        """
+        if not requirements_data:
+            return ()
+
+        # if requirement is a string, then translate to a single element list
+        if not isinstance(requirements_data, (list, tuple)):
+            requirements_data = [requirements_data]
+
+        import requirements
+
+        requirement_list = []
+        for requirement_str in requirements_data:
+            try:
+                parsed = self._requirement_cache[requirement_str]
+            except KeyError:
+                parsed = tuple((i.name, tuple(tuple(spec) for spec in i.specs))
+                               for i in requirements.parse(requirement_str))
+                self._requirement_cache[requirement_str] = parsed
+            requirement_list.extend(parsed)
+        return tuple(requirement_list)
+
+    def version_key(self, version):
+        try:
+            return self._version_key_cache[version]
+        except KeyError:
+            key = self._version_key_cache[version] = version_key(version)
+            return key
+
+    def match(self, version, specs):
+        """
+        Check if version meet all the specs
+        :param version: string of version
+        :param specs: tuple of (operator, version)
+        :return: Boolean
+        """
+        key = self.version_key(version)
+        for operator, require_version in specs:
+            try:
+                comparer = COMPARER_MAPPING[operator]
+            except KeyError:
+                raise ValueError("No such comparer %s" % operator)
+            if not comparer(key, self.version_key(require_version)):
+                return False
+        return True
+
+    def get_candidates(self, name, specs):
+        """
+        Get index entries of package that meet the specs, the newest first. Result is memoized
+        :return: list of Dict, each one has 'name', 'version', 'path', 'depends' and 'conflicts'
+        """
+        cache_key = (name, specs)
+        try:
+            return self._candidate_cache[cache_key]
+        except KeyError:
+            pass
+
+        package_info = self.index_data.get(name)
+        if not package_info:
+            candidate_list = []
+        else:
+            # index made by old vimapt-makeindex only have the newest version
+            version_list = package_info.get('versions') or [package_info]
+            candidate_list = [dict(i, name=name) for i in reversed(version_list)
+                              if self.match(i['version'], specs)]
+
+        self._candidate_cache[cache_key] = candidate_list
+        return candidate_list
+
+    def resolve(self, requirement_list):
+        """
+        Resolve requirements to an install plan
+        :param requirement_list: list of requirement string, e.g. ['ctrlp', 'tagbar>=2.0']
+        :return: list of index entries to install, dependencies come before the packages need them
+        """
+        # name -> ('installed', version) or ('plan', entry)
+        chosen = {}
+        for name, version in self.installed_version_dict.items():
+            chosen[name] = ('installed', version)
+
+        # name -> list of (specs, conflicted by); entries are pushed and popped in stack order
+        conflicts = {}
+
+        # pending requirements as linked list: ((name, specs, required by), next), so that snapshot is free
+        pending = None
+        for name, specs in reversed(self.parse_requirement(requirement_list)):
+            pending = ((name, specs, None), pending)
+
+        # choice points: [requirement, candidate list, next candidate index, pending after requirement]
+        stack = []
+        failure = None
+
+        while True:
+            # skip requirements already satisfied
+            backtrack = False
+            while pending is not None:
+                (name, specs, required_by), rest = pending
+                if name not in chosen:
+                    break
+                status, value = chosen[name]
+                version = value if status == 'installed' else value['version']
+                if not self.match(version, specs):
+                    failure = "%s%s required by %s, but %s %s is chosen" % (
+                        name, self._format_specs(specs), required_by or 'user', name, version)
+                    backtrack = True
+                    break
+                pending = rest
+
+            if not backtrack:
+                if pending is None:
+                    return self._make_plan(chosen)
+
+                (name, specs, required_by), rest = pending
+                candidate_list = self.get_candidates(name, specs)
+                if not candidate_list:
+                    failure = "%s%s required by %s is not found in repository" % (
+                        name, self._format_specs(specs), required_by or 'user')
+                stack.append([pending[0], candidate_list, 0, rest])
+
+            # try next candidate of the top choice point, unwind when exhausted
+            while True:
+                if not stack:
+                    raise VimaptAbortOperationException("can not resolve dependency: %s" % failure)
+
+                frame = stack[-1]
+                requirement, candidate_list, candidate_index, rest = frame
+                name = requirement[0]
+
+                if candidate_index > 0:
+                    # undo previous candidate
+                    self._undo_choice(chosen, conflicts, candidate_list[candidate_index - 1])
+
+                if candidate_index >= len(candidate_list):
+                    stack.pop()
+                    continue
+
+                candidate = candidate_list[candidate_index]
+                frame[2] = candidate_index + 1
+
+                conflict_reason = self._check_conflict(chosen, conflicts, candidate)
+                if conflict_reason:
+                    failure = conflict_reason
+                    # mark as chosen so that undo is symmetric
+                    self._do_choice(chosen, conflicts, candidate, register=False)
+                    continue
+
+                self._do_choice(chosen, conflicts, candidate)
+                pending = rest
+                for depend_name, depend_specs in reversed(self.parse_requirement(candidate.get('depends'))):
+                    pending = ((depend_name, depend_specs, "%s %s" % (name, candidate['version'])), pending)
+                break
+
+    def _do_choice(self, chosen, conflicts, candidate, register=True):
+        chosen[candidate['name']] = ('plan', candidate) if register else ('rejected', candidate)
+        if not register:
+            return
+        for conflict_name, conflict_specs in self.parse_requirement(candidate.get('conflicts')):
+            conflicts.setdefault(conflict_name, []).append((conflict_specs, candidate['name']))
+
+    def _undo_choice(self, chosen, conflicts, candidate):
+        status, _ = chosen.pop(candidate['name'])
+        if status != 'plan':
+            return
+        for conflict_name, _ in self.parse_requirement(candidate.get('conflicts')):
+            conflicts[conflict_name].pop()
+
+    def _check_conflict(self, chosen, conflicts, candidate):
+        """
+        Check if candidate conflicts with chosen packages
+        :return: string of reason, None means no conflict
+        """
+        name = candidate['name']
+        for conflict_specs, conflicted_by in conflicts.get(name, ()):
+            if self.match(candidate['version'], conflict_specs):
+                return "%s %s conflicts with %s" % (name, candidate['version'], conflicted_by)
+
+        for conflict_name, conflict_specs in self.parse_requirement(candidate.get('conflicts')):
+            if conflict_name not in chosen:
+                continue
+            status, value = chosen[conflict_name]
+            if status == 'rejected':
+                continue
+            version = value if status == 'installed' else value['version']
+            if self.match(version, conflict_specs):
+                return "%s %s conflicts with %s %s" % (name, candidate['version'], conflict_name, version)
+        return None
+
+    def _make_plan(self, chosen):
+        """
+        Order chosen packages so that dependencies come first
+        :return: list of index entries
+        """
+        plan = []
+        visited = set()
+        for root_name in sorted(chosen):
+            if root_name in visited or chosen[root_name][0] != 'plan':
+                continue
+            # iterative post-order walk, deep dependency chains will not hit recursion limit
+            visited.add(root_name)
+            walk_stack = [(root_name, iter(self.parse_requirement(chosen[root_name][1].get('depends'))))]
+            while walk_stack:
+                name, depend_iter = walk_stack[-1]
+                for depend_name, _ in depend_iter:
+                    if depend_name not in visited and chosen.get(depend_name, ('',))[0] == 'plan':
+                        visited.add(depend_name)
+                        depends = chosen[depend_name][1].get('depends')
+                        walk_stack.append((depend_name, iter(self.parse_requirement(depends))))
+                        break
+                else:
+                    walk_stack.pop()
+                    plan.append(chosen[name][1])
+        return plan
+
+    @staticmethod
+    def _format_specs(specs):
+        return ",".join(operator + version for operator, version in specs)
@@ -0,0 +1,197 @@
+#!/usr/bin/env python
+
+import os
+import logging
+
+from vimapt import setup_logging
+from vimapt.exception import VimaptAbortOperationException
+from . import LocalRepo
+from . import Vimapt
+
+# modules only commands need are imported by the commands, completion stay light
+
+logger = logging.getLogger(__name__)
+
+# one service per vim dir, kept alive in Vim's python interpreter
+_service_dict = {}
+
+
+def get_service(vim_dir):
+    """
+    Get resident service of vim dir, make one if not exists
+    :param vim_dir: user's vim dir
+    :return: Service object
+    """
+    try:
+        return _service_dict[vim_dir]
+    except KeyError:
+        setup_logging(vim_dir)
+        service = _service_dict[vim_dir] = Service(vim_dir)
+        return service
+
+
+class Service(object):
+    """
+    Resident vimapt service, which stay loaded in Vim's python interpreter.
+    Repository index and installed state are kept in memory and reloaded only when the files they come from change,
+    so that command completion does not touch anything but a stat() call and a query of database's data version.
+    """
+
+    def __init__(self, vim_dir):
+        self.vim_dir = vim_dir
+        self.repo = LocalRepo.LocalRepo(vim_dir)
+        self.vimapt = Vimapt.Vimapt(vim_dir)
+        self.database_path = self.vimapt.database.db_path
+        self._database_inode = None  # inode of database file the connection is opened on
+        self._cache = {}  # key -> (signature, value)
+
+    def _cached(self, key, get_signature, loader):
+        """
+        Get value from cache, reload it by loader when the source changed
+        :param key: key of cache
+        :param get_signature: an executable object take no args and return signature of the source of the value
+        :param loader: an executable object take no args and return the value
+        :return: value
+        """
+        signature = get_signature()
+        entry = self._cache.get(key)
+        if entry is not None and entry[0] == signature:
+            return entry[1]
+
+        logger.info("source of <%s> changed, reload it", key)
+        value = loader()
+        # the loader may create the source, e.g. package database
+        self._cache[key] = (get_signature(), value)
+        return value
+
+    @staticmethod
+    def _get_file_signature(path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime
+
+    def _get_database_signature(self):
+        """
+        Signature of package database. Size and mtime of the file may stay the same after a commit,
+        data version of the resident connection never does.
+        :return: tuple of inode of database file and its data version
+        """
+        try:
+            inode = os.stat(self.database_path).st_ino
+        except OSError:
+            inode = None
+        if inode != self._database_inode:
+            # database is rebuilt as a new file, the connection still read the old one
+            self.vimapt.close()
+            self._database_inode = inode
+        return inode, self.vimapt.database.get_data_version()
+
+    def invalidate(self):
+        """
+        Drop all cached values
+        :return: None
+        """
+        self._cache = {}
+
+    def get_package_name_list(self):
+        """
+        :return: List of package names in local repository's index
+        """
+        def loader():
+            if not os.path.isfile(self.repo.local_package_index_path):
+                return []
+            return sorted(self.repo.get_package_name_list())
+
+        return self._cached('package_name_list',
+                            lambda: self._get_file_signature(self.repo.local_package_index_path), loader)
+
+    def get_remove_list(self):
+        """
+        :return: List of package names can be removed
+        """
+        return self._cached('remove_list', self._get_database_signature, self.vimapt.get_presist_list)
+
+    def get_purge_list(self):
+        """
+        :return: List of package names can be purged
+        """
+        return self._cached('purge_list', self._get_database_signature, self.vimapt.get_purge_list)
+
+    def install(self, *package_name_list):
+        from . import Install
+
+        install = Install.Install(self.vim_dir)
+        try:
+            if len(package_name_list) == 1:
+                install.repo_install(package_name_list[0])
+            else:
+                install.repo_install_list(package_name_list)
+        except VimaptAbortOperationException as e:
+            print(e)
+        else:
+            print("Install Succeed!")
+        finally:
+            self.invalidate()
+
+    def remove(self, package_name):
+        from . import Remove
+
+        try:
+            Remove.Remove(self.vim_dir).remove_package(package_name)
+        finally:
+            self.invalidate()
+        print("Remove Succeed!")
+
+    def purge(self, package_name):
+        from . import Purge
+
+        try:
+            Purge.Purge(self.vim_dir).purge_package(package_name)
+        finally:
+            self.invalidate()
+        print("Purge Succeed!")
+
+    def update(self):
+        try:
+            modified = self.repo.update()
+        finally:
+            self.invalidate()
+        if modified:
+            print("Update Succeed!")
+        else:
+            print("Update Succeed! Index is not modified.")
+
+    def clean(self):
+        from . import ObjectStore
+
+        removed_list = self.repo.clean()
+        object_list = ObjectStore.ObjectStore(self.vim_dir).collect()
+        print("Clean Succeed! %d cached package and %d unused object removed." % (len(removed_list), len(object_list)))
+
+    def reload(self):
+        from . import Loader
+
+        loader_path = Loader.Loader(self.vim_dir).generate()
+        print("Reload Succeed! %s is regenerated." % loader_path)
+
+    def make_profile_loader(self):
+        """
+        :return: path of loader which make 'vim --startuptime' report configure files of each package
+        """
+        from . import Loader
+
+        return Loader.Loader(self.vim_dir).generate_profile_loader()
+
+    def profile(self, log_file):
+        from . import Profile
+
+        print(Profile.Profile(self.vim_dir).profile(log_file))
+
+    def owns(self, path):
+        owner = self.vimapt.get_owner(path)
+        if owner is None:
+            print("No package owns %s" % path)
+        else:
+            print("%s is owned by %s" % (path, owner))
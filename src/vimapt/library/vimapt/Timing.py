@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+
+import io
+import os
+import time
+import logging
+import threading
+import contextlib
+
+from .data_format import dumps
+
+logger = logging.getLogger(__name__)
+
+timer = getattr(time, 'perf_counter', time.time)
+
+# span file is rotated when it grows beyond this, the old one is kept as '<file>.1'
+MAX_OUTPUT_SIZE = 1024 * 1024
+
+# where finished spans are written to, None means spans are only timed;
+# stream of 'path' is opened by set_output(), None means stream is given by caller
+_output = {'stream': None, 'path': None}
+_output_lock = threading.Lock()
+# names of open spans of each thread, innermost last
+_local = threading.local()
+
+
+def set_output(output):
+    """
+    Write finished spans as JSON lines, one span per line, e.g.
+    {"duration": 0.0123, "name": "ctrlp", "parent": "install", "span": "install.extract", "start": 1700000000.5}
+    :param output: location of file to append to, which is rotated by size, or file object, None to stop writing
+    :return: None
+    """
+    with _output_lock:
+        if _output['path'] is not None:
+            _output['stream'].close()
+        if output is None or hasattr(output, 'write'):
+            _output.update(stream=output, path=None)
+        else:
+            _output.update(stream=io.open(output, 'a', encoding='utf-8'), path=output)
+
+
+def _get_stack():
+    try:
+        return _local.stack
+    except AttributeError:
+        _local.stack = []
+        return _local.stack
+
+
+@contextlib.contextmanager
+def span(span_name, **fields):
+    """
+    Time the code in 'with' block as a span, spans opened inside it are its children.
+    Span is written even if the block raise, with 'error' field of the exception type.
+    :param span_name: name of span, e.g. 'install.extract'
+    :param fields: extra fields of span, e.g. name of package, more can be added to the yielded Dict
+    :return: Dict of fields
+    """
+    stack = _get_stack()
+    parent = stack[-1] if stack else None
+    stack.append(span_name)
+    start_time = time.time()
+    start = timer()
+    try:
+        yield fields
+    except BaseException as e:
+        fields['error'] = type(e).__name__
+        raise
+    finally:
+        duration = timer() - start
+        stack.pop()
+        _write_span(dict(fields, span=span_name, parent=parent, start=round(start_time, 6),
+                         duration=round(duration, 6)))
+
+
+def _write_span(record):
+    with _output_lock:
+        stream = _output['stream']
+        if stream is None:
+            return
+        try:
+            stream.write(u'' + dumps(record, 'json') + u'\n')
+            stream.flush()
+            if _output['path'] is not None and stream.tell() >= MAX_OUTPUT_SIZE:
+                _rotate()
+        except (IOError, OSError, ValueError) as e:
+            # timing must never break the operation it measures
+            logger.info("can not write span <%s>: %s", record['span'], e)
+
+
+def _rotate():
+    """
+    Move span file to '<file>.1', replacing the older one, and start a new file, called with _output_lock held
+    """
+    path = _output['path']
+    _output['stream'].close()
+    try:
+        getattr(os, 'replace', os.rename)(path, path + '.1')
+    finally:
+        _output['stream'] = io.open(path, 'a', encoding='utf-8')
+
+
+@contextlib.contextmanager
+def profile(profile_file):
+    """
+    Run the code in 'with' block under cProfile, and dump stats to profile_file, which can be read by pstats
+    :param profile_file: location of stats file, None means not profile
+    :return: None
+    """
+    if not profile_file:
+        yield
+        return
+
+    import cProfile
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(profile_file)
+        logger.info("profile of operation is dumped to <%s>", profile_file)
+
+
+def pop_profile_option(argv):
+    """
+    Take '--profile FILE' or '--profile=FILE' out of command line arguments
+    :param argv: List of command line arguments
+    :return: tuple of (location of stats file or None, List of other arguments)
+    """
+    profile_file = None
+    argument_list = []
+    argument_iter = iter(argv)
+    for argument in argument_iter:
+        if argument == '--profile':
+            profile_file = next(argument_iter, None)
+        elif argument.startswith('--profile='):
+            profile_file = argument[len('--profile='):]
+        else:
+            argument_list.append(argument)
+    return profile_file, argument_list
@@ -0,0 +1,238 @@
+#!/usr/bin/env python
+
+import os
+import shutil
+import logging
+
+from .data_format import dumps, loads
+from . import Record
+from . import PackageDatabase
+
+logger = logging.getLogger(__name__)
+
+STAGING_RELATIVE_DIR = 'vimapt/staging'
+JOURNAL_RELATIVE_PATH = 'vimapt/journal'
+
+STATE_STAGING = 'staging'
+STATE_COMMITTING = 'committing'
+STATE_ROLLBACK = 'rollback'
+
+
+def recover(vim_dir):
+    """
+    Finish or roll back the transaction interrupted last time, if there is one.
+    Transaction interrupted before commit is thrown away, the one interrupted while committing is finished,
+    the one interrupted while rolling back is rolled back.
+    :param vim_dir: user's vim dir
+    :return: name of package recovered, None if nothing to do
+    """
+    journal_path = os.path.join(vim_dir, JOURNAL_RELATIVE_PATH)
+    if not os.path.isfile(journal_path):
+        return None
+
+    with open(journal_path) as fd:
+        journal = loads(fd.read(), 'json')
+
+    transaction = Transaction(vim_dir, journal['package'])
+    transaction.path_list = journal.get('staged') or []
+    if journal['state'] == STATE_COMMITTING:
+        logger.info("finish interrupted install of <%s>", journal['package'])
+        transaction._apply()
+        transaction._write_record(journal['control'], journal['files'])
+        transaction._cleanup()
+    elif journal['state'] == STATE_ROLLBACK:
+        logger.info("roll back interrupted install of <%s>", journal['package'])
+        transaction._rollback()
+    else:
+        logger.info("throw away interrupted install of <%s>", journal['package'])
+        transaction._cleanup()
+    return journal['package']
+
+
+class Transaction(object):
+    """
+    Install transaction, package is extracted into a staging directory at first,
+    then moved into vim dir file by file with rename, which is atomic.
+    Files replaced are moved to a backup directory, so that they can be restored on rollback.
+    Every state change is written to 'vimapt/journal' before it takes effect.
+    """
+
+    def __init__(self, vim_dir, package_name):
+        self.vim_dir = vim_dir
+        self.package_name = package_name
+        self.staging_dir = os.path.join(self.vim_dir, STAGING_RELATIVE_DIR, package_name)
+        self.backup_dir = self.staging_dir + '.backup'
+        self.journal_path = os.path.join(self.vim_dir, JOURNAL_RELATIVE_PATH)
+        self.path_list = []  # relative paths of staged files
+
+    def begin(self):
+        """
+        Start transaction
+        :return: staging directory that package should be extracted to
+        """
+        self._remove_dir(self.staging_dir)
+        self._remove_dir(self.backup_dir)
+        os.makedirs(self.staging_dir)
+        self._write_journal({'state': STATE_STAGING, 'package': self.package_name})
+        return self.staging_dir
+
+    def commit(self, control_data, file_list):
+        """
+        Move staged files into vim dir, then write install record
+        :param control_data: Dict of control data
+        :param file_list: List of file name and length pair, as package's file list
+        :return: None
+        """
+        try:
+            self.path_list = self._scan_staging_dir()
+
+            # fsync all the staged files at once after extraction, rather than one by one while writing
+            for path in self.path_list:
+                self._fsync_file(os.path.join(self.staging_dir, path))
+
+            self._write_journal({'state': STATE_COMMITTING, 'package': self.package_name, 'staged': self.path_list,
+                                 'control': self._get_record_control(control_data), 'files': file_list})
+        except BaseException:
+            # vim dir is not touched yet
+            self.abort()
+            raise
+
+        try:
+            self._apply()
+        except Exception:
+            logger.info("commit install of <%s> failed, roll back", self.package_name)
+            self._write_journal({'state': STATE_ROLLBACK, 'package': self.package_name, 'staged': self.path_list})
+            self._rollback()
+            raise
+
+        self._write_record(control_data, file_list)
+        self._cleanup()
+
+    def abort(self):
+        """
+        Throw away staged files, nothing in vim dir is touched before commit
+        :return: None
+        """
+        self._cleanup()
+
+    def _apply(self):
+        """
+        Move staged files to vim dir, safe to run again after interrupted
+        :return: None
+        """
+        dir_set = set()
+        for path in self.path_list:
+            staged_path = os.path.join(self.staging_dir, path)
+            if not os.path.exists(staged_path):
+                # moved already
+                continue
+            target_path = os.path.join(self.vim_dir, path)
+            target_dir = os.path.dirname(target_path)
+            if target_dir not in dir_set:
+                if not os.path.isdir(target_dir):
+                    os.makedirs(target_dir)
+                dir_set.add(target_dir)
+
+            if os.path.lexists(target_path):
+                backup_path = os.path.join(self.backup_dir, path)
+                if os.path.lexists(backup_path):
+                    os.unlink(target_path)
+                else:
+                    self._make_parent_dir(backup_path)
+                    os.rename(target_path, backup_path)
+            os.rename(staged_path, target_path)
+
+        for target_dir in dir_set:
+            self._fsync_dir(target_dir)
+
+    def _rollback(self):
+        """
+        Move files back to staging directory and restore replaced ones, safe to run again after interrupted
+        :return: None
+        """
+        for path in reversed(self.path_list):
+            staged_path = os.path.join(self.staging_dir, path)
+            target_path = os.path.join(self.vim_dir, path)
+            backup_path = os.path.join(self.backup_dir, path)
+            if not os.path.exists(staged_path) and os.path.lexists(target_path):
+                self._make_parent_dir(staged_path)
+                os.rename(target_path, staged_path)
+            if os.path.lexists(backup_path):
+                os.rename(backup_path, target_path)
+        self._cleanup()
+
+    @staticmethod
+    def _get_record_control(control_data):
+        """
+        Fields of control data the package database records, control file is hand-written YAML,
+        other fields may be anything YAML can load, e.g. date, which can not be written to journal in JSON
+        :param control_data: Dict of control data
+        :return: Dict of 'version', 'depends' and 'conflicts'
+        """
+        version = control_data.get('version')
+        return {'version': None if version is None else str(version),
+                'depends': control_data.get('depends'),
+                'conflicts': control_data.get('conflicts')}
+
+    def _write_record(self, control_data, file_list):
+        Record.Record(self.vim_dir).install(self.package_name, file_list)
+        database = PackageDatabase.PackageDatabase(self.vim_dir)
+        try:
+            database.install(self.package_name, control_data, [file_name for file_name, _ in file_list])
+        finally:
+            database.close()
+
+    def _cleanup(self):
+        self._remove_dir(self.staging_dir)
+        self._remove_dir(self.backup_dir)
+        for path in [self.journal_path, self.journal_path + '.part']:
+            if os.path.isfile(path):
+                os.unlink(path)
+
+    def _scan_staging_dir(self):
+        path_list = []
+        for root, _, file_list in os.walk(self.staging_dir):
+            for file_name in file_list:
+                path = os.path.relpath(os.path.join(root, file_name), self.staging_dir)
+                path_list.append(path.replace(os.sep, '/'))
+        return sorted(path_list)
+
+    def _write_journal(self, journal):
+        tmp_path = self.journal_path + '.part'
+        with open(tmp_path, 'w') as fd:
+            fd.write(dumps(journal, 'json'))
+            fd.flush()
+            os.fsync(fd.fileno())
+        # os.replace is atomic on every platform, python2 only has os.rename
+        getattr(os, 'replace', os.rename)(tmp_path, self.journal_path)
+        self._fsync_dir(os.path.dirname(self.journal_path))
+
+    @staticmethod
+    def _fsync_file(file_path):
+        with open(file_path, 'rb') as fd:
+            os.fsync(fd.fileno())
+
+    @staticmethod
+    def _fsync_dir(dir_path):
+        try:
+            fd = os.open(dir_path, os.O_RDONLY)
+        except OSError:
+            # directory can not be opened on windows
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+    @staticmethod
+    def _make_parent_dir(file_path):
+        parent_dir = os.path.dirname(file_path)
+        if not os.path.isdir(parent_dir):
+            os.makedirs(parent_dir)
+
+    @staticmethod
+    def _remove_dir(dir_path):
+        if os.path.isdir(dir_path):
+            shutil.rmtree(dir_path)
@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+
+import os
+import struct
+import hashlib
+import zlib
+
+from .data_format import dumps
+
+# VAP (VimApt's Package) layout:
+#   MAGIC
+#   member data, each member compressed on its own by codec
+#   index: YAML dict {'format': 'vap', 'codec': codec,
+#                     'files': [[file name, offset, size, compressed size, sha256], ...]}
+#   footer: FOOTER_STRUCT of (index offset, index length, MAGIC)
+MAGIC = b'VAP1'
+FOOTER_STRUCT = struct.Struct('>QQ4s')
+
+# size of chunk used when stream member's data
+CHUNK_SIZE = 64 * 1024
+
+CODEC_LIST = ['zlib', 'lzma']
+
+
+def get_compressor(codec):
+    if codec == 'zlib':
+        return zlib.compressobj(9)
+    elif codec == 'lzma':
+        import lzma  # python3 only
+        return lzma.LZMACompressor()
+    raise ValueError("No such codec %s" % codec)
+
+
+def get_decompressor(codec):
+    if codec == 'zlib':
+        return zlib.decompressobj()
+    elif codec == 'lzma':
+        import lzma  # python3 only
+        return lzma.LZMADecompressor()
+    raise ValueError("No such codec %s" % codec)
+
+
+class VapCompress(object):
+    def __init__(self, source_dir, output_file, codec='zlib'):
+        self.source_dir = source_dir
+        self.output_file = output_file
+        self.codec = codec
+        self.hook_object = None
+        self.filter_object = None
+
+    def compress(self):
+        """
+        Compress directory to VAP file, files are read in binary mode and streamed chunk by chunk
+        :return: None
+        """
+        ball_data = []
+        with open(self.output_file, 'wb') as output_fd:
+            output_fd.write(MAGIC)
+            for f in self.scan_dir():
+                relative_file_path = os.path.relpath(f, self.source_dir).replace(os.sep, '/')
+                if self.filter_object:
+                    if not self.filter_object(relative_file_path, os.path.getsize(f)):
+                        continue
+
+                offset = output_fd.tell()
+                if self.hook_object:
+                    # hook object need the whole content of this member
+                    with open(f, 'rb') as fd:
+                        file_stream = fd.read()
+                    relative_file_path, file_stream = self.hook_object(relative_file_path, file_stream)
+                    size, digest = self._write_member(output_fd, [file_stream])
+                else:
+                    with open(f, 'rb') as fd:
+                        size, digest = self._write_member(output_fd, iter(lambda: fd.read(CHUNK_SIZE), b''))
+                compressed_size = output_fd.tell() - offset
+                ball_data.append([relative_file_path, offset, size, compressed_size, digest])
+
+            index_offset = output_fd.tell()
+            index_stream = dumps({'format': 'vap', 'codec': self.codec, 'files': ball_data}).encode('utf-8')
+            output_fd.write(index_stream)
+            output_fd.write(FOOTER_STRUCT.pack(index_offset, len(index_stream), MAGIC))
+
+    def _write_member(self, output_fd, chunks):
+        """
+        Compress chunks of a member to output file
+        :return: tuple of uncompressed size and sha256 hex digest
+        """
+        compressor = get_compressor(self.codec)
+        checksum = hashlib.sha256()
+        size = 0
+        for chunk in chunks:
+            size += len(chunk)
+            checksum.update(chunk)
+            output_fd.write(compressor.compress(chunk))
+        output_fd.write(compressor.flush())
+        return size, checksum.hexdigest()
+
+    def scan_dir(self):
+        """
+        Fetch absolute path of file list of directory
+        :return: List of file absolute location
+        """
+        file_path_list = []
+        yid = os.walk(self.source_dir)
+        for root_dir, path_list, file_list in yid:
+            for f in file_list:
+                abspath = os.path.join(root_dir, f)
+                file_path_list.append(abspath)
+        return file_path_list
+
+    def hook(self, hook_object):
+        self.hook_object = hook_object
+
+    def filter(self, filter_object):
+        self.filter_object = filter_object
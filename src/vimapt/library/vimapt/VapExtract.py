@@ -0,0 +1,198 @@
+#!/usr/bin/env python
+
+import os
+import hashlib
+import logging
+
+from .data_format import loads
+from .VapCompress import MAGIC, FOOTER_STRUCT, CHUNK_SIZE, get_decompressor
+from .MemberWriter import MemberWriter
+from vimapt.exception import VimaptAbortOperationException
+
+logger = logging.getLogger(__name__)
+
+
+def is_vap(input_file):
+    """
+    Check if file is a VAP package by its magic number
+    :param input_file: location of package file
+    :return: Boolean
+    """
+    with open(input_file, 'rb') as fd:
+        return fd.read(len(MAGIC)) == MAGIC
+
+
+class VapExtract(object):
+    def __init__(self, input_file, output_dir):
+        self.input_file = input_file
+        self.output_dir = output_dir
+        self.hook_object = None
+        self.filter_object = None
+        self.select_object = None
+        self.store = None  # ObjectStore object, files are hardlinked to it when bound
+
+        self.format_version = 'vap'
+        self.codec, self.member_list = self._read_index()
+
+    def _read_index(self):
+        """
+        Read index from the tail of package
+        :return: tuple of codec and list of members
+        """
+        with open(self.input_file, 'rb') as fd:
+            fd.seek(-FOOTER_STRUCT.size, os.SEEK_END)
+            index_offset, index_length, magic = FOOTER_STRUCT.unpack(fd.read(FOOTER_STRUCT.size))
+            if magic != MAGIC:
+                raise VimaptAbortOperationException("package <%s> is not a valid VAP file" % self.input_file)
+            fd.seek(index_offset)
+            index_data = loads(fd.read(index_length).decode('utf-8'))
+        return index_data['codec'], [tuple(i) for i in index_data['files']]
+
+    def extract(self, jobs=1):
+        """
+        extract input_file to output_dir, every member is decompressed chunk by chunk and verified.
+        Members are written by many threads, unless filter or hook object is bound.
+        :param jobs: max number of threads that write members
+        :return: None
+        """
+        writer = MemberWriter(self.output_dir, jobs, self.store)
+        member_list = []
+        for member in self.member_list:
+            if self.select_object and not self.select_object(member[0], member[2]):
+                # this file will be ignored
+                logger.info("package <%s>: <%s> was passed.", self.input_file, member[0])
+                continue
+            member_list.append(member)
+
+        if self.hook_object or self.filter_object:
+            # filter and hook object may not be thread safe
+            writer.jobs = 1
+        writer.write(lambda batch: self._write_members(writer, batch), member_list)
+
+    def _write_members(self, writer, member_list):
+        """
+        Write members by their own file object, so that it can be run by many threads
+        :param writer: MemberWriter object that made directories of members
+        :param member_list: list of members
+        :return: None
+        """
+        with open(self.input_file, 'rb') as fd:
+            for member in member_list:
+                file_name = member[0]
+                if self.hook_object or self.filter_object:
+                    # filter and hook object need the whole content of this member, verified before they see it
+                    file_stream = self._read_member_data(fd, member)
+                    if self.filter_object and not self.filter_object(file_name, file_stream):
+                        # this file will be ignored
+                        logger.info("package <%s>: <%s> was passed.", self.input_file, file_name)
+                        continue
+                    if self.hook_object:
+                        file_name, file_stream = self.hook_object(file_name, file_stream)
+                    digest = hashlib.sha256(file_stream).hexdigest()
+                    ball_abspath_file = writer.get_path(file_name)
+                    with open(ball_abspath_file, 'wb') as output_fd:
+                        output_fd.write(file_stream)
+                elif writer.link(file_name, member[4], member[2]):
+                    # same content is in object store, not even decompressed
+                    logger.debug("package <%s>: <%s> was linked.", self.input_file, file_name)
+                    continue
+                else:
+                    ball_abspath_file = writer.get_path(file_name)
+                    try:
+                        with open(ball_abspath_file, 'wb') as output_fd:
+                            for chunk in self._iter_member_data(fd, member):
+                                output_fd.write(chunk)
+                    except VimaptAbortOperationException:
+                        # content is verified only when it is all written, broken member is not left behind
+                        os.unlink(ball_abspath_file)
+                        raise
+                    digest = member[4]
+                writer.add(file_name, digest)
+
+                logger.debug("package <%s>: <%s> was write.", self.input_file, ball_abspath_file)
+
+    def read(self, file_name):
+        """
+        Read content of single member without extract the package
+        :param file_name: relative path of member, e.g. 'vimapt/control/vimapt.yaml'
+        :return: string, content of member
+        """
+        for member in self.member_list:
+            if member[0] == file_name:
+                with open(self.input_file, 'rb') as fd:
+                    return self._read_member_data(fd, member).decode('utf-8')
+
+        raise KeyError("package <%s> has no member <%s>" % (self.input_file, file_name))
+
+    def _read_member_data(self, input_fd, member):
+        """
+        Read whole content of member, verified by its size and checksum
+        :return: bytes
+        """
+        return b''.join(self._iter_member_data(input_fd, member))
+
+    def _iter_member_data(self, input_fd, member):
+        """
+        Decompress member's data chunk by chunk, verify size and checksum at the end
+        :return: generator of bytes
+        """
+        file_name, offset, size, compressed_size, digest = member
+        input_fd.seek(offset)
+        decompressor = get_decompressor(self.codec)
+        checksum = hashlib.sha256()
+        length = 0
+        remain = compressed_size
+        while remain > 0:
+            compressed_chunk = input_fd.read(min(remain, CHUNK_SIZE))
+            if not compressed_chunk:
+                break
+            remain -= len(compressed_chunk)
+            chunk = decompressor.decompress(compressed_chunk)
+            length += len(chunk)
+            checksum.update(chunk)
+            yield chunk
+
+        if hasattr(decompressor, 'flush'):
+            chunk = decompressor.flush()
+            length += len(chunk)
+            checksum.update(chunk)
+            yield chunk
+
+        if length != size or checksum.hexdigest() != digest:
+            msg = "package <%s>: <%s> is broken, checksum is not matched!"
+            raise VimaptAbortOperationException(msg % (self.input_file, file_name))
+
+    def get_file_list(self):
+        """
+        get file list of a package
+        :return: List of file name and size pair
+        """
+        return [[member[0], member[2]] for member in self.member_list]
+
+    def hook(self, hook_object):
+        """
+        Bind hook object
+        :param hook_object: an executable object take to args (file name and content in bytes)
+                            and return tuple of file name and content in bytes.
+        :return: None
+        """
+        self.hook_object = hook_object
+
+    def filter(self, filter_object):
+        """
+        Bind filter object.
+        :param filter_object: an executable object take to args (file name and content in bytes) and return boolean.
+                              Return False means the file is not extract to system, used to protect overwrite.
+        :return: None
+        """
+        self.filter_object = filter_object
+
+    def select(self, select_object):
+        """
+        Bind select object, which is like filter object but never need the content,
+        so that the members ignored are not even decompressed.
+        :param select_object: an executable object take to args (file name and size) and return boolean.
+                              Return False means the file is not extract to system.
+        :return: None
+        """
+        self.select_object = select_object
@@ -3,7 +3,7 @@
 import os
 import logging
 
-from .data_format import loads
+from . import PackageDatabase
 
 logger = logging.getLogger(__name__)
 
@@ -11,68 +11,70 @@ logger = logging.getLogger(__name__)
 class Vimapt(object):
     def __init__(self, vim_dir):
         self.vim_dir = vim_dir
+        self.database = PackageDatabase.PackageDatabase(vim_dir)
 
     def get_installed_list(self):
         """
-        Get installed packages list by scan 'vimapt/control' directory
+        Get installed packages list from package database
         :return: List of package names
         """
-        record_dir = os.path.join(self.vim_dir, 'vimapt/control')
-        pkg_list = []
-        for f in os.listdir(record_dir):
-            if os.path.isfile(os.path.join(record_dir, f)) and not os.path.basename(f).startswith('.'):
-                root, ext = os.path.splitext(f)
-                pkg_list.append(root)
-        return pkg_list
+        return self.database.get_name_list(PackageDatabase.STATE_INSTALLED)
 
     def get_version_dict(self):
         """
-        Get installed package name-version dict by scan 'vimapt/control' directory
+        Get installed package name-version dict from package database
         :return: Dict of package-version mapping, e.g. {'pkg1': 'version-string', 'pkg2': 'other-version-string'}
         """
-        record_dir = os.path.join(self.vim_dir, 'vimapt/control')
-        version_dict = {}
-        for f in os.listdir(record_dir):
-            f_abspath = os.path.join(record_dir, f)
-
-            # ignore hidden file or directory
-            if os.path.basename(f_abspath).startswith('.'):
-                continue
-
-            if os.path.isfile(f_abspath):
+        return self.database.get_version_dict()
 
-                logger.info("scan control info on <%s>", f_abspath)
-
-                fd = open(f_abspath)
-                file_stream = fd.read()
-                fd.close()
-                control_data = loads(file_stream) or dict()
-                version = control_data.get("version")
-                root, ext = os.path.splitext(f)
-                version_dict[root] = version
+    def get_version(self, package_name):
+        """
+        Get version of one installed package, cost the same no matter how many packages are installed
+        :param package_name: name of package
+        :return: String of version
+        :raise KeyError: package is not installed
+        """
+        return self.database.get_version(package_name)
 
-                logger.info("get result <%s>", (root, version))
+    def is_installed(self, package_name):
+        return self.database.is_installed(package_name)
 
-        return version_dict
+    def get_owner(self, path):
+        """
+        Get package which owns the file
+        :param path: path relative to vim dir, or absolute path under vim dir
+        :return: String of package name, None if no package owns it
+        """
+        if os.path.isabs(path):
+            path = os.path.relpath(path, self.vim_dir)
+        path = os.path.normpath(path).replace(os.sep, '/')
+        return self.database.get_owner(path)
 
     # TODO: function name need do something
     def get_presist_list(self):
         """
-        Get package name list by scan 'vimapt/install' directory
+        Get name list of packages which have install record, they can be removed
         :return: List of package names
         """
-        record_dir = os.path.join(self.vim_dir, 'vimapt/install')
-        pkg_list = []
-
-        for f in os.listdir(record_dir):
-            if os.path.isfile(os.path.join(record_dir, f)) and not os.path.basename(f).startswith('.'):
-                pkg_list.append(f)
+        return self.database.get_name_list(PackageDatabase.STATE_INSTALLED)
 
-        return pkg_list
+    def get_purge_list(self):
+        """
+        Get name list of packages which are installed or removed but not purged
+        :return: List of package names
+        """
+        return self.database.get_name_list()
 
     def get_package_list(self):
         pass
 
+    def close(self):
+        """
+        Close the package database, it is opened again by the next query
+        :return: None
+        """
+        self.database.close()
+
     def scan_package_name(self):
         """
         Get package name by scan 'vimapt/control', used to discover the package's name only
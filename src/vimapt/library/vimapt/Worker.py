@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+
+import sys
+import logging
+
+from vimapt import setup_logging
+from vimapt.exception import VimaptAbortOperationException
+from .data_format import dumps
+from . import LocalRepo
+from . import Timing
+
+logger = logging.getLogger(__name__)
+
+COMMAND_LIST = ['install', 'update']
+
+
+class Worker(object):
+    """
+    Background worker run by Vim's job API, report progress and result as JSON lines,
+    e.g. {"message": "installing ctrlp 1.79-1", "type": "progress"}.
+    Last line is always the result: {"message": "Install Succeed!", "ok": true, "type": "result"}.
+    Nothing here need Vim, so it can be run headless too.
+    """
+
+    def __init__(self, vim_dir, output=None):
+        self.vim_dir = vim_dir
+        self.output = output or sys.stdout
+
+    def _report(self, message_type, message, **kwargs):
+        kwargs.update({'type': message_type, 'message': message})
+        self.output.write(dumps(kwargs, 'json') + '\n')
+        # Vim read the lines as they come
+        self.output.flush()
+
+    def report_progress(self, message):
+        self._report('progress', message)
+
+    def run(self, command_name, argument_list=()):
+        """
+        Run command and report result
+        :param command_name: one of COMMAND_LIST
+        :param argument_list: list of command arguments
+        :return: exit status, 0 means succeed
+        """
+        try:
+            if command_name == 'install':
+                message = self.install(argument_list)
+            elif command_name == 'update':
+                message = self.update()
+            else:
+                raise VimaptAbortOperationException("unknown command: %s" % command_name)
+        except VimaptAbortOperationException as e:
+            self._report('result', str(e), ok=False)
+            return 1
+        except Exception as e:
+            logger.exception("command <%s> failed", command_name)
+            self._report('result', "%s: %s" % (type(e).__name__, e), ok=False)
+            return 1
+
+        self._report('result', message, ok=True)
+        return 0
+
+    def install(self, package_name_list):
+        if not package_name_list:
+            raise VimaptAbortOperationException("no package to install")
+        from . import Install
+
+        install = Install.Install(self.vim_dir)
+        install.progress_handler = self.report_progress
+        install.repo_install_list(package_name_list)
+        return "Install Succeed!"
+
+    def update(self):
+        self.report_progress("updating index")
+        if LocalRepo.LocalRepo(self.vim_dir).update():
+            return "Update Succeed!"
+        return "Update Succeed! Index is not modified."
+
+
+def main(argv=None):
+    profile_file, argv = Timing.pop_profile_option(sys.argv[1:] if argv is None else argv)
+    if len(argv) < 2:
+        sys.stderr.write("usage: worker.py [--profile FILE] <vim dir> <%s> [args...]\n" % "|".join(COMMAND_LIST))
+        return 2
+    setup_logging(argv[0])
+    with Timing.profile(profile_file):
+        return Worker(argv[0]).run(argv[1], argv[2:])
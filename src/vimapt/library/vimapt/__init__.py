@@ -1,9 +1,28 @@
 import logging
 import os
 
-home_dir = os.path.expanduser('~')
+logger = logging.getLogger(__name__)
 
-log_file = os.path.join(home_dir, '.vim/vimapt/log/vimapt.log')
 
-logging.basicConfig(filename=log_file, level=logging.INFO)
-logger = logging.getLogger(__name__)
+def setup_logging(vim_dir=None):
+    """
+    Log to 'vimapt/log/vimapt.log' of vim dir, and write timing spans to 'vimapt/log/timing.jsonl'.
+    Called by entry points, importing vimapt never touches the disk.
+    :param vim_dir: user's vim dir, None means '~/.vim'
+    :return: Boolean, False means logging was configured already or log file can not be made
+    """
+    from . import Timing
+
+    if vim_dir is None:
+        vim_dir = os.path.join(os.path.expanduser('~'), '.vim')
+    log_dir = os.path.join(vim_dir, 'vimapt/log')
+    try:
+        if not os.path.isdir(log_dir):
+            os.makedirs(log_dir)
+        Timing.set_output(os.path.join(log_dir, 'timing.jsonl'))
+        if logging.getLogger().handlers:
+            return False
+        logging.basicConfig(filename=os.path.join(log_dir, 'vimapt.log'), level=logging.INFO)
+    except (IOError, OSError):
+        return False
+    return True
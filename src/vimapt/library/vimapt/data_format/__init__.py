@@ -1,3 +1,76 @@
 from __future__ import absolute_import
 
-from .yaml import *
+from . import json as _json
+from . import yaml as _yaml
+
+# name -> (loads, dumps)
+_codec_registry = {}
+
+
+def register_codec(name, loads_function, dumps_function):
+    """
+    Register a codec of data format
+    :param name: name of codec, e.g. 'yaml'
+    :param loads_function: executable object that take a string and return data
+    :param dumps_function: executable object that take data and return a string
+    :return: None
+    """
+    _codec_registry[name] = (loads_function, dumps_function)
+
+
+def get_codec(name):
+    """
+    Get codec by name
+    :param name: name of codec
+    :return: tuple of loads and dumps function
+    """
+    try:
+        return _codec_registry[name]
+    except KeyError:
+        raise ValueError("No such data format %s" % name)
+
+
+def detect_format(stream):
+    """
+    Detect data format of string, JSON document always start with '{' or '['
+    :param stream: string
+    :return: name of codec
+    """
+    head = stream.lstrip()[:1]
+    if head in ('{', '['):
+        return 'json'
+    return 'yaml'
+
+
+def loads(stream, data_format=None):
+    """
+    Load data from string
+    :param stream: string
+    :param data_format: name of codec, None means detect it from content
+    :return: data
+    """
+    if data_format is None:
+        data_format = detect_format(stream)
+        if data_format == 'json':
+            try:
+                return get_codec('json')[0](stream)
+            except ValueError:
+                # YAML flow style collection looks like JSON too
+                data_format = 'yaml'
+    return get_codec(data_format)[0](stream)
+
+
+def dumps(data, data_format='yaml'):
+    """
+    Dump data to string
+    :param data: data
+    :param data_format: name of codec, YAML for human written files, JSON for machine written files
+    :return: string
+    """
+    return get_codec(data_format)[1](data)
+
+
+register_codec('yaml', _yaml.loads, _yaml.dumps)
+register_codec('json', _json.loads, _json.dumps)
+
+__all__ = ['dumps', 'loads', 'register_codec', 'get_codec', 'detect_format']
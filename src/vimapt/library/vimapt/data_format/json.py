@@ -1,8 +1,13 @@
 from __future__ import absolute_import
 
+import functools
+
 from json import dump
-from json import dumps
+from json import dumps as _dumps
 from json import load
 from json import loads
 
+# compact and stable output, for machine written files
+dumps = functools.partial(_dumps, sort_keys=True, separators=(',', ':'))
+
 __all__ = ['dump', 'dumps', 'load', 'loads']
@@ -1,10 +1,31 @@
 from __future__ import absolute_import
 
-import functools
+# PyYAML is imported on first use, most files written by vimapt are JSON and never need it
+_codec = []
 
-from yaml import dump, Dumper, load, Loader
 
-dumps = functools.partial(dump, Dumper=Dumper)
-loads = functools.partial(load, Loader=Loader)
+def _get_codec():
+    if not _codec:
+        import functools
+
+        from yaml import dump, load
+
+        try:
+            # libyaml based C implementation, much faster than the pure python one
+            from yaml import CDumper as Dumper, CLoader as Loader
+        except ImportError:
+            from yaml import Dumper, Loader
+
+        _codec.extend([functools.partial(load, Loader=Loader), functools.partial(dump, Dumper=Dumper)])
+    return _codec
+
+
+def loads(stream):
+    return _get_codec()[0](stream)
+
+
+def dumps(data):
+    return _get_codec()[1](data)
+
 
 __all__ = ['dumps', 'loads']
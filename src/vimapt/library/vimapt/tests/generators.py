@@ -0,0 +1,139 @@
+"""
+Generators of synthetic packages, repositories and vim dirs, for tests and benchmarks.
+Output only depends on the arguments, so that benchmark results of different revisions can be compared.
+"""
+
+import io
+import os
+import random
+
+from vimapt.Compress import Compress
+from vimapt.VapCompress import VapCompress
+from vimapt.RemoteRepo import RemoteRepo
+from vimapt.data_format import dumps
+
+
+def make_vim_dir(work_dir, with_cache=True):
+    """
+    Make an empty vim dir that vimapt can install into
+    :param work_dir: parent directory
+    :param with_cache: whether make the download cache directories
+    :return: path of vim dir
+    """
+    vim_dir = os.path.join(work_dir, "vim")
+    sub_dir_list = ["control", "copyright", "install", "remove"]
+    if with_cache:
+        sub_dir_list += ["cache/index", "cache/pool"]
+    for sub_dir in sub_dir_list:
+        os.makedirs(os.path.join(vim_dir, "vimapt", sub_dir))
+    return vim_dir
+
+
+def make_file_content(file_size, rng):
+    """
+    Vim script like text of about file_size bytes
+    """
+    line_list = []
+    size = 0
+    while size < file_size:
+        line = "let g:option_%d = '%s'\n" % (rng.randint(0, 10 ** 6), "x" * rng.randint(0, 60))
+        line_list.append(line)
+        size += len(line)
+    return "".join(line_list)[:file_size]
+
+
+def make_package_dir(source_dir, name, version="1.0.0", file_number=10, file_size=1024, depth=2,
+                     depends=(), conflicts=(), seed=0):
+    """
+    Make source directory of package
+    :param source_dir: directory to make
+    :param name: name of package
+    :param version: version of package
+    :param file_number: number of plugin files, control, copyright and vimrc files are not counted
+    :param file_size: size of each plugin file in bytes
+    :param depth: directory depth of plugin files under 'plugin/<name>'
+    :param depends: list of requirement strings
+    :param conflicts: list of requirement strings
+    :param seed: seed of file content
+    :return: List of relative paths of files made
+    """
+    rng = random.Random("%s-%s-%s" % (name, version, seed))
+    file_dict = {
+        "vimapt/control/%s.yaml" % name: dumps({"name": name, "version": version,
+                                               "depends": list(depends), "conflicts": list(conflicts)}),
+        "vimapt/copyright/%s.yaml" % name: "license: MIT\n",
+        "vimrc/%s.vimrc" % name: "let g:%s_enabled = 1\n" % name,
+    }
+    for i in range(file_number):
+        dir_list = ["d%d" % ((i >> level) % 4) for level in range(depth)]
+        path = "/".join(["plugin", name] + dir_list + ["file%d.vim" % i])
+        file_dict[path] = make_file_content(file_size, rng)
+
+    for path, content in file_dict.items():
+        file_path = os.path.join(source_dir, path)
+        if not os.path.isdir(os.path.dirname(file_path)):
+            os.makedirs(os.path.dirname(file_path))
+        with io.open(file_path, "w", encoding="utf-8") as fd:
+            fd.write(u"" + content)
+    return sorted(file_dict)
+
+
+def make_package(work_dir, name, version="1.0.0", package_format="vpb", **kwargs):
+    """
+    Make package file, arguments of package content are the same as make_package_dir()
+    :param work_dir: directory to put source directory and package file in
+    :param package_format: 'vpb' or 'vap'
+    :return: path of package file
+    """
+    source_dir = os.path.join(work_dir, "source", "%s_%s" % (name, version))
+    make_package_dir(source_dir, name, version, **kwargs)
+    package_file = os.path.join(work_dir, "%s_%s.%s" % (name, version, package_format))
+    if package_format == "vap":
+        VapCompress(source_dir, package_file).compress()
+    else:
+        Compress(source_dir, package_file).compress()
+    return package_file
+
+
+def make_dependency_graph(package_number, fan_out, seed=0):
+    """
+    Package i depends on up to fan_out packages with bigger number, so the graph has no cycle
+    :return: List of depend name lists, indexed by package number
+    """
+    rng = random.Random(seed)
+    graph = []
+    for i in range(package_number):
+        candidates = list(range(i + 1, min(package_number, i + 1 + fan_out * 4)))
+        graph.append(["package%d" % d for d in sorted(rng.sample(candidates, min(fan_out, len(candidates))))])
+    return graph
+
+
+def make_repo(work_dir, package_number=10, fan_out=2, version_number=1, package_format="vpb", seed=0,
+              make_index=True, **kwargs):
+    """
+    Make repository of packages named 'package<i>', arguments of package content are the same as make_package_dir()
+    :param work_dir: directory to make repository in
+    :param package_number: number of packages
+    :param fan_out: number of dependencies of each package
+    :param version_number: number of versions of each package
+    :param package_format: 'vpb' or 'vap'
+    :param seed: seed of dependency graph
+    :param make_index: whether make index of repository
+    :return: path of repository
+    """
+    repo_dir = os.path.join(work_dir, "remote")
+    pool_dir = os.path.join(repo_dir, "pool")
+    os.makedirs(pool_dir)
+    os.makedirs(os.path.join(repo_dir, "index"))
+    build_dir = os.path.join(work_dir, "build")
+
+    graph = make_dependency_graph(package_number, fan_out, seed)
+    for i in range(package_number):
+        for v in range(version_number):
+            package_file = make_package(build_dir, "package%d" % i, "1.%d.0" % v, package_format,
+                                        depends=["%s>=1.0.0" % d for d in graph[i]], seed=seed, **kwargs)
+            os.rename(package_file, os.path.join(pool_dir, os.path.basename(package_file)))
+
+    if make_index:
+        RemoteRepo(repo_dir).make_package_index()
+    return repo_dir
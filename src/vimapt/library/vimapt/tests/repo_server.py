@@ -0,0 +1,88 @@
+"""
+Local HTTP stand-in of package repository, used by tests
+"""
+import os
+import time
+import hashlib
+import threading
+
+from six.moves import BaseHTTPServer
+from six.moves import socketserver
+import six.moves.urllib.parse as urllib_parse
+
+
+class RepoRequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive
+
+    def setup(self):
+        BaseHTTPServer.BaseHTTPRequestHandler.setup(self)
+        self.server.connection_count += 1
+
+    def do_GET(self):
+        server = self.server
+        path = self.path
+        if path.startswith('http://'):
+            # request sent to proxy carries the whole URL, server acts as proxy of any host
+            server.proxy_log.append(path)
+            path = urllib_parse.urlsplit(path).path
+        server.request_log.append((path, self.headers.get('If-None-Match')))
+        if server.delay:
+            time.sleep(server.delay)  # simulate network latency
+
+        if path in server.redirect_dict:
+            self.send_response(302)
+            self.send_header('Location', server.redirect_dict[path])
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        file_path = os.path.join(server.repo_dir, path.lstrip('/'))
+        if not os.path.isfile(file_path):
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        with open(file_path, 'rb') as fd:
+            body = fd.read()
+        etag = '"%s"' % hashlib.sha1(body).hexdigest()
+
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class RepoServer(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+    def __init__(self, repo_dir, delay=0):
+        BaseHTTPServer.HTTPServer.__init__(self, ('127.0.0.1', 0), RepoRequestHandler)
+        self.repo_dir = repo_dir
+        self.delay = delay
+        self.request_log = []
+        self.redirect_dict = {}  # path-location mapping of redirected requests
+        self.proxy_log = []  # URLs requested through this server as proxy
+        self.connection_count = 0
+        self.url = 'http://127.0.0.1:%d' % self.server_address[1]
+
+    def __enter__(self):
+        thread = threading.Thread(target=self.serve_forever)
+        thread.daemon = True
+        thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+        self.server_close()
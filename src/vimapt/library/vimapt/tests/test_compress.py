@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from vimapt import Compress as compress_module
+from vimapt.Compress import Compress
+from vimapt.Extract import Extract
+from vimapt.tests import generators
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+package_file = os.path.join(current_dir, "vimapt_1.0-1.vpb")
+
+
+class TestCompress(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp()
+        self.source_dir = os.path.join(self.work_dir, "source")
+        self.output_dir = os.path.join(self.work_dir, "output")
+        Extract(package_file, self.source_dir).extract()
+
+        os.makedirs(os.path.join(self.source_dir, "plugin"))
+        with io.open(os.path.join(self.source_dir, "plugin/unicode.vim"), "w", encoding="utf-8") as fd:
+            fd.write(u"\" héllo\nno tailing new line")
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir)
+
+    def test_compress_v2(self):
+        package_path = os.path.join(self.work_dir, "vimapt_1.0-1.vpb")
+        Compress(self.source_dir, package_path).compress()
+
+        extract = Extract(package_path, self.output_dir)
+        self.assertEqual(extract.format_version, 2)
+        self.assertEqual(extract.read("plugin/unicode.vim"), u"\" héllo\nno tailing new line")
+
+        extract.extract()
+        for file_name, _ in extract.get_file_list():
+            with open(os.path.join(self.source_dir, file_name), "rb") as fd:
+                expected_stream = fd.read()
+            with open(os.path.join(self.output_dir, file_name), "rb") as fd:
+                self.assertEqual(fd.read(), expected_stream)
+
+    def test_compress_v1(self):
+        package_path = os.path.join(self.work_dir, "vimapt_1.0-1.vpb")
+        Compress(self.source_dir, package_path, format_version=1).compress()
+
+        extract = Extract(package_path, self.output_dir)
+        self.assertEqual(extract.format_version, 1)
+        self.assertEqual(extract.read("plugin/unicode.vim"), u"\" héllo\nno tailing new line\n")
+
+    def test_compress_spilled_to_disk(self):
+        source_dir = os.path.join(self.work_dir, "big")
+        generators.make_package_dir(source_dir, "big", file_number=50, file_size=2048)
+        old_spool_max_size = compress_module.SPOOL_MAX_SIZE
+        compress_module.SPOOL_MAX_SIZE = 4096
+        try:
+            for format_version in [1, 2]:
+                package_path = os.path.join(self.work_dir, "big_1.0.0-v%d.vpb" % format_version)
+                Compress(source_dir, package_path, format_version=format_version).compress()
+
+                output_dir = os.path.join(self.work_dir, "output-v%d" % format_version)
+                extract = Extract(package_path, output_dir)
+                extract.extract()
+                self.assertEqual(len(extract.get_file_list()), 53)
+                for file_name, _ in extract.get_file_list():
+                    with open(os.path.join(source_dir, file_name), "rb") as fd:
+                        expected_stream = fd.read()
+                    if format_version == 1 and not expected_stream.endswith(b"\n"):
+                        # VPB v1 is line based, last line always has a new line
+                        expected_stream += b"\n"
+                    with open(os.path.join(output_dir, file_name), "rb") as fd:
+                        self.assertEqual(fd.read(), expected_stream)
+        finally:
+            compress_module.SPOOL_MAX_SIZE = old_spool_max_size
@@ -0,0 +1,28 @@
+import unittest
+
+from vimapt import data_format
+from vimapt.data_format import detect_format, dumps, get_codec, loads, register_codec
+
+
+class TestDataFormat(unittest.TestCase):
+    def test_detect_format(self):
+        data = {"ctrlp": {"path": "pool/ctrlp_1.79-1.vpb", "version": "1.79-1"}}
+
+        self.assertEqual(detect_format(dumps(data, "json")), "json")
+        self.assertEqual(detect_format(dumps(data)), "yaml")
+        self.assertEqual(loads(dumps(data, "json")), data)
+        self.assertEqual(loads(dumps(data)), data)
+
+    def test_yaml_flow_style(self):
+        self.assertEqual(loads("{path: pool/ctrlp_1.79-1.vpb}"), {"path": "pool/ctrlp_1.79-1.vpb"})
+        self.assertEqual(loads("[[vimrc/vimapt.vimrc, 0]]"), [["vimrc/vimapt.vimrc", 0]])
+
+    def test_register_codec(self):
+        register_codec("repr", eval, repr)
+        try:
+            self.assertEqual(dumps([1, 2], "repr"), "[1, 2]")
+            self.assertEqual(loads("[1, 2]", "repr"), [1, 2])
+        finally:
+            data_format._codec_registry.pop("repr")
+
+        self.assertRaises(ValueError, get_codec, "repr")
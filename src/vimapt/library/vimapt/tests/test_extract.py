@@ -1,9 +1,86 @@
+import os
+import shutil
+import tempfile
 import unittest
 
 from vimapt.Extract import Extract
 
+current_dir = os.path.dirname(os.path.abspath(__file__))
+package_file = os.path.join(current_dir, "vimapt_1.0-1.vpb")
+expected_dir = os.path.join(current_dir, "output")
+
 
 class TestExtract(unittest.TestCase):
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.output_dir)
+
     def test_main(self):
-        o = Extract("vimapt_1.0-1.vpb", "./output")
+        o = Extract(package_file, self.output_dir)
         o.extract()
+
+        for root, _, file_list in os.walk(expected_dir):
+            for file_name in file_list:
+                relative_path = os.path.relpath(os.path.join(root, file_name), expected_dir)
+                with open(os.path.join(expected_dir, relative_path), "rb") as fd:
+                    expected_stream = fd.read()
+                with open(os.path.join(self.output_dir, relative_path), "rb") as fd:
+                    self.assertEqual(fd.read(), expected_stream)
+
+    def test_output_is_package_data(self):
+        # fixtures are the lines of package itself, trailing newline included, not what extractor wrote
+        with open(package_file, "rb") as fd:
+            _, ball_stream = fd.read().split(b"\n\n", 1)
+        ball_lines = ball_stream.splitlines(True)
+
+        start_point = 0
+        for file_name, file_length in Extract(package_file, self.output_dir).get_file_list():
+            with open(os.path.join(expected_dir, file_name), "rb") as fd:
+                self.assertEqual(fd.read(), b"".join(ball_lines[start_point: start_point + file_length]))
+            start_point += file_length
+
+    def test_extract_stream(self):
+        Extract(package_file, self.output_dir).extract()
+
+        with open(os.path.join(self.output_dir, "vimapt/control/vimapt.yaml")) as fd:
+            control_stream = fd.read()
+        self.assertTrue(control_stream.startswith("depends: "))
+        self.assertTrue(control_stream.endswith("long-description: ''\n"))
+        self.assertEqual(os.path.getsize(os.path.join(self.output_dir, "vimrc/vimapt.vimrc")), 0)
+
+    def test_filter_and_hook(self):
+        def filter_object(file_name, file_stream):
+            return not file_name.startswith("vimrc/") and file_stream.startswith("author: ")
+
+        def hook_object(file_name, file_stream):
+            return file_name, file_stream.upper()
+
+        extract = Extract(package_file, self.output_dir)
+        extract.filter(filter_object)
+        extract.hook(hook_object)
+        extract.extract()
+
+        self.assertFalse(os.path.exists(os.path.join(self.output_dir, "vimrc/vimapt.vimrc")))
+        self.assertFalse(os.path.exists(os.path.join(self.output_dir, "vimapt/control/vimapt.yaml")))
+        with open(os.path.join(self.output_dir, "vimapt/copyright/vimapt.yaml")) as fd:
+            self.assertTrue(fd.read().startswith("AUTHOR: "))
+
+    def test_select(self):
+        extract = Extract(package_file, self.output_dir)
+        extract.select(lambda file_name, length: length > 0)
+        extract.extract()
+
+        self.assertFalse(os.path.exists(os.path.join(self.output_dir, "vimrc/vimapt.vimrc")))
+        self.assertTrue(os.path.isfile(os.path.join(self.output_dir, "vimapt/control/vimapt.yaml")))
+
+    def test_read_member(self):
+        extract = Extract(package_file, self.output_dir)
+
+        self.assertEqual(extract.format_version, 1)
+        control_stream = extract.read("vimapt/control/vimapt.yaml")
+        self.assertTrue(control_stream.startswith("depends: "))
+        self.assertEqual(extract.read("vimrc/vimapt.vimrc"), "")
+        self.assertRaises(KeyError, extract.read, "not/exists")
+        self.assertEqual(os.listdir(self.output_dir), [])
@@ -0,0 +1,53 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from vimapt.Extract import open_package
+from vimapt.Install import Install
+from vimapt.LocalRepo import LocalRepo
+from vimapt.tests import generators
+from vimapt.tests.repo_server import RepoServer
+
+
+class TestGenerators(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir)
+
+    def test_make_package(self):
+        for package_format in ["vpb", "vap"]:
+            package_file = generators.make_package(self.work_dir, "foo", file_number=20, file_size=100, depth=3,
+                                                   package_format=package_format)
+            file_list = open_package(package_file, None).get_file_list()
+
+            plugin_list = [i for i in file_list if i[0].startswith("plugin/")]
+            self.assertEqual(len(plugin_list), 20)
+            self.assertEqual(set(len(name.split("/")) for name, _ in plugin_list), {6})
+            self.assertIn(["vimapt/control/foo.yaml", len(open_package(package_file, None).read(
+                "vimapt/control/foo.yaml").encode("utf-8"))], file_list)
+
+    def test_deterministic(self):
+        first = generators.make_package_dir(os.path.join(self.work_dir, "a"), "foo", file_size=300)
+        generators.make_package_dir(os.path.join(self.work_dir, "b"), "foo", file_size=300)
+        for path in first:
+            with open(os.path.join(self.work_dir, "a", path)) as fd_a:
+                with open(os.path.join(self.work_dir, "b", path)) as fd_b:
+                    self.assertEqual(fd_a.read(), fd_b.read())
+
+    def test_make_repo(self):
+        repo_dir = generators.make_repo(self.work_dir, package_number=6, fan_out=2, version_number=2,
+                                        file_number=1, file_size=64)
+        vim_dir = generators.make_vim_dir(self.work_dir)
+        with RepoServer(repo_dir) as server:
+            with open(os.path.join(vim_dir, "vimapt/source"), "w") as fd:
+                fd.write(server.url)
+            repo = LocalRepo(vim_dir)
+            repo.update()
+            index = repo.get_index()
+            self.assertEqual(len(index), 6)
+            self.assertEqual(len(index["package0"]["versions"]), 2)
+            self.assertEqual(len(index["package0"]["versions"][0]["depends"]), 2)
+            Install(vim_dir).repo_install("package0")
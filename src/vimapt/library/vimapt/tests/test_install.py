@@ -1,12 +1,113 @@
+import os
+import shutil
+import tempfile
 import unittest
 
+from vimapt.Compress import Compress
+from vimapt.Extract import Extract
 from vimapt.Install import Install
+from vimapt.LocalRepo import LocalRepo
+from vimapt.RemoteRepo import RemoteRepo
+from vimapt.Remove import Remove
+from vimapt.exception import VimaptAbortOperationException
+from vimapt.tests.generators import make_vim_dir
+from vimapt.tests.repo_server import RepoServer
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+package_file = os.path.join(current_dir, "vimapt_1.0-1.vpb")
+
+
+def make_package(work_dir, control_stream="version: 1.0.0\n"):
+    source_dir = os.path.join(work_dir, "source")
+    Extract(package_file, source_dir).extract()
+    with open(os.path.join(source_dir, "vimapt/control/vimapt.yaml"), "w") as fd:
+        fd.write(control_stream)
+    package_path = os.path.join(work_dir, "vimapt_1.0.0.vpb")
+    Compress(source_dir, package_path).compress()
+    return package_path
+
+
+def make_remote_repo(work_dir):
+    """
+    Make repository with package 'app' which depends on package 'lib'
+    """
+    repo_dir = os.path.join(work_dir, "remote")
+    os.makedirs(os.path.join(repo_dir, "index"))
+    os.makedirs(os.path.join(repo_dir, "pool"))
+    for name, control_stream in [("app", "version: 1.0.0\ndepends: [lib]\n"),
+                                 ("lib", "version: 1.0.0\n")]:
+        source_dir = os.path.join(work_dir, name)
+        os.makedirs(os.path.join(source_dir, "vimapt/control"))
+        with open(os.path.join(source_dir, "vimapt/control", name + ".yaml"), "w") as fd:
+            fd.write(control_stream)
+        os.makedirs(os.path.join(source_dir, "plugin"))
+        with open(os.path.join(source_dir, "plugin", name + ".vim"), "w") as fd:
+            fd.write("\" " + name + "\n")
+        Compress(source_dir, os.path.join(repo_dir, "pool", name + "_1.0.0.vpb")).compress()
+    RemoteRepo(repo_dir).make_package_index()
+    return repo_dir
 
 
 class TestInstall(unittest.TestCase):
     def test_main(self):
-        install = Install("./vim")
-        install._install_package("./vimapt_1.0-1.vpb")
+        work_dir = tempfile.mkdtemp()
+        try:
+            # fresh vim dir, even 'vimapt' directory is not made yet
+            vim_dir = os.path.join(work_dir, "vim")
+            install = Install(vim_dir)
+            install._install_package(package_file)
+
+            self.assertTrue(os.path.isfile(os.path.join(vim_dir, "vimapt/status.db")))
+            self.assertTrue(os.path.isfile(os.path.join(vim_dir, "vimapt/install/vimapt")))
+
+            Remove(vim_dir).remove_package("vimapt")
+            self.assertTrue(os.path.isfile(os.path.join(vim_dir, "vimapt/remove/vimapt")))
+        finally:
+            shutil.rmtree(work_dir)
+
+    def test_install_package(self):
+        work_dir = tempfile.mkdtemp()
+        try:
+            vim_dir = make_vim_dir(work_dir)
+            install = Install(vim_dir)
+            install._install_package(make_package(work_dir))
+
+            self.assertEqual(install.pkg_name, "vimapt")
+            self.assertEqual(install.control_data, {"version": "1.0.0"})
+            self.assertTrue(os.path.isfile(os.path.join(vim_dir, "vimapt/control/vimapt.yaml")))
+            self.assertTrue(os.path.isfile(os.path.join(vim_dir, "vimapt/install/vimapt")))
+        finally:
+            shutil.rmtree(work_dir)
+
+    def test_repo_install_with_dependency(self):
+        work_dir = tempfile.mkdtemp()
+        try:
+            vim_dir = make_vim_dir(work_dir)
+
+            repo_dir = make_remote_repo(work_dir)
+
+            with RepoServer(repo_dir) as server:
+                with open(os.path.join(vim_dir, "vimapt/source"), "w") as fd:
+                    fd.write(server.url)
+                LocalRepo(vim_dir).update()
+                Install(vim_dir).repo_install("app")
+                # nothing left to install
+                self.assertRaises(VimaptAbortOperationException, Install(vim_dir).repo_install, "app")
+
+            self.assertEqual(sorted(os.listdir(os.path.join(vim_dir, "vimapt/install"))), ["app", "lib"])
+            self.assertTrue(os.path.isfile(os.path.join(vim_dir, "plugin/lib.vim")))
+        finally:
+            shutil.rmtree(work_dir)
+
+    def test_repo_install_nothing(self):
+        work_dir = tempfile.mkdtemp()
+        try:
+            vim_dir = make_vim_dir(work_dir)
+            with self.assertRaises(VimaptAbortOperationException) as context:
+                Install(vim_dir).repo_install_list([])
+            self.assertEqual(str(context.exception), "no package to install")
+        finally:
+            shutil.rmtree(work_dir)
 
     def test_underline_parse_requirement(self):
         def parse_string_valid():
@@ -0,0 +1,111 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from vimapt.Loader import Loader, fnameescape
+from vimapt.PackageDatabase import PackageDatabase
+from vimapt.tests.generators import make_vim_dir
+
+
+class TestLoader(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp()
+        self.vim_dir = make_vim_dir(self.work_dir)
+        os.makedirs(os.path.join(self.vim_dir, "vimrc"))
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir)
+
+    def add_package(self, name, vimrc_content, depends=()):
+        path = "vimrc/%s.vimrc" % name
+        with open(os.path.join(self.vim_dir, path), "w") as fd:
+            fd.write(vimrc_content)
+        database = PackageDatabase(self.vim_dir)
+        database.install(name, {"version": "1.0", "depends": list(depends)}, ["plugin/%s.vim" % name, path])
+        database.close()
+
+    def test_order_and_inline(self):
+        self.add_package("app", "let g:app = g:lib + 1", ["lib>=1.0"])
+        self.add_package("lib", "let g:lib = 1\n")
+        self.add_package("zoo", "let s:private = 1\n")
+        self.add_package("old", "let g:old = 1\n")
+        database = PackageDatabase(self.vim_dir)
+        database.remove("old")
+        database.close()
+
+        with open(Loader(self.vim_dir).generate()) as fd:
+            content = fd.read()
+
+        self.assertLess(content.index("let g:lib = 1\n"), content.index("let g:app = g:lib + 1\n"))
+        self.assertIn("source " + os.path.join(self.vim_dir, "vimrc/zoo.vimrc"), content)
+        self.assertNotIn("s:private", content)
+        self.assertNotIn("g:old", content)
+
+    def test_finish_in_middle_of_line(self):
+        self.add_package("py", 'if !has("python3") | finish | endif\nlet g:py = 1\n')
+        self.add_package("zzz", "let g:zzz = 1\n")
+
+        content = Loader(self.vim_dir).make_loader()
+        self.assertNotIn("| finish |", content)
+        self.assertIn("source " + os.path.join(self.vim_dir, "vimrc/py.vimrc"), content)
+        self.assertIn("let g:zzz = 1\n", content)
+
+    def test_not_utf8_vimrc_is_sourced(self):
+        self.add_package("latin", "")
+        with open(os.path.join(self.vim_dir, "vimrc/latin.vimrc"), "wb") as fd:
+            fd.write(b"let g:latin = '\xe9'\n")
+        self.add_package("zzz", "let g:zzz = 1\n")
+
+        with open(Loader(self.vim_dir).generate()) as fd:
+            content = fd.read()
+        self.assertIn("source " + os.path.join(self.vim_dir, "vimrc/latin.vimrc"), content)
+        self.assertIn("let g:zzz = 1\n", content)
+
+    def test_unowned_vimrc_is_sourced(self):
+        self.add_package("lib", "let g:lib = 1\n")
+        self.add_package("old", "let g:old = 1\n")
+        database = PackageDatabase(self.vim_dir)
+        database.remove("old")
+        database.close()
+        with open(os.path.join(self.vim_dir, "vimrc/my config.vimrc"), "w") as fd:
+            fd.write("let g:mine = 1\n")
+
+        content = Loader(self.vim_dir).make_loader()
+        self.assertIn("source %s/vimrc/my\\ config.vimrc\n" % self.vim_dir.replace(os.sep, "/"), content)
+        self.assertNotIn("g:mine", content)
+        # configure file of removed package is still owned by it
+        self.assertNotIn("old.vimrc", content)
+
+    def test_profile_loader(self):
+        self.add_package("app", "let g:app = g:lib + 1", ["lib>=1.0"])
+        self.add_package("lib", "let g:lib = 1\n")
+        with open(os.path.join(self.vim_dir, "vimrc/mine.vimrc"), "w") as fd:
+            fd.write("let g:mine = 1\n")
+
+        loader = Loader(self.vim_dir)
+        with open(loader.generate_profile_loader()) as fd:
+            content = fd.read()
+
+        chunk_dir = os.path.join(self.vim_dir, "vimapt/profile/chunk")
+        self.assertEqual(sorted(os.listdir(chunk_dir)), ["app.vim", "lib.vim"])
+        self.assertLess(content.index("source " + os.path.join(chunk_dir, "lib.vim")),
+                        content.index("source " + os.path.join(chunk_dir, "app.vim")))
+        self.assertIn("source " + os.path.join(self.vim_dir, "vimrc/mine.vimrc"), content)
+        with open(os.path.join(chunk_dir, "app.vim")) as fd:
+            self.assertIn("let g:app = g:lib + 1\n", fd.read())
+        # usual loader is not touched
+        self.assertFalse(os.path.exists(loader.loader_path))
+
+    def test_fnameescape(self):
+        self.assertEqual(fnameescape("/vim dir/%a#[1].vimrc"), "/vim\\ dir/\\%a\\#\\[1].vimrc")
+        self.assertEqual(fnameescape("-x.vimrc"), "\\-x.vimrc")
+
+    def test_get_package_order(self):
+        self.add_package("a", "", ["b"])
+        self.add_package("b", "", ["c", "missing"])
+        self.add_package("c", "")
+        self.add_package("d", "")
+        database = PackageDatabase(self.vim_dir)
+        self.assertEqual(Loader(self.vim_dir).get_package_order(database), ["c", "b", "a", "d"])
+        database.close()
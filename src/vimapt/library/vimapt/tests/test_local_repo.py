@@ -0,0 +1,244 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from six import StringIO
+import six.moves.urllib.request as urllib_request
+
+from vimapt.LocalRepo import LocalRepo
+from vimapt.exception import VimaptAbortOperationException
+from vimapt.RemoteRepo import RemoteRepo
+from vimapt.tests.repo_server import RepoServer
+
+
+class TestLocalRepo(unittest.TestCase):
+    def setUp(self):
+        self.vim_dir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.vim_dir, "vimapt/cache/index"))
+        os.makedirs(os.path.join(self.vim_dir, "vimapt/cache/pool"))
+        self.repo = LocalRepo(self.vim_dir)
+        self._write_index("ctrlp: {path: pool/ctrlp_1.79-1.vpb, version: 1.79-1}\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.vim_dir)
+
+    def _write_index(self, stream):
+        with open(self.repo.local_package_index_path, "w") as fd:
+            fd.write(stream)
+
+    def test_index_cache(self):
+        self.assertEqual(self.repo.get_package_name_list(), ["ctrlp"])
+        self.assertTrue(os.path.isfile(self.repo.local_package_index_cache_path))
+        self.assertEqual(self.repo._read_index_cache()["ctrlp"]["version"], "1.79-1")
+
+    def test_stale_index_cache(self):
+        self.repo.get_package_name_list()
+        self._write_index("ctrlp: {path: pool/ctrlp_1.79-1.vpb, version: 1.79-1}\n"
+                          "tagbar: {path: pool/tagbar_2.4.1-1.vpb, version: 2.4.1-1}\n")
+
+        self.assertEqual(self.repo._read_index_cache(), None)
+        self.assertEqual(sorted(self.repo.get_package_name_list()), ["ctrlp", "tagbar"])
+
+    def test_broken_index_cache(self):
+        with open(self.repo.local_package_index_cache_path, "wb") as fd:
+            fd.write(b"broken")
+
+        self.assertEqual(self.repo.get_package_name_list(), ["ctrlp"])
+
+    def _make_remote_repo(self, package_number=1):
+        repo_dir = os.path.join(self.vim_dir, "remote")
+        os.makedirs(os.path.join(repo_dir, "pool"))
+        os.makedirs(os.path.join(repo_dir, "index"))
+        with open(os.path.join(repo_dir, "pool", "ctrlp_1.79-1.vpb"), "w") as fd:
+            fd.write("[]\n\n")
+        for i in range(1, package_number):
+            with open(os.path.join(repo_dir, "pool", "package%d_1.0-1.vpb" % i), "w") as fd:
+                fd.write("[]\n\n" + "x" * i)
+        RemoteRepo(repo_dir).make_package_index()
+        return repo_dir
+
+    def test_conditional_update(self):
+        repo_dir = self._make_remote_repo()
+        with RepoServer(repo_dir) as server:
+            with open(self.repo.config_path, "w") as fd:
+                fd.write(server.url)
+
+            self.assertTrue(self.repo.update())
+            self.assertEqual(self.repo._extract()["ctrlp"]["version"], "1.79-1")
+            index_mtime = os.path.getmtime(self.repo.local_package_index_path)
+
+            self.assertFalse(self.repo.update())
+            self.assertEqual(os.path.getmtime(self.repo.local_package_index_path), index_mtime)
+
+        self.assertEqual([path for path, _ in server.request_log], ["/index/package.gz"] * 2)
+        self.assertEqual(server.request_log[0][1], None)
+        self.assertNotEqual(server.request_log[1][1], None)
+
+    def test_update_without_compressed_index(self):
+        repo_dir = self._make_remote_repo()
+        os.unlink(os.path.join(repo_dir, "index/package.gz"))
+        with RepoServer(repo_dir) as server:
+            with open(self.repo.config_path, "w") as fd:
+                fd.write(server.url)
+
+            self.assertTrue(self.repo.update())
+            self.assertFalse(self.repo.update())
+
+        self.assertEqual([path for path, _ in server.request_log],
+                         ["/index/package.gz", "/index/package"] * 2)
+
+    def test_update_file_url_without_compressed_index(self):
+        repo_dir = self._make_remote_repo()
+        os.unlink(os.path.join(repo_dir, "index/package.gz"))
+        with open(self.repo.config_path, "w") as fd:
+            fd.write("file://" + repo_dir)
+
+        self.assertTrue(self.repo.update())
+        self.assertEqual(self.repo._extract()["ctrlp"]["version"], "1.79-1")
+
+    def test_package_cache(self):
+        repo_dir = self._make_remote_repo()
+        with RepoServer(repo_dir) as server:
+            with open(self.repo.config_path, "w") as fd:
+                fd.write(server.url)
+            self.repo.update()
+
+            package_path = self.repo.get_package("ctrlp")
+            self.assertEqual(self.repo.get_package("ctrlp"), package_path)
+
+            # cached file is broken, download it again
+            with open(package_path, "w") as fd:
+                fd.write("broken")
+            self.repo.get_package("ctrlp")
+            with open(package_path) as fd:
+                self.assertEqual(fd.read(), "[]\n\n")
+
+        self.assertEqual([path for path, _ in server.request_log if path.startswith("/pool")],
+                         ["/pool/ctrlp_1.79-1.vpb"] * 2)
+
+    def test_package_checksum(self):
+        repo_dir = self._make_remote_repo()
+        with open(os.path.join(repo_dir, "pool", "ctrlp_1.79-1.vpb"), "w") as fd:
+            fd.write("changed after index is made")
+        with RepoServer(repo_dir) as server:
+            with open(self.repo.config_path, "w") as fd:
+                fd.write(server.url)
+            self.repo.update()
+
+            self.assertRaises(VimaptAbortOperationException, self.repo.get_package, "ctrlp")
+        self.assertEqual(os.listdir(self.repo.cache_pool_dir), [])
+
+    def test_evict_cache(self):
+        with open(self.repo.cache_size_limit_path, "w") as fd:
+            fd.write("25")
+        for i in range(3):
+            file_path = os.path.join(self.repo.cache_pool_dir, "package%d_1.0.vpb" % i)
+            with open(file_path, "w") as fd:
+                fd.write("x" * 10)
+            os.utime(file_path, (i, i))
+
+        # left by an interrupted download, never counted as cached package
+        with open(os.path.join(self.repo.cache_pool_dir, "package3_1.0.vpb.part"), "w") as fd:
+            fd.write("x" * 100)
+
+        removed_list = self.repo.evict_cache()
+
+        self.assertEqual([os.path.basename(i) for i in removed_list], ["package0_1.0.vpb"])
+        self.assertEqual(len(self.repo.clean()), 3)
+        self.assertEqual(os.listdir(self.repo.cache_pool_dir), [])
+
+    def test_get_packages(self):
+        repo_dir = self._make_remote_repo(package_number=8)
+        with RepoServer(repo_dir) as server:
+            with open(self.repo.config_path, "w") as fd:
+                fd.write(server.url)
+            self.repo.update()
+            connection_count = server.connection_count
+
+            package_spec_list = [("ctrlp", None)] + [("package%d" % i, "1.0-1") for i in range(1, 8)]
+            package_path_list = self.repo.get_packages(package_spec_list, jobs=2)
+
+            # keep-alive connections are reused across downloads
+            self.assertLessEqual(server.connection_count - connection_count, 2)
+
+        self.assertEqual([os.path.basename(i) for i in package_path_list],
+                         ["ctrlp_1.79-1.vpb"] + ["package%d_1.0-1.vpb" % i for i in range(1, 8)])
+        with open(package_path_list[-1]) as fd:
+            self.assertEqual(fd.read(), "[]\n\n" + "x" * 7)
+        self.assertFalse(self.repo.get_packages([("not-exists", None)]))
+
+    def test_not_found_package_is_not_printed(self):
+        old_stdout = sys.stdout
+        sys.stdout = StringIO()
+        try:
+            self.assertFalse(self.repo.get_packages([("not-exists", None)]))
+            self.assertFalse(self.repo.get_packages([("ctrlp", "0.1")]))
+            output = sys.stdout.getvalue()
+        finally:
+            sys.stdout = old_stdout
+        # stdout of worker carries JSON messages only
+        self.assertEqual(output, "")
+
+    def test_get_same_package_twice(self):
+        repo_dir = self._make_remote_repo()
+        with RepoServer(repo_dir) as server:
+            with open(self.repo.config_path, "w") as fd:
+                fd.write(server.url)
+            self.repo.update()
+
+            package_path_list = self.repo.get_packages([("ctrlp", None), ("ctrlp", "1.79-1")], jobs=2)
+
+        self.assertEqual(package_path_list, [package_path_list[0]] * 2)
+        self.assertEqual([path for path, _ in server.request_log if path.startswith("/pool")],
+                         ["/pool/ctrlp_1.79-1.vpb"])
+
+    def test_get_packages_redirected(self):
+        repo_dir = self._make_remote_repo(package_number=2)
+        with RepoServer(repo_dir) as server:
+            with open(self.repo.config_path, "w") as fd:
+                fd.write(server.url)
+            self.repo.update()
+            server.redirect_dict["/pool/ctrlp_1.79-1.vpb"] = "/pool/package1_1.0-1.vpb"
+            with open(os.path.join(repo_dir, "pool", "ctrlp_1.79-1.vpb"), "rb") as fd:
+                package_stream = fd.read()
+            with open(os.path.join(repo_dir, "pool", "package1_1.0-1.vpb"), "wb") as fd:
+                fd.write(package_stream)
+
+            package_path, = self.repo.get_packages([("ctrlp", None)])
+
+        with open(package_path, "rb") as fd:
+            self.assertEqual(fd.read(), package_stream)
+
+    def test_get_packages_through_proxy(self):
+        repo_dir = self._make_remote_repo()
+        old_environ = dict(os.environ)
+        with RepoServer(repo_dir) as server:
+            os.environ.update(http_proxy=server.url, no_proxy="")
+            # opener of urlopen reads proxies when it is built, build it again
+            urllib_request.install_opener(urllib_request.build_opener())
+            try:
+                # host exists only behind the proxy
+                with open(self.repo.config_path, "w") as fd:
+                    fd.write("http://repo.vimapt.invalid")
+                self.repo.update()
+                package_path, = self.repo.get_packages([("ctrlp", None)])
+            finally:
+                os.environ.clear()
+                os.environ.update(old_environ)
+                urllib_request.install_opener(None)
+
+        self.assertIn("http://repo.vimapt.invalid/pool/ctrlp_1.79-1.vpb", server.proxy_log)
+        with open(package_path) as fd:
+            self.assertEqual(fd.read(), "[]\n\n")
+
+    def test_get_packages_from_file_url(self):
+        repo_dir = self._make_remote_repo()
+        with open(self.repo.config_path, "w") as fd:
+            fd.write("file://" + repo_dir)
+        self.repo.update()
+
+        package_path, = self.repo.get_packages([("ctrlp", None)])
+        with open(package_path) as fd:
+            self.assertEqual(fd.read(), "[]\n\n")
@@ -0,0 +1,60 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from six import StringIO
+
+from vimapt.Extract import open_package
+from vimapt.tests import generators
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+tool_dir = os.path.join(current_dir, "../../../tool")
+if tool_dir not in sys.path:
+    sys.path.append(tool_dir)
+
+from vimapt_tools import makepool  # noqa: E402
+
+
+class TestMakePool(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp()
+        for name in ["aaa", "bbb"]:
+            generators.make_package_dir(os.path.join(self.work_dir, "%s_1.0.0" % name), name, file_number=3)
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir)
+
+    def make_pool(self, *args, **kwargs):
+        old_stdout = sys.stdout
+        sys.stdout = StringIO()
+        try:
+            summary = makepool.make_pool(self.work_dir, *args, **kwargs)
+        finally:
+            sys.stdout = old_stdout
+        return dict((status, sorted(i[0] for i in item_list)) for status, item_list in summary.items())
+
+    def test_make_pool(self):
+        self.assertEqual(self.make_pool(jobs=1), {"built": ["aaa_1.0.0", "bbb_1.0.0"], "skipped": [], "failed": []})
+
+        extract = open_package(os.path.join(self.work_dir, "aaa_1.0.0.vpb"), os.path.join(self.work_dir, "output"))
+        self.assertIn("plugin/aaa/d0/d0/file0.vim", [file_name for file_name, _ in extract.get_file_list()])
+        self.assertEqual(extract.read("vimrc/aaa.vimrc"), "let g:aaa_enabled = 1\n")
+
+        # packaging dirs not changed are skipped
+        self.assertEqual(self.make_pool(jobs=1)["skipped"], ["aaa_1.0.0", "bbb_1.0.0"])
+
+        with open(os.path.join(self.work_dir, "bbb_1.0.0/vimrc/bbb.vimrc"), "w") as fd:
+            fd.write("let g:bbb_enabled = 0\n")
+        self.assertEqual(self.make_pool(jobs=1), {"built": ["bbb_1.0.0"], "skipped": ["aaa_1.0.0"], "failed": []})
+        self.assertEqual(self.make_pool(jobs=1, force=True)["built"], ["aaa_1.0.0", "bbb_1.0.0"])
+
+    def test_make_pool_in_parallel(self):
+        self.assertEqual(self.make_pool("vap", jobs=2)["built"], ["aaa_1.0.0", "bbb_1.0.0"])
+
+        for name in ["aaa", "bbb"]:
+            extract = open_package(os.path.join(self.work_dir, "%s_1.0.0.vap" % name), self.work_dir)
+            self.assertIn("name: %s\n" % name, extract.read("vimapt/control/%s.yaml" % name))
+        # package of another format is built again
+        self.assertEqual(self.make_pool(jobs=1)["built"], ["aaa_1.0.0", "bbb_1.0.0"])
@@ -0,0 +1,66 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from vimapt.Extract import open_package
+from vimapt.MemberWriter import MemberWriter, get_existing_path_set
+from vimapt.tests import generators
+
+
+class TestMemberWriter(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp()
+        self.output_dir = os.path.join(self.work_dir, "output")
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir)
+
+    def test_get_existing_path_set(self):
+        os.makedirs(os.path.join(self.work_dir, "vimrc"))
+        open(os.path.join(self.work_dir, "vimrc/mine.vimrc"), "w").close()
+
+        path_list = ["vimrc/mine.vimrc", "vimrc/new.vimrc", "not/exists.vim"]
+        self.assertEqual(get_existing_path_set(self.work_dir, path_list), set(["vimrc/mine.vimrc"]))
+
+    def test_write_in_batches(self):
+        member_list = [("plugin/d%d/file%d.vim" % (i % 3, i),) for i in range(100)]
+        batch_list = []
+        written_list = []
+
+        def write_batch(batch):
+            batch_list.append(batch)
+            written_list.extend(batch)
+
+        MemberWriter(self.output_dir, jobs=3).write(write_batch, member_list)
+
+        self.assertEqual(sorted(written_list), sorted(member_list))
+        self.assertEqual(len(batch_list), 3)
+        self.assertEqual(sorted(os.listdir(os.path.join(self.output_dir, "plugin"))), ["d0", "d1", "d2"])
+
+    def test_small_package_in_one_thread(self):
+        thread_name_set = set()
+        MemberWriter(self.output_dir, jobs=4).write(
+            lambda batch: thread_name_set.add(threading.current_thread().name), [("plugin/a.vim",)])
+        self.assertEqual(thread_name_set, set([threading.current_thread().name]))
+
+    def test_parallel_extract(self):
+        for package_format in ["vpb", "vap"]:
+            source_dir = os.path.join(self.work_dir, "source", "big_1.0.0")
+            package_file = generators.make_package(self.work_dir, "big", package_format=package_format,
+                                                   file_number=200, file_size=512, depth=3)
+            output_dir = os.path.join(self.output_dir, package_format)
+            extract = open_package(package_file, output_dir)
+            extract.select(lambda file_name, _: not file_name.startswith("vimrc/"))
+            extract.extract(4)
+
+            for file_name, _ in extract.get_file_list():
+                output_path = os.path.join(output_dir, file_name)
+                if file_name.startswith("vimrc/"):
+                    self.assertFalse(os.path.exists(output_path))
+                    continue
+                with open(os.path.join(source_dir, file_name), "rb") as fd:
+                    expected_stream = fd.read()
+                with open(output_path, "rb") as fd:
+                    self.assertEqual(fd.read(), expected_stream)
@@ -0,0 +1,142 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from vimapt import ObjectStore as object_store_module
+from vimapt.Compress import Compress
+from vimapt.Install import Install
+from vimapt.ObjectStore import ObjectStore, get_file_hash
+from vimapt.Purge import Purge
+from vimapt.Remove import Remove
+from vimapt.VapCompress import VapCompress
+from vimapt.tests import generators
+
+LICENSE_CONTENT = "Permission is hereby granted, free of charge, to any person obtaining a copy\n" * 20
+
+
+class TestObjectStore(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp()
+        self.vim_dir = generators.make_vim_dir(self.work_dir)
+        self.store = ObjectStore(self.vim_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir)
+
+    def make_package(self, name, package_format="vpb"):
+        """
+        Package with a license file same as other packages
+        """
+        source_dir = os.path.join(self.work_dir, "source", name)
+        generators.make_package_dir(source_dir, name, file_number=3)
+        os.makedirs(os.path.join(source_dir, "doc"))
+        with open(os.path.join(source_dir, "doc/%s-license.txt" % name), "w") as fd:
+            fd.write(LICENSE_CONTENT)
+        package_file = os.path.join(self.work_dir, "%s_1.0.0.%s" % (name, package_format))
+        if package_format == "vap":
+            VapCompress(source_dir, package_file).compress()
+        else:
+            Compress(source_dir, package_file).compress()
+        return package_file
+
+    def get_path(self, path):
+        return os.path.join(self.vim_dir, path)
+
+    def test_shared_file_is_stored_once(self):
+        Install(self.vim_dir)._install_package(self.make_package("aaa"))
+        Install(self.vim_dir)._install_package(self.make_package("bbb", "vap"))
+
+        object_path = self.store.get_object_path(get_file_hash(self.get_path("doc/aaa-license.txt")))
+        self.assertTrue(os.path.samefile(object_path, self.get_path("doc/aaa-license.txt")))
+        self.assertTrue(os.path.samefile(object_path, self.get_path("doc/bbb-license.txt")))
+        self.assertEqual(os.stat(object_path).st_nlink, 3)
+        # configure file is edited in place by user, never shared
+        self.assertEqual(os.stat(self.get_path("vimrc/aaa.vimrc")).st_nlink, 1)
+
+        Purge(self.vim_dir).purge_package("aaa")
+        self.assertEqual(os.stat(object_path).st_nlink, 2)
+        Purge(self.vim_dir).purge_package("bbb")
+        self.assertFalse(os.path.exists(object_path))
+        self.assertEqual(self.store.collect(), [])
+
+    def test_changed_object_is_not_linked(self):
+        Install(self.vim_dir)._install_package(self.make_package("aaa"))
+        license_path = self.get_path("doc/aaa-license.txt")
+        self.assertEqual(os.stat(license_path).st_mode & 0o222, 0)
+
+        # user force to edit the file in place, like Vim with 'backupcopy=auto'
+        os.chmod(license_path, 0o644)
+        with open(license_path, "w") as fd:
+            fd.write("XXX license text\n")
+        Install(self.vim_dir)._install_package(self.make_package("bbb", "vap"))
+        Install(self.vim_dir)._install_package(self.make_package("ccc"))
+
+        for name in ["bbb", "ccc"]:
+            with open(self.get_path("doc/%s-license.txt" % name)) as fd:
+                self.assertEqual(fd.read(), LICENSE_CONTENT)
+        self.assertFalse(os.path.samefile(license_path, self.get_path("doc/bbb-license.txt")))
+        self.assertTrue(os.path.samefile(self.get_path("doc/bbb-license.txt"), self.get_path("doc/ccc-license.txt")))
+
+    def test_reinstall_from_store(self):
+        package_file = self.make_package("aaa", "vap")
+        Install(self.vim_dir)._install_package(package_file)
+        Install(self.vim_dir)._install_package(self.make_package("bbb"))
+        object_path = self.store.get_object_path(get_file_hash(self.get_path("doc/aaa-license.txt")))
+        Remove(self.vim_dir).remove_package("aaa")
+        self.assertFalse(os.path.exists(self.get_path("doc/aaa-license.txt")))
+        # still linked by bbb
+        self.assertEqual(os.stat(object_path).st_nlink, 2)
+
+        Install(self.vim_dir)._install_package(package_file)
+        self.assertEqual(os.stat(object_path).st_nlink, 3)
+
+    def test_remove_last_link(self):
+        Install(self.vim_dir)._install_package(self.make_package("aaa"))
+        object_path = self.store.get_object_path(get_file_hash(self.get_path("doc/aaa-license.txt")))
+        self.assertTrue(os.path.isfile(object_path))
+
+        Remove(self.vim_dir).remove_package("aaa")
+        self.assertFalse(os.path.exists(object_path))
+        self.assertEqual(self.store.collect(), [])
+
+    def test_member_named_like_temporary_link(self):
+        source_dir = os.path.join(self.work_dir, "source", "aaa")
+        generators.make_package_dir(source_dir, "aaa", file_number=1)
+        os.makedirs(os.path.join(source_dir, "doc"))
+        for file_name in ["license.txt", "license.txt.link"]:
+            with open(os.path.join(source_dir, "doc", file_name), "w") as fd:
+                fd.write(LICENSE_CONTENT)
+        package_file = os.path.join(self.work_dir, "aaa_1.0.0.vpb")
+        Compress(source_dir, package_file).compress()
+        Install(self.vim_dir)._install_package(package_file)
+
+        self.assertEqual(sorted(os.listdir(self.get_path("doc"))), ["license.txt", "license.txt.link"])
+        self.assertTrue(os.path.samefile(self.get_path("doc/license.txt"), self.get_path("doc/license.txt.link")))
+
+    def test_copy_fallback(self):
+        def link(*_):
+            raise OSError(18, "Invalid cross-device link")
+
+        old_link = object_store_module.os.link
+        object_store_module.os.link = link
+        try:
+            Install(self.vim_dir)._install_package(self.make_package("aaa"))
+            Install(self.vim_dir)._install_package(self.make_package("bbb"))
+        finally:
+            object_store_module.os.link = old_link
+
+        with open(self.get_path("doc/bbb-license.txt")) as fd:
+            self.assertEqual(fd.read(), LICENSE_CONTENT)
+        self.assertEqual(os.stat(self.get_path("doc/aaa-license.txt")).st_nlink, 1)
+        self.assertEqual([file_list for _, _, file_list in os.walk(self.store.object_dir) if file_list], [])
+
+    def test_shared_store_dir(self):
+        store_dir = os.path.join(self.work_dir, "shared-objects")
+        with open(self.get_path("vimapt/store_dir"), "w") as fd:
+            fd.write(store_dir + "\n")
+        Install(self.vim_dir)._install_package(self.make_package("aaa"))
+
+        object_path = ObjectStore(self.vim_dir).get_object_path(get_file_hash(self.get_path("doc/aaa-license.txt")))
+        self.assertTrue(object_path.startswith(store_dir))
+        self.assertTrue(os.path.samefile(object_path, self.get_path("doc/aaa-license.txt")))
@@ -0,0 +1,129 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from vimapt.Install import Install
+from vimapt.PackageDatabase import PackageDatabase
+from vimapt.Purge import Purge
+from vimapt.Record import Record
+from vimapt.Remove import Remove
+from vimapt.Vimapt import Vimapt
+from vimapt.exception import VimaptAbortOperationException
+from vimapt.tests.generators import make_vim_dir
+from vimapt.tests.test_install import make_package
+
+
+class TestPackageDatabase(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp()
+        self.vim_dir = make_vim_dir(self.work_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir)
+
+    def test_state_transition(self):
+        database = PackageDatabase(self.vim_dir)
+        database.install("foo", {"version": "1.0-1", "depends": ["bar>=1.0"]})
+        database.install("bar", {"version": 2})
+
+        self.assertEqual(database.get_version_dict(), {"foo": "1.0-1", "bar": "2"})
+        self.assertEqual(database.get_version("foo"), "1.0-1")
+        self.assertEqual(database.get_package("foo")["depends"], ["bar>=1.0"])
+
+        database.remove("foo")
+        self.assertRaises(KeyError, database.get_version, "foo")
+        self.assertEqual(database.get_name_list("installed"), ["bar"])
+        self.assertEqual(database.get_name_list(), ["bar", "foo"])
+
+        database.purge("foo")
+        self.assertIsNone(database.get_package("foo"))
+        database.close()
+
+    def test_fresh_vim_dir(self):
+        vim_dir = os.path.join(self.work_dir, "fresh")
+        vimapt = Vimapt(vim_dir)
+        self.assertEqual(vimapt.get_installed_list(), [])
+        vimapt.close()
+        self.assertTrue(os.path.isfile(os.path.join(vim_dir, "vimapt/status.db")))
+
+    def test_rebuild_from_disk(self):
+        install = Install(self.vim_dir)
+        install._install_package(make_package(self.work_dir))
+        os.unlink(os.path.join(self.vim_dir, "vimapt/status.db"))
+
+        vimapt = Vimapt(self.vim_dir)
+        self.assertEqual(vimapt.get_version_dict(), {"vimapt": "1.0.0"})
+
+    def test_broken_database(self):
+        with open(os.path.join(self.vim_dir, "vimapt/install/foo"), "w") as fd:
+            fd.write("[]")
+        with open(os.path.join(self.vim_dir, "vimapt/status.db"), "w") as fd:
+            fd.write("not a database" * 100)
+
+        self.assertEqual(Vimapt(self.vim_dir).get_presist_list(), ["foo"])
+
+    def test_install_remove_purge(self):
+        Install(self.vim_dir)._install_package(make_package(self.work_dir))
+        vimapt = Vimapt(self.vim_dir)
+        self.assertEqual(vimapt.get_installed_list(), ["vimapt"])
+
+        Remove(self.vim_dir).remove_package("vimapt")
+        self.assertEqual(vimapt.get_installed_list(), [])
+        self.assertEqual(vimapt.get_purge_list(), ["vimapt"])
+
+        Purge(self.vim_dir).purge_package("vimapt")
+        self.assertEqual(vimapt.get_purge_list(), [])
+
+    def test_file_owner(self):
+        database = PackageDatabase(self.vim_dir)
+        database.install("foo", {"version": "1.0"}, ["plugin/foo.vim", "vimrc/foo.vimrc"])
+        self.assertEqual(database.get_owner("plugin/foo.vim"), "foo")
+        self.assertIsNone(database.get_owner("plugin/bar.vim"))
+        self.assertEqual(database.get_owner_dict(["plugin/foo.vim", "plugin/bar.vim"]), {"plugin/foo.vim": "foo"})
+
+        database.remove("foo")
+        self.assertIsNone(database.get_owner("plugin/foo.vim"))
+        self.assertEqual(database.get_owner("vimrc/foo.vimrc"), "foo")
+
+        database.purge("foo")
+        self.assertIsNone(database.get_owner("vimrc/foo.vimrc"))
+        database.close()
+
+    def test_legacy_records_share_path(self):
+        # records made before file ownership is checked, both packages claim the same file
+        for name in ["foo", "bar"]:
+            Record(self.vim_dir).install(name, [["plugin/shared.vim", 1], ["plugin/%s.vim" % name, 1]])
+        os.makedirs(os.path.join(self.vim_dir, "plugin"))
+        for file_name in ["shared.vim", "foo.vim", "bar.vim"]:
+            with open(os.path.join(self.vim_dir, "plugin", file_name), "w") as fd:
+                fd.write("\" %s\n" % file_name)
+
+        vimapt = Vimapt(self.vim_dir)
+        owner = vimapt.get_owner("plugin/shared.vim")
+        other = "foo" if owner == "bar" else "bar"
+        vimapt.close()
+
+        Remove(self.vim_dir).remove_package(other)
+        Purge(self.vim_dir).purge_package(other)
+        self.assertFalse(os.path.exists(os.path.join(self.vim_dir, "plugin/%s.vim" % other)))
+        self.assertTrue(os.path.isfile(os.path.join(self.vim_dir, "plugin/shared.vim")))
+
+        Remove(self.vim_dir).remove_package(owner)
+        self.assertFalse(os.path.exists(os.path.join(self.vim_dir, "plugin/shared.vim")))
+
+    def test_install_reject_clashing_path(self):
+        package_path = make_package(self.work_dir)
+        Install(self.vim_dir)._install_package(package_path)
+        vimapt = Vimapt(self.vim_dir)
+        self.assertEqual(vimapt.get_owner("vimapt/control/vimapt.yaml"), "vimapt")
+        self.assertEqual(vimapt.get_owner(os.path.join(self.vim_dir, "vimapt/control/vimapt.yaml")), "vimapt")
+
+        # same files claimed by another package
+        database = PackageDatabase(self.vim_dir)
+        database.purge("vimapt")
+        database.install("other", {}, ["vimapt/control/vimapt.yaml"])
+        copyright_file = os.path.join(self.vim_dir, "vimapt/copyright/vimapt.yaml")
+        os.unlink(copyright_file)
+        self.assertRaises(VimaptAbortOperationException, Install(self.vim_dir)._install_package, package_path)
+        self.assertFalse(os.path.exists(copyright_file))
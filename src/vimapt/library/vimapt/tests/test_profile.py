@@ -0,0 +1,77 @@
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from vimapt import Profile
+from vimapt.PackageDatabase import PackageDatabase
+from vimapt.tests.generators import make_vim_dir
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+log_fixture = os.path.join(current_dir, "startuptime.log")
+
+# vim dir of the machine which recorded the fixture
+RECORDED_VIM_DIR = "/home/user/.vim/"
+
+
+class TestProfile(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp()
+        self.vim_dir = make_vim_dir(self.work_dir)
+        database = PackageDatabase(self.vim_dir)
+        database.install("ctrlp", {}, ["plugin/ctrlp.vim", "autoload/ctrlp.vim"])
+        database.install("nerdtree", {}, ["plugin/nerdtree.vim"])
+        database.install("tagbar", {}, ["plugin/tagbar.vim"])
+        database.install("surround", {}, ["plugin/surround.vim"])
+        database.close()
+
+        with io.open(log_fixture, encoding="utf-8") as fd:
+            self.log_stream = fd.read().replace(RECORDED_VIM_DIR, self.vim_dir + "/")
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir)
+
+    def test_parse_last_startup(self):
+        entry_list = Profile.parse_startuptime(self.log_stream)
+        self.assertEqual(len([i for i in entry_list if i[0].endswith("plugin/ctrlp.vim")]), 1)
+        self.assertEqual(entry_list[0], (self.vim_dir + "/vimapt/loader.vim", 0.234, 0.234))
+        self.assertIn(("/home/user/.vimrc", 0.111, 2.479), entry_list)
+
+    def test_attribute(self):
+        result_list, other_time = Profile.Profile(self.vim_dir).attribute(
+            Profile.parse_startuptime(self.log_stream))
+        result_dict = dict((i["name"], i) for i in result_list)
+
+        self.assertEqual([i["name"] for i in result_list][:3], ["ctrlp", "nerdtree", "tagbar"])
+        self.assertAlmostEqual(result_dict["ctrlp"]["time"], 2.134 + 3.052)
+        self.assertEqual(result_dict["ctrlp"]["files"], 2)
+        self.assertTrue(result_dict["ctrlp"]["outlier"])
+        self.assertFalse(result_dict["nerdtree"]["outlier"])
+        self.assertAlmostEqual(result_dict[Profile.LOADER_GROUP]["time"], 0.234)
+        self.assertAlmostEqual(result_dict[Profile.UNMANAGED_GROUP]["time"], 0.009)
+        self.assertGreater(other_time, 0.111)
+
+    def test_attribute_profile_loader(self):
+        chunk_dir = self.vim_dir + "/vimapt/profile/chunk/"
+        entry_list = [(chunk_dir + "ctrlp.vim", 1.5, 1.5),
+                      (self.vim_dir + "/vimrc/mine.vimrc", 0.2, 0.2),
+                      (self.vim_dir + "/vimapt/profile/loader.vim", 0.1, 1.8)]
+        result_list, _ = Profile.Profile(self.vim_dir).attribute(entry_list)
+        result_dict = dict((i["name"], i["time"]) for i in result_list)
+
+        self.assertAlmostEqual(result_dict["ctrlp"], 1.5)
+        self.assertAlmostEqual(result_dict[Profile.UNMANAGED_GROUP], 0.2)
+        self.assertAlmostEqual(result_dict[Profile.LOADER_GROUP], 0.1)
+
+    def test_find_outliers(self):
+        self.assertEqual(Profile.find_outliers({"a": 1.0, "b": 1.2, "c": 0.9, "d": 30.0}), {"d"})
+        self.assertEqual(Profile.find_outliers({"a": 0.1, "b": 0.2, "c": 0.9}), set())
+        self.assertEqual(Profile.find_outliers({}), set())
+
+    def test_report(self):
+        log_file = os.path.join(self.work_dir, "startuptime.log")
+        with io.open(log_file, "w", encoding="utf-8") as fd:
+            fd.write(self.log_stream)
+        report = Profile.Profile(self.vim_dir).profile(log_file)
+        self.assertIn("ctrlp  <- outlier", report)
@@ -0,0 +1,59 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from vimapt.RemoteRepo import RemoteRepo, version_key
+
+
+class TestRemoteRepo(unittest.TestCase):
+    def setUp(self):
+        self.repo_dir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.repo_dir, "pool"))
+        os.makedirs(os.path.join(self.repo_dir, "index"))
+
+    def tearDown(self):
+        shutil.rmtree(self.repo_dir)
+
+    def _add_package(self, file_name, content=b"- [a, 0]\n\n"):
+        with open(os.path.join(self.repo_dir, "pool", file_name), "wb") as fd:
+            fd.write(content)
+
+    def test_version_key(self):
+        version_list = ["1.10-1", "1.9-2", "1.9-10", "1.9", "abc"]
+        self.assertEqual(sorted(version_list, key=version_key), ["abc", "1.9", "1.9-2", "1.9-10", "1.10-1"])
+
+    def test_multi_version(self):
+        self._add_package("ctrlp_1.79-1.vpb")
+        self._add_package("ctrlp_1.100-1.vap")
+        self._add_package("ctrlp_1.8-1.vpb")
+        self._add_package(".vimapt-pool-manifest")
+
+        package_data = RemoteRepo(self.repo_dir).scan_pool()
+
+        self.assertEqual(list(package_data), ["ctrlp"])
+        self.assertEqual(package_data["ctrlp"]["version"], "1.100-1")
+        self.assertEqual(package_data["ctrlp"]["path"], "pool/ctrlp_1.100-1.vap")
+        self.assertEqual([i["version"] for i in package_data["ctrlp"]["versions"]], ["1.8-1", "1.79-1", "1.100-1"])
+
+    def test_incremental(self):
+        self._add_package("ctrlp_1.79-1.vpb")
+        self._add_package("tagbar_2.4.1-1.vpb")
+        repo = RemoteRepo(self.repo_dir)
+        repo.make_package_index()
+
+        scanned_list = []
+        origin_scan_package_file = repo._scan_package_file
+
+        def scan_package_file(file_name, stat):
+            scanned_list.append(file_name)
+            return origin_scan_package_file(file_name, stat)
+
+        repo._scan_package_file = scan_package_file
+        os.unlink(os.path.join(self.repo_dir, "pool", "tagbar_2.4.1-1.vpb"))
+        self._add_package("surround_2.0-1.vpb")
+
+        package_data = repo.scan_pool()
+
+        self.assertEqual(scanned_list, ["surround_2.0-1.vpb"])
+        self.assertEqual(sorted(package_data), ["ctrlp", "surround"])
@@ -0,0 +1,74 @@
+import unittest
+
+from vimapt.Resolver import Resolver
+from vimapt.exception import VimaptAbortOperationException
+
+
+def make_index(package_dict):
+    """
+    :param package_dict: {name: [(version, depends, conflicts), ...]}, versions in ascending order
+    """
+    index_data = {}
+    for name, version_list in package_dict.items():
+        versions = [{'version': version, 'path': 'pool/%s_%s.vpb' % (name, version),
+                     'depends': depends, 'conflicts': conflicts}
+                    for version, depends, conflicts in version_list]
+        index_data[name] = dict(versions[-1], versions=versions)
+    return index_data
+
+
+def plan_of(plan):
+    return [(entry['name'], entry['version']) for entry in plan]
+
+
+class TestResolver(unittest.TestCase):
+    def test_dependency_order(self):
+        index_data = make_index({
+            'app': [('1.0-1', ['lib>=1.0', 'util'], [])],
+            'lib': [('1.0-1', ['util'], []), ('2.0-1', ['util'], [])],
+            'util': [('0.1-1', [], [])],
+        })
+
+        plan = Resolver(index_data).resolve(['app'])
+
+        self.assertEqual(plan_of(plan), [('util', '0.1-1'), ('lib', '2.0-1'), ('app', '1.0-1')])
+
+    def test_backtracking(self):
+        # newest lib need util>=2.0, which conflicts with app, so resolver must fall back to lib 1.0
+        index_data = make_index({
+            'app': [('1.0-1', ['lib', 'util'], ['util>=2.0'])],
+            'lib': [('1.0-1', ['util'], []), ('2.0-1', ['util>=2.0'], [])],
+            'util': [('1.0-1', [], []), ('2.0-1', [], [])],
+        })
+
+        plan = Resolver(index_data).resolve(['app'])
+
+        self.assertEqual(sorted(plan_of(plan)), [('app', '1.0-1'), ('lib', '1.0-1'), ('util', '1.0-1')])
+
+    def test_installed(self):
+        index_data = make_index({
+            'app': [('1.0-1', ['util>=1.0'], [])],
+            'util': [('1.0-1', [], [])],
+        })
+
+        self.assertEqual(plan_of(Resolver(index_data, {'util': '1.1-1'}).resolve(['app'])), [('app', '1.0-1')])
+        self.assertRaises(VimaptAbortOperationException,
+                          Resolver(index_data, {'util': '0.9-1'}).resolve, ['app'])
+
+    def test_not_found(self):
+        index_data = make_index({'app': [('1.0-1', ['missing'], [])]})
+
+        self.assertRaises(VimaptAbortOperationException, Resolver(index_data).resolve, ['app'])
+        self.assertRaises(VimaptAbortOperationException, Resolver(index_data).resolve, ['app==2.0-1'])
+
+    def test_deep_chain(self):
+        depth = 3000
+        index_data = make_index(dict(
+            ('package%d' % i, [('1.0-1', ['package%d' % (i + 1)] if i + 1 < depth else [], [])])
+            for i in range(depth)))
+
+        plan = Resolver(index_data).resolve(['package0'])
+
+        self.assertEqual(len(plan), depth)
+        self.assertEqual(plan[0]['name'], 'package%d' % (depth - 1))
+        self.assertEqual(plan[-1]['name'], 'package0')
@@ -0,0 +1,70 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from vimapt import Service
+from vimapt.PackageDatabase import PackageDatabase
+from vimapt.tests.generators import make_vim_dir
+
+
+class TestService(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp()
+        self.vim_dir = make_vim_dir(self.work_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir)
+
+    def test_import_without_log_dir(self):
+        library_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        env = dict(os.environ, HOME=self.work_dir)
+        script = ("import sys, vimapt.Service; "
+                  "sys.exit(len([m for m in ('requirements', 'semantic_version', 'yaml') if m in sys.modules]))")
+        self.assertEqual(subprocess.call([sys.executable, "-c", script], cwd=library_dir, env=env), 0)
+        self.assertFalse(os.path.exists(os.path.join(self.work_dir, ".vim")))
+
+    def test_get_service(self):
+        service = Service.get_service(self.vim_dir)
+        self.assertIs(Service.get_service(self.vim_dir), service)
+        del Service._service_dict[self.vim_dir]
+
+    def test_cache_invalidated_by_commit(self):
+        service = Service.Service(self.vim_dir)
+        self.assertEqual(service.get_remove_list(), [])
+
+        calls = []
+        original_loader = service.vimapt.get_presist_list
+        service.vimapt.get_presist_list = lambda: calls.append(1) or original_loader()
+
+        # served from memory while database is not changed
+        self.assertEqual(service.get_remove_list(), [])
+        self.assertEqual(calls, [])
+
+        # size and mtime of database file do not change, e.g. by coarse mtime of filesystem
+        stat = os.stat(service.database_path)
+        database = PackageDatabase(self.vim_dir)
+        database.install("foo", {"version": "1.0"})
+        database.close()
+        os.utime(service.database_path, (stat.st_atime, stat.st_mtime))
+
+        self.assertEqual(service.get_remove_list(), ["foo"])
+        self.assertEqual(calls, [1])
+        self.assertEqual(service.get_purge_list(), ["foo"])
+
+    def test_cache_invalidated_by_rebuild(self):
+        service = Service.Service(self.vim_dir)
+        self.assertEqual(service.get_purge_list(), [])
+
+        os.unlink(service.database_path)
+        database = PackageDatabase(self.vim_dir)
+        database.install("foo", {"version": "1.0"})
+        database.close()
+
+        self.assertEqual(service.get_purge_list(), ["foo"])
+
+    def test_package_name_list_without_index(self):
+        service = Service.Service(self.vim_dir)
+        self.assertEqual(service.get_package_name_list(), [])
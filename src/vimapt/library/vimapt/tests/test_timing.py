@@ -0,0 +1,103 @@
+import io
+import os
+import json
+import pstats
+import shutil
+import tempfile
+import unittest
+
+from vimapt import Timing
+from vimapt.Install import Install
+from vimapt.Remove import Remove
+from vimapt.tests import generators
+
+
+class TestTiming(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp()
+        self.span_file = os.path.join(self.work_dir, "timing.jsonl")
+        Timing.set_output(self.span_file)
+
+    def tearDown(self):
+        Timing.set_output(None)
+        shutil.rmtree(self.work_dir)
+
+    def read_spans(self):
+        with io.open(self.span_file, encoding="utf-8") as fd:
+            return [json.loads(line) for line in fd]
+
+    def test_nested_span(self):
+        with Timing.span("outer", name="ctrlp") as fields:
+            with Timing.span("inner"):
+                pass
+            fields["files"] = 3
+
+        inner, outer = self.read_spans()
+        self.assertEqual(inner["span"], "inner")
+        self.assertEqual(inner["parent"], "outer")
+        self.assertEqual(outer["parent"], None)
+        self.assertEqual(outer["name"], "ctrlp")
+        self.assertEqual(outer["files"], 3)
+        self.assertGreaterEqual(outer["duration"], inner["duration"])
+
+    def test_span_error(self):
+        with self.assertRaises(ValueError):
+            with Timing.span("broken"):
+                raise ValueError("broken")
+
+        span, = self.read_spans()
+        self.assertEqual(span["error"], "ValueError")
+
+    def test_no_output(self):
+        Timing.set_output(None)
+        with Timing.span("quiet"):
+            pass
+        self.assertEqual(self.read_spans(), [])
+
+    def test_rotate(self):
+        old_size = Timing.MAX_OUTPUT_SIZE
+        Timing.MAX_OUTPUT_SIZE = 500
+        try:
+            for i in range(20):
+                with Timing.span("loop", index=i):
+                    pass
+        finally:
+            Timing.MAX_OUTPUT_SIZE = old_size
+
+        self.assertLess(os.path.getsize(self.span_file), 500)
+        self.assertLess(os.path.getsize(self.span_file + ".1"), 500 + 200)
+        # newest span is never lost
+        with Timing.span("last"):
+            pass
+        self.assertEqual(self.read_spans()[-1]["span"], "last")
+
+    def test_install_and_remove_spans(self):
+        vim_dir = generators.make_vim_dir(self.work_dir)
+        package_file = generators.make_package(self.work_dir, "big", file_number=5)
+        Install(vim_dir)._install_package(package_file)
+        Remove(vim_dir).remove_package("big")
+
+        span_dict = dict((span["span"], span) for span in self.read_spans())
+        for span_name in ["install.control", "install.check", "install.extract", "install.record"]:
+            self.assertEqual(span_dict[span_name]["parent"], "install.package")
+        self.assertEqual(span_dict["install.package"]["name"], "big")
+        self.assertEqual(span_dict["install.extract"]["files"], 8)
+        for span_name in ["remove.control", "remove.files", "remove.record"]:
+            self.assertEqual(span_dict[span_name]["parent"], "remove")
+
+    def test_pop_profile_option(self):
+        self.assertEqual(Timing.pop_profile_option(["vim", "install", "ctrlp"]),
+                         (None, ["vim", "install", "ctrlp"]))
+        self.assertEqual(Timing.pop_profile_option(["--profile", "out.prof", "vim", "update"]),
+                         ("out.prof", ["vim", "update"]))
+        self.assertEqual(Timing.pop_profile_option(["vim", "--profile=out.prof", "update"]),
+                         ("out.prof", ["vim", "update"]))
+
+    def test_profile(self):
+        profile_file = os.path.join(self.work_dir, "out.prof")
+        with Timing.profile(profile_file):
+            sorted(range(1000))
+        self.assertTrue(pstats.Stats(profile_file).total_calls > 0)
+
+        with Timing.profile(None):
+            pass
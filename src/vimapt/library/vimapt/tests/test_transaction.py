@@ -0,0 +1,119 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from vimapt import Transaction
+from vimapt.Install import Install
+from vimapt.Vimapt import Vimapt
+from vimapt.tests.generators import make_vim_dir
+from vimapt.tests.test_install import make_package
+
+
+class TestTransaction(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp()
+        self.vim_dir = make_vim_dir(self.work_dir)
+        self.journal_path = os.path.join(self.vim_dir, Transaction.JOURNAL_RELATIVE_PATH)
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir)
+
+    def stage(self, name, file_dict):
+        transaction = Transaction.Transaction(self.vim_dir, name)
+        staging_dir = transaction.begin()
+        for path, content in file_dict.items():
+            file_path = os.path.join(staging_dir, path)
+            if not os.path.isdir(os.path.dirname(file_path)):
+                os.makedirs(os.path.dirname(file_path))
+            with open(file_path, "w") as fd:
+                fd.write(content)
+        return transaction
+
+    def read(self, path):
+        with open(os.path.join(self.vim_dir, path)) as fd:
+            return fd.read()
+
+    def test_commit(self):
+        transaction = self.stage("foo", {"plugin/foo.vim": "foo"})
+        transaction.commit({"version": "1.0"}, [["plugin/foo.vim", 1]])
+
+        self.assertEqual(self.read("plugin/foo.vim"), "foo")
+        self.assertEqual(Vimapt(self.vim_dir).get_owner("plugin/foo.vim"), "foo")
+        self.assertFalse(os.path.exists(self.journal_path))
+        self.assertFalse(os.path.exists(transaction.staging_dir))
+
+    def test_control_data_not_in_json(self):
+        # YAML loads the date as datetime.date, which JSON can not carry
+        package_file = make_package(self.work_dir, "version: 1.0.0\nrelease-date: 2017-05-31\n")
+        Install(self.vim_dir)._install_package(package_file)
+
+        self.assertEqual(Vimapt(self.vim_dir).get_version_dict(), {"vimapt": "1.0.0"})
+        self.assertFalse(os.path.exists(self.journal_path))
+        self.assertEqual(os.listdir(os.path.join(self.vim_dir, Transaction.STAGING_RELATIVE_DIR)), [])
+
+    def test_failed_commit_before_apply(self):
+        transaction = self.stage("foo", {"plugin/foo.vim": "foo"})
+
+        def broken_fsync(_):
+            raise OSError("disk full")
+
+        transaction._fsync_file = broken_fsync
+        self.assertRaises(OSError, transaction.commit, {"version": "1.0"}, [["plugin/foo.vim", 1]])
+
+        self.assertFalse(os.path.exists(self.journal_path))
+        self.assertFalse(os.path.exists(transaction.staging_dir))
+        self.assertFalse(os.path.exists(os.path.join(self.vim_dir, "plugin/foo.vim")))
+
+    def test_failed_extract_touch_nothing(self):
+        def broken_filter(file_name, _):
+            raise IOError("disk full")
+
+        install = Install(self.vim_dir)
+        install._extract_hook = broken_filter
+        self.assertRaises(IOError, install._install_package, make_package(self.work_dir))
+
+        self.assertFalse(os.path.exists(self.journal_path))
+        self.assertEqual(os.listdir(os.path.join(self.vim_dir, "vimapt/control")), [])
+        self.assertEqual(Vimapt(self.vim_dir).get_installed_list(), [])
+
+    def test_recover_staging(self):
+        transaction = self.stage("foo", {"plugin/foo.vim": "foo"})
+
+        self.assertEqual(Transaction.recover(self.vim_dir), "foo")
+        self.assertFalse(os.path.exists(os.path.join(self.vim_dir, "plugin/foo.vim")))
+        self.assertFalse(os.path.exists(transaction.staging_dir))
+        self.assertIsNone(Transaction.recover(self.vim_dir))
+
+    def test_recover_committing(self):
+        transaction = self.stage("foo", {"plugin/foo.vim": "foo", "plugin/bar.vim": "bar"})
+        transaction.path_list = transaction._scan_staging_dir()
+        transaction._write_journal({"state": Transaction.STATE_COMMITTING, "package": "foo",
+                                    "staged": transaction.path_list, "control": {"version": "1.0"},
+                                    "files": [["plugin/bar.vim", 1], ["plugin/foo.vim", 1]]})
+        # killed after the first file is moved
+        os.makedirs(os.path.join(self.vim_dir, "plugin"))
+        os.rename(os.path.join(transaction.staging_dir, "plugin/bar.vim"),
+                  os.path.join(self.vim_dir, "plugin/bar.vim"))
+
+        Transaction.recover(self.vim_dir)
+        self.assertEqual(self.read("plugin/bar.vim"), "bar")
+        self.assertEqual(self.read("plugin/foo.vim"), "foo")
+        self.assertEqual(Vimapt(self.vim_dir).get_version_dict(), {"foo": "1.0"})
+        self.assertTrue(os.path.isfile(os.path.join(self.vim_dir, "vimapt/install/foo")))
+
+    def test_rollback_restore_replaced_file(self):
+        os.makedirs(os.path.join(self.vim_dir, "plugin"))
+        with open(os.path.join(self.vim_dir, "plugin/foo.vim"), "w") as fd:
+            fd.write("old")
+
+        transaction = self.stage("foo", {"plugin/foo.vim": "new"})
+        transaction.path_list = transaction._scan_staging_dir()
+        transaction._apply()
+        self.assertEqual(self.read("plugin/foo.vim"), "new")
+
+        transaction._write_journal({"state": Transaction.STATE_ROLLBACK, "package": "foo",
+                                    "staged": transaction.path_list})
+        Transaction.recover(self.vim_dir)
+        self.assertEqual(self.read("plugin/foo.vim"), "old")
+        self.assertEqual(Vimapt(self.vim_dir).get_installed_list(), [])
@@ -0,0 +1,86 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from vimapt.Extract import Extract, open_package
+from vimapt.VapCompress import VapCompress
+from vimapt.VapExtract import VapExtract
+from vimapt.exception import VimaptAbortOperationException
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+package_file = os.path.join(current_dir, "vimapt_1.0-1.vpb")
+
+
+class TestVap(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp()
+        self.source_dir = os.path.join(self.work_dir, "source")
+        self.output_dir = os.path.join(self.work_dir, "output")
+        self.package_path = os.path.join(self.work_dir, "vimapt_1.0-1.vap")
+        Extract(package_file, self.source_dir).extract()
+
+        os.makedirs(os.path.join(self.source_dir, "doc"))
+        self.binary_stream = bytes(bytearray(range(256))) * 1024
+        with open(os.path.join(self.source_dir, "doc/logo.png"), "wb") as fd:
+            fd.write(self.binary_stream)
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir)
+
+    def test_round_trip(self):
+        VapCompress(self.source_dir, self.package_path).compress()
+        self.assertLess(os.path.getsize(self.package_path), len(self.binary_stream))
+
+        extract = open_package(self.package_path, self.output_dir)
+        self.assertTrue(isinstance(extract, VapExtract))
+        self.assertTrue(extract.read("vimapt/control/vimapt.yaml").startswith("depends: "))
+
+        extract.extract()
+        for file_name, _ in extract.get_file_list():
+            with open(os.path.join(self.source_dir, file_name), "rb") as fd:
+                expected_stream = fd.read()
+            with open(os.path.join(self.output_dir, file_name), "rb") as fd:
+                self.assertEqual(fd.read(), expected_stream)
+
+    def test_broken_member(self):
+        VapCompress(self.source_dir, self.package_path).compress()
+        extract = VapExtract(self.package_path, self.output_dir)
+
+        # pretend the index records another checksum for the binary member
+        extract.member_list = [member[:4] + ("0" * 64,) if member[0] == "doc/logo.png" else member
+                               for member in extract.member_list]
+
+        self.assertRaises(VimaptAbortOperationException, extract.extract)
+        self.assertFalse(os.path.exists(os.path.join(self.output_dir, "doc/logo.png")))
+
+    def test_broken_member_is_not_hooked(self):
+        VapCompress(self.source_dir, self.package_path).compress()
+        extract = VapExtract(self.package_path, self.output_dir)
+        extract.member_list = [member[:4] + ("0" * 64,) if member[0] == "doc/logo.png" else member
+                               for member in extract.member_list]
+        hooked_list = []
+
+        def hook_object(file_name, file_stream):
+            hooked_list.append(file_name)
+            return file_name, file_stream
+
+        extract.hook(hook_object)
+        self.assertRaises(VimaptAbortOperationException, extract.extract)
+        self.assertNotIn("doc/logo.png", hooked_list)
+        self.assertFalse(os.path.exists(os.path.join(self.output_dir, "doc/logo.png")))
+
+    def test_open_vpb(self):
+        self.assertTrue(isinstance(open_package(package_file, self.output_dir), Extract))
+
+    def test_filter_and_select(self):
+        VapCompress(self.source_dir, self.package_path).compress()
+        extract = VapExtract(self.package_path, self.output_dir)
+        extract.select(lambda file_name, size: size > 0)
+        extract.filter(lambda file_name, file_stream: not file_stream.startswith(b"depends: "))
+        extract.extract()
+
+        self.assertFalse(os.path.exists(os.path.join(self.output_dir, "vimrc/vimapt.vimrc")))
+        self.assertFalse(os.path.exists(os.path.join(self.output_dir, "vimapt/control/vimapt.yaml")))
+        with open(os.path.join(self.output_dir, "doc/logo.png"), "rb") as fd:
+            self.assertEqual(fd.read(), self.binary_stream)
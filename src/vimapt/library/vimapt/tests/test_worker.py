@@ -0,0 +1,62 @@
+import os
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from six import StringIO
+
+from vimapt.Worker import Worker
+from vimapt.tests.generators import make_vim_dir
+from vimapt.tests.repo_server import RepoServer
+from vimapt.tests.test_install import make_remote_repo
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+worker_file = os.path.join(current_dir, "../../../bin/worker.py")
+
+
+def parse_output(stream):
+    return [json.loads(line) for line in stream.splitlines()]
+
+
+class TestWorker(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp()
+        self.vim_dir = make_vim_dir(self.work_dir)
+        self.repo_dir = make_remote_repo(self.work_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir)
+
+    def test_install_progress(self):
+        with RepoServer(self.repo_dir) as server:
+            with open(os.path.join(self.vim_dir, "vimapt/source"), "w") as fd:
+                fd.write(server.url)
+            output = StringIO()
+            self.assertEqual(Worker(self.vim_dir, output).run("update"), 0)
+            self.assertEqual(Worker(self.vim_dir, output).run("install", ["app"]), 0)
+
+        message_list = parse_output(output.getvalue())
+        self.assertEqual(message_list[1], {"type": "result", "ok": True, "message": "Update Succeed!"})
+        progress_list = [i["message"] for i in message_list[2:] if i["type"] == "progress"]
+        self.assertEqual(progress_list[-2:], ["installing lib 1.0.0", "installing app 1.0.0"])
+        self.assertEqual(message_list[-1], {"type": "result", "ok": True, "message": "Install Succeed!"})
+
+    def test_failure_result(self):
+        output = StringIO()
+        self.assertEqual(Worker(self.vim_dir, output).run("dance"), 1)
+        self.assertEqual(parse_output(output.getvalue()),
+                         [{"type": "result", "ok": False, "message": "unknown command: dance"}])
+
+    def test_headless_process(self):
+        with RepoServer(self.repo_dir) as server:
+            with open(os.path.join(self.vim_dir, "vimapt/source"), "w") as fd:
+                fd.write(server.url)
+            process = subprocess.Popen([sys.executable, worker_file, self.vim_dir, "update"],
+                                       stdout=subprocess.PIPE)
+            stdout, _ = process.communicate()
+
+        self.assertEqual(process.returncode, 0)
+        self.assertEqual(parse_output(stdout.decode("utf-8"))[-1]["message"], "Update Succeed!")
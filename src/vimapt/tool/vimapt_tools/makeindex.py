@@ -1,8 +1,10 @@
 #!/usr/bin/env python
 
 import os
+import sys
 
 from vimapt import RemoteRepo
+from vimapt import Timing
 
 
 def make_index(work_dir):
@@ -11,7 +13,13 @@ def make_index(work_dir):
 
 
 def main():
-    make_index(os.getcwd())
+    profile_file, _ = Timing.pop_profile_option(sys.argv[1:])
+    work_dir = os.getcwd()
+    if profile_file:
+        # spans are kept beside the profile, 'index' directory is published with the repository
+        Timing.set_output(profile_file + '.timing.jsonl')
+    with Timing.profile(profile_file):
+        make_index(work_dir)
 
 
 if __name__ == "__main__":
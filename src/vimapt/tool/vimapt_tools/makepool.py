@@ -1,26 +1,152 @@
 #!/usr/bin/env python
 
 import os
+import time
+import hashlib
+import multiprocessing
+
+from vimapt.data_format import dumps, loads
+
 from . import makevpb
 
+# build manifest, record content fingerprint of every packaging dir that is built successfully
+MANIFEST_FILE = '.vimapt-pool-manifest'
+
+
+def fingerprint(pkg_dir, package_format):
+    """
+    Compute content fingerprint of packaging dir
+    :param pkg_dir: packaging dir
+    :param package_format: format of package, different format have different fingerprint
+    :return: string, hex digest
+    """
+    checksum = hashlib.sha1(package_format.encode('utf-8'))
+    for root_dir, dir_names, file_names in os.walk(pkg_dir):
+        dir_names.sort()  # make walking order stable
+        for file_name in sorted(file_names):
+            file_path = os.path.join(root_dir, file_name)
+            relative_path = os.path.relpath(file_path, pkg_dir)
+            checksum.update(relative_path.encode('utf-8') + b'\0')
+            with open(file_path, 'rb') as fd:
+                for chunk in iter(lambda: fd.read(64 * 1024), b''):
+                    checksum.update(chunk)
+            checksum.update(b'\0')
+    return checksum.hexdigest()
+
+
+def build_package(pkg_dir, package_format):
+    """
+    Build a single packaging dir, run in worker process
+    :return: tuple of (dir name, succeed or not, seconds used, error message)
+    """
+    dir_name = os.path.basename(pkg_dir)
+    start_time = time.time()
+    try:
+        makevpb.VimAptMakeVpb(pkg_dir, package_format).make()
+    except Exception as e:
+        return dir_name, False, time.time() - start_time, str(e)
+    return dir_name, True, time.time() - start_time, None
+
+
+def _build_package_star(args):
+    return build_package(*args)
+
+
+def load_manifest(work_dir):
+    manifest_path = os.path.join(work_dir, MANIFEST_FILE)
+    if not os.path.isfile(manifest_path):
+        return {}
+    with open(manifest_path) as fd:
+        return loads(fd.read()) or {}
 
-def make_pool(work_dir):
+
+def write_manifest(work_dir, manifest):
+    manifest_path = os.path.join(work_dir, MANIFEST_FILE)
+    with open(manifest_path, 'w') as fd:
+        fd.write(dumps(manifest, 'json'))
+
+
+def make_pool(work_dir, package_format='vpb', jobs=None, force=False):
+    """
+    Build package for every packaging dir in work_dir, in parallel.
+    Packaging dir which content is not changed since last build will be skipped.
+    :param work_dir: dir that contains packaging dirs
+    :param package_format: 'vpb' or 'vap'
+    :param jobs: number of worker process, default is number of CPU
+    :param force: rebuild all packages even if not changed
+    :return: dict of 'built', 'skipped' and 'failed' list
+    """
+    manifest = load_manifest(work_dir)
+
+    pkg_dir_list = []
     for (dir_path, dir_names, file_names) in os.walk(work_dir):
-        for dir_name in dir_names:
-            pkg_dir = os.path.join(dir_path, dir_name)
-            obj = makevpb.VimAptMakeVpb(pkg_dir)
-            try:
-                obj.make()
-            except Exception as e:
-                print("%s build failed!" % dir_name)
-                print(e)
-            else:
-                print("%s build successful!" % dir_name)
+        for dir_name in sorted(dir_names):
+            pkg_dir_list.append(os.path.join(dir_path, dir_name))
         break
 
+    summary = {'built': [], 'skipped': [], 'failed': []}
+    build_list = []
+    fingerprint_dict = {}
+    for pkg_dir in pkg_dir_list:
+        dir_name = os.path.basename(pkg_dir)
+        start_time = time.time()
+        try:
+            pkg_fingerprint = fingerprint(pkg_dir, package_format)
+        except (IOError, OSError) as e:
+            print("%s build failed!" % dir_name)
+            print(e)
+            summary['failed'].append((dir_name, time.time() - start_time))
+            continue
+        target_file = makevpb.VimAptMakeVpb(pkg_dir, package_format).target_file
+        if not force and manifest.get(dir_name) == pkg_fingerprint and os.path.isfile(target_file):
+            summary['skipped'].append((dir_name, time.time() - start_time))
+            continue
+        fingerprint_dict[dir_name] = pkg_fingerprint
+        build_list.append((pkg_dir, package_format))
+
+    jobs = jobs or multiprocessing.cpu_count()
+    if jobs > 1 and len(build_list) > 1:
+        pool = multiprocessing.Pool(min(jobs, len(build_list)))
+        try:
+            result_list = pool.imap_unordered(_build_package_star, build_list)
+            result_list = list(result_list)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        result_list = [build_package(*args) for args in build_list]
+
+    for dir_name, succeed, elapsed, error in result_list:
+        if succeed:
+            print("%s build successful!" % dir_name)
+            manifest[dir_name] = fingerprint_dict[dir_name]
+            summary['built'].append((dir_name, elapsed))
+        else:
+            print("%s build failed!" % dir_name)
+            print(error)
+            manifest.pop(dir_name, None)
+            summary['failed'].append((dir_name, elapsed))
+
+    write_manifest(work_dir, manifest)
+    print_summary(summary)
+    return summary
+
+
+def print_summary(summary):
+    for status in ['built', 'skipped', 'failed']:
+        print("%s: %d" % (status, len(summary[status])))
+        for dir_name, elapsed in sorted(summary[status], key=lambda i: -i[1]):
+            print("    %s %.3fs" % (dir_name, elapsed))
+
 
 def main():
-    make_pool(os.getcwd())
+    parser = makevpb.get_argument_parser("Make package for every packaging dir of current dir")
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help="number of worker process (default: number of CPU)")
+    parser.add_argument('--force', action='store_true',
+                        help="rebuild packages even if content is not changed")
+    args = parser.parse_args()
+    make_pool(os.getcwd(), args.package_format, args.jobs, args.force)
 
 if __name__ == "__main__":
     main()
@@ -1,13 +1,18 @@
 #!/usr/bin/env python
 
 import os
+import argparse
 
 from vimapt import Compress
+from vimapt import VapCompress
+
+PACKAGE_FORMAT_LIST = ['vpb', 'vap']
 
 
 class VimAptMakeVpb(object):
-    def __init__(self, work_dir):
+    def __init__(self, work_dir, package_format='vpb'):
         self.work_dir = work_dir
+        self.package_format = package_format
         self.target_dir = os.path.dirname(self.work_dir)
         self.dir_name = os.path.basename(self.work_dir)
 
@@ -16,16 +21,27 @@ class VimAptMakeVpb(object):
         self.pkg_name = '_'.join(pkg_name_segments[:-1])
         full_version = pkg_name_segments[-1]
 
-        self.full_pkg_name = self.pkg_name + "_" + full_version + ".vpb"
+        self.full_pkg_name = self.pkg_name + "_" + full_version + "." + self.package_format
         self.target_file = os.path.join(self.target_dir, self.full_pkg_name)
 
     def make(self):
-        compress_object = Compress.Compress(self.work_dir, self.target_file)
+        if self.package_format == 'vap':
+            compress_object = VapCompress.VapCompress(self.work_dir, self.target_file)
+        else:
+            compress_object = Compress.Compress(self.work_dir, self.target_file)
         compress_object.compress()
 
 
+def get_argument_parser(description):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--format', dest='package_format', choices=PACKAGE_FORMAT_LIST, default='vpb',
+                        help="package format, 'vap' is binary safe and compressed (default: vpb)")
+    return parser
+
+
 def main():
-    obj = VimAptMakeVpb(os.getcwd())
+    args = get_argument_parser("Make package from current packaging dir").parse_args()
+    obj = VimAptMakeVpb(os.getcwd(), args.package_format)
     obj.make()
 
 if __name__ == "__main__":
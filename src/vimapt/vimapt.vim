@@ -1,10 +1,10 @@
 " detect if python feature is supported
 if has('python')
         let s:python = 'python'
-        let s:pyfile = 'pyfile'
+        let s:pyeval = 'pyeval'
 elseif has('python3')
         let s:python = 'python3'
-        let s:pyfile = 'py3file'
+        let s:pyeval = 'py3eval'
 else
         echo "VimApt require vim support python or python3, which not, VimApt aborted!"
         finish 
@@ -15,39 +15,46 @@ function VimAptPythonCall(clause)
     execute s:python . ' ' . a:clause 
 endfunction
 
-" pycall abstract function
-function VimAptPyfileCall(python_file)
-    execute s:pyfile . ' ' . a:python_file 
-endfunction
-
-" VimApt abstract command
-function VimAptCommand(command_name, ...)
-    let s:command_args = a:000
+" Load vimapt service into python interpreter, it stays there and keeps index and installed state in memory
+let s:service_loaded = 0
+function VimAptServiceLoad()
+    if s:service_loaded
+        return
+    endif
 
     call VimAptPythonCall('import vim')
     call VimAptPythonCall('import os')
     call VimAptPythonCall('import sys')
 
-    call VimAptPythonCall('current_dir = os.path.dirname(vim.eval("s:current_file"))')
-    call VimAptPythonCall('library_dir = os.path.join(current_dir, "library")')
-    call VimAptPythonCall('sys.path.append(library_dir)')
+    call VimAptPythonCall('sys.path.append(os.path.join(os.path.dirname(vim.eval("s:current_file")), "library"))')
+    call VimAptPythonCall('from vimapt import Service as vimapt_service')
 
-    call VimAptPythonCall('python_script = os.path.join(current_dir, "bin/' . a:command_name . '.py")')
-    call VimAptPythonCall('vim.command("let s:python_script = \"" + python_script + "\"")')
-    
-    call VimAptPythonCall('sys.argv = ["", vim.eval("s:vim_dir_path")]')
-    call VimAptPythonCall('sys.argv.extend(vim.eval("s:command_args"))')
+    let s:service_loaded = 1
+endfunction
 
-    call VimAptPyfileCall(s:python_script)
+" Call method of vimapt service, return its result
+function VimAptServiceCall(method_name, ...)
+    call VimAptServiceLoad()
+    let s:command_args = a:000
+    return call(s:pyeval, ['vimapt_service.get_service(vim.eval("s:vim_dir_path")).' . a:method_name . '(*vim.eval("s:command_args"))'])
 endfunction
 
-" Load all the .vimrc file
-for vimrc_file in split(glob('~/.vim/vimrc/*.vimrc'), '\n')
-    execute 'source' vimrc_file
-endfor
+" Load the .vimrc files, through the loader made by vimapt if there is one.
+" Loader is not used when any .vimrc file is edited after it is made, until ':VimApt reload'.
+" g:vimapt_loader_file is set by ':VimApt profile' to use the profile loader.
+let s:loader_file = get(g:, 'vimapt_loader_file', expand('~/.vim/vimapt/loader.vim'))
+let s:vimrc_file_list = split(glob('~/.vim/vimrc/*.vimrc'), '\n')
+let s:loader_time = getftime(s:loader_file)
+if s:loader_time >= 0 && empty(filter(copy(s:vimrc_file_list), 'getftime(v:val) > s:loader_time'))
+    execute 'source' fnameescape(s:loader_file)
+else
+    for vimrc_file in s:vimrc_file_list
+        execute 'source' fnameescape(vimrc_file)
+    endfor
+endif
 
 let s:current_file = expand("<sfile>")
-let s:command_list = ['install', 'remove', 'purge', 'update', 'repolist', 'list', 'purgelist']
+let s:command_list = ['install', 'remove', 'purge', 'update', 'repolist', 'list', 'purgelist', 'clean', 'owns', 'reload', 'profile']
 let runtimepath_stream = &runtimepath
 let runtimepath_list = split(runtimepath_stream, ',')
 let vim_dir_var = get(runtimepath_list, 0)
@@ -56,20 +63,101 @@ let s:package_list = []
 let s:package_remove_list = []
 let s:package_purge_list = []
 
-function VimAptInstall(vim_dir, package_name)
-    call VimAptCommand('install', a:package_name)
+" Python used by background worker, same major version as Vim's by default
+if !exists('g:vimapt_python')
+    let g:vimapt_python = s:python
+endif
+let s:job = 0
+let s:job_status = ''
+
+" Run command in background worker, so that Vim is not blocked by network and disk I/O
+function VimAptJobStart(command_name, ...)
+    if !exists('*job_start')
+        " Vim without job feature, run in foreground
+        return call('VimAptServiceCall', [a:command_name] + a:000)
+    endif
+    if type(s:job) != type(0) && job_status(s:job) == 'run'
+        echo 'VimApt: ' . s:job_status . ' (busy)'
+        return
+    endif
+
+    let worker_file = fnamemodify(s:current_file, ':h') . '/bin/worker.py'
+    let command = [g:vimapt_python, worker_file, s:vim_dir_path, a:command_name] + a:000
+    let s:job_status = a:command_name . ' started'
+    let s:job = job_start(command, {'out_cb': 'VimAptJobOutput', 'err_cb': 'VimAptJobError'})
+endfunction
+
+" Each line of worker output is a JSON message
+function VimAptJobOutput(channel, line)
+    try
+        let message = json_decode(a:line)
+    catch
+        return
+    endtry
+    let s:job_status = message['message']
+    if message['type'] == 'result'
+        if message['ok']
+            echomsg 'VimApt: ' . message['message']
+        else
+            echohl ErrorMsg | echomsg 'VimApt: ' . message['message'] | echohl None
+        endif
+    else
+        echo 'VimApt: ' . message['message']
+    endif
+    redrawstatus
+endfunction
+
+function VimAptJobError(channel, line)
+    call ch_log('vimapt worker: ' . a:line)
+endfunction
+
+" Status of background worker, can be used in 'statusline', e.g. set statusline+=%{VimAptStatus()}
+function VimAptStatus()
+    return s:job_status
+endfunction
+
+function VimAptInstall(vim_dir, ...)
+    call call('VimAptJobStart', ['install'] + a:000)
 endfunction
 
 function VimAptRemove(vim_dir, package_name)
-    call VimAptCommand('remove', a:package_name)
+    call VimAptServiceCall('remove', a:package_name)
 endfunction
 
 function VimAptPurge(vim_dir, package_name)
-    call VimAptCommand('purge', a:package_name)
+    call VimAptServiceCall('purge', a:package_name)
 endfunction
 
 function VimAptUpdate()
-    call VimAptCommand('update')
+    call VimAptJobStart('update')
+endfunction
+
+function VimAptClean()
+    call VimAptServiceCall('clean')
+endfunction
+
+function VimAptReload()
+    call VimAptServiceCall('reload')
+    execute 'source' fnameescape(s:loader_file)
+endfunction
+
+" Attribute startup time to packages, log is made by 'vim --startuptime' if not given
+function VimAptProfile(...)
+    if a:0
+        let log_file = a:1
+    else
+        let log_file = tempname()
+        " profile loader sources configure files of every package from a file of its own
+        let profile_loader = VimAptServiceCall('make_profile_loader')
+        let loader_command = 'let g:vimapt_loader_file = ' . string(profile_loader)
+        call system(shellescape(v:progpath) . ' --not-a-term --cmd ' . shellescape(loader_command)
+                    \ . ' --startuptime ' . shellescape(log_file) . ' -c qa!')
+    endif
+    call VimAptServiceCall('profile', log_file)
+endfunction
+
+function VimAptOwns(vim_dir, path)
+    call VimAptServiceCall('owns', a:path)
 endfunction
 
 function VimApt(command_arg, ...)
@@ -85,7 +173,7 @@ function VimApt(command_arg, ...)
     endif
 
     if vapt_command == 'install'
-        call VimAptInstall(s:vim_dir_path, package_arg)
+        call call('VimAptInstall', [s:vim_dir_path] + a:000)
     elseif vapt_command == 'remove'
         call VimAptRemove(s:vim_dir_path, package_arg)
     elseif vapt_command == 'purge'
@@ -98,21 +186,29 @@ function VimApt(command_arg, ...)
         call VimAptRepoList()
     elseif vapt_command == 'purgelist'
         call VimAptPurgeList()
+    elseif vapt_command == 'clean'
+        call VimAptClean()
+    elseif vapt_command == 'reload'
+        call VimAptReload()
+    elseif vapt_command == 'profile'
+        call call('VimAptProfile', a:000)
+    elseif vapt_command == 'owns'
+        call VimAptOwns(s:vim_dir_path, package_arg)
     else
         echo "Error: unknow command"
     endif
 endfunction
 
 function VimAptPackageList()
-    call VimAptCommand('pkg_list')
+    let s:package_list = VimAptServiceCall('get_package_name_list')
 endfunction
 
 function VimAptPackageRemoveList()
-    call VimAptCommand('pkg_remove_list')
+    let s:package_remove_list = VimAptServiceCall('get_remove_list')
 endfunction
 
 function VimAptPackagePurgeList()
-    call VimAptCommand('pkg_purge_list')
+    let s:package_purge_list = VimAptServiceCall('get_purge_list')
 endfunction
 
 function VimAptList()
@@ -141,7 +237,7 @@ function VimAptComplete(ArgLead, CmdLine, CursorPos)
         let current_command = get(token, 1)
         for commands in s:command_list
             if commands == current_command 
-                if current_command != "update" && current_command != "repolist" && current_command != "list" && current_command != "purgelist"
+                if current_command != "update" && current_command != "repolist" && current_command != "list" && current_command != "purgelist" && current_command != "clean" && current_command != "reload" && current_command != "profile" && current_command != "owns"
                     let complete_package_flag = 1 
                 endif
             endif